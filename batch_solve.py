@@ -0,0 +1,283 @@
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+import traceback
+import numpy as np
+from games import NormalFormGame, SecurityGame
+from experiment_scheduler import ExperimentScheduler
+from run_time_benchmarks import GAMES
+from solution_cache import SolutionCache
+from solver_selection import solve
+
+# the arrays a game of every type is saved with, see save_game
+GAME_ARRAYS = {
+    "normal": ("defender_payoffs",
+               "attacker_payoffs",
+               "attacker_type_probability"),
+    "compact": ("defender_covered",
+                "defender_uncovered",
+                "attacker_covered",
+                "attacker_uncovered",
+                "attacker_type_probability"),
+}
+GAME_CLASSES = {"normal": NormalFormGame, "compact": SecurityGame}
+
+# the solution cache of this process, see _get_cache
+_cache = None
+
+
+def save_game(path, game):
+    """
+    Save the payoffs of a normal form or security game to an .npz file.
+    """
+    arrays = dict((name, getattr(game, name))
+                  for name in GAME_ARRAYS[game.type])
+    if game.type == "compact":
+        arrays["max_coverage"] = game.max_coverage
+    np.savez_compressed(path, type=game.type, **arrays)
+
+
+def load_game(path):
+    """
+    Load a game saved by save_game.
+    """
+    with np.load(path) as data:
+        game_type = str(data["type"])
+        kwargs = dict((name, data[name])
+                      for name in data.files if name != "type")
+    return GAME_CLASSES[game_type](**kwargs)
+
+
+def game_from_spec(spec):
+    """
+    The game of a spec, a dict given in one of three ways:
+    - {"npz": path}: a game saved by save_game,
+    - {"type": "normal" or "compact", ...}: the arrays of GAME_ARRAYS as
+      nested lists, and max_coverage for security games,
+    - {"game": "normal", "security" or "patrol", "size": {...},
+      "seed": seed}: a game generated as in run_time_benchmarks, e.g. with
+      size {"num_targets": 10, "max_coverage": 3, "num_attacker_types": 2}
+      for a security game.
+    """
+    if "npz" in spec:
+        return load_game(spec["npz"])
+    if "type" in spec:
+        return GAME_CLASSES[spec["type"]](**dict(
+            (name, value) for name, value in spec.items()
+            if name in GAME_ARRAYS[spec["type"]] or name == "max_coverage"))
+    np.random.seed(spec.get("seed", 0))
+    return GAMES[spec["game"]](**spec["size"])
+
+
+def read_specs(paths):
+    """
+    Yield (source, spec) for every game in paths, read lazily: JSONL files
+    with one spec per line, see game_from_spec, .npz files holding one game
+    each, directories of such files, taken in name order, and "-" for JSONL
+    on stdin. source is "<path>:<line>", or the path of an .npz file. Lines
+    that are not valid JSON are yielded with the error message as spec.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            yield from read_specs(
+                sorted(os.path.join(path, name)
+                       for name in os.listdir(path)
+                       if name.endswith((".jsonl", ".npz"))))
+        elif path.endswith(".npz"):
+            yield (path, {"npz": path})
+        else:
+            f = sys.stdin if path == "-" else open(path)
+            try:
+                for number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        spec = json.loads(line)
+                    except ValueError as error:
+                        spec = str(error)
+                    yield ("{}:{}".format(path, number), spec)
+            finally:
+                if f is not sys.stdin:
+                    f.close()
+
+
+def solve_spec(spec, solver=None, cache_directory=None):
+    """
+    Solve the game of a spec, by its "solver" and "options" if given, or
+    else by solver, None for the solver select_solver chooses. Returns the
+    solution as a dict that can be dumped to JSON.
+    """
+    start_time = time.time()
+    game = game_from_spec(spec)
+    solution = solve(game, solver=spec.get("solver", solver),
+                     cache=_get_cache(cache_directory),
+                     **spec.get("options", {}))
+    return {"solver": solution.solver,
+            "opt_defender_payoff": solution.opt_defender_payoff,
+            "opt_attacker_pure_strategy":
+                list(solution.opt_attacker_pure_strategy),
+            "opt_defender_mixed_strategy":
+                solution.opt_defender_mixed_strategy.tolist(),
+            "solution_time": solution.solution_time,
+            "solution_time_with_overhead":
+                solution.solution_time_with_overhead,
+            "predicted_time": solution.predicted_time,
+            "wall_time": time.time() - start_time}
+
+
+def _get_cache(directory):
+    """
+    The solution cache of this process on directory, None without one.
+    Worker processes share the disk tier of the cache.
+    """
+    global _cache
+    if directory is None:
+        return None
+    if _cache is None or _cache.directory != directory:
+        _cache = SolutionCache(directory=directory)
+    return _cache
+
+
+class Throughput:
+    """
+    Counts of the outcomes of a batch and the time of its solutions per
+    solver, in constant memory.
+    """
+    def __init__(self):
+        self.start_time = time.time()
+        self.counts = dict.fromkeys(("ok", "timeout", "error"), 0)
+        # solver: [number of games, total wall time, max wall time]
+        self.solvers = {}
+
+    def add(self, status, result):
+        self.counts[status] += 1
+        if status == "ok":
+            solver = self.solvers.setdefault(result["solver"], [0, 0.0, 0.0])
+            solver[0] += 1
+            solver[1] += result["wall_time"]
+            solver[2] = max(solver[2], result["wall_time"])
+
+    def report(self):
+        elapsed = time.time() - self.start_time
+        games = sum(self.counts.values())
+        return dict(self.counts,
+                    games=games,
+                    elapsed=elapsed,
+                    games_per_second=games / elapsed if elapsed else 0.0,
+                    solvers=dict((solver, {"games": n,
+                                           "mean_wall_time": total / n,
+                                           "max_wall_time": longest})
+                                 for solver, (n, total, longest)
+                                 in sorted(self.solvers.items())))
+
+
+def run_batch(paths, output, solver=None, workers=1, timeout=None,
+              cache_directory=None):
+    """
+    Solve the games of paths, see read_specs, and write one JSON line per
+    game to output as it is solved, in order of completion:
+    {"id", "source", "status", ...}, with the solution of solve_spec if
+    status is "ok", the traceback if it is "error", and nothing more if it
+    is "timeout". id is the "id" of the spec, its source by default.
+    With workers > 1 or a timeout in seconds, games are solved on an
+    ExperimentScheduler. Specs are read only as workers become free, so
+    memory stays bounded however long the stream, and reading is held
+    back while output blocks. Returns the report of a Throughput.
+    """
+    throughput = Throughput()
+
+    def write(source, spec, status, result):
+        record = {"id": spec.get("id", source) if isinstance(spec, dict)
+                  else source,
+                  "source": source,
+                  "status": status}
+        if status == "ok":
+            record.update(result)
+        elif status == "error":
+            record["error"] = result
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+        throughput.add(status, result)
+
+    def jobs():
+        for source, spec in read_specs(paths):
+            if isinstance(spec, dict):
+                yield (source, spec)
+            else:
+                write(source, spec, "error", spec)
+
+    function = functools.partial(_solve_job, solver=solver,
+                                 cache_directory=cache_directory)
+    if workers > 1 or timeout is not None:
+        scheduler = ExperimentScheduler(function, workers, timeout)
+        outcomes = scheduler.run(jobs())
+    else:
+        outcomes = _run_here(function, jobs())
+    for (source, spec), status, result in outcomes:
+        write(source, spec, status, result)
+    return throughput.report()
+
+
+def _run_here(function, jobs):
+    """
+    Run jobs in this process, yielding (job, status, result) as
+    ExperimentScheduler.run does, without timeouts.
+    """
+    for job in jobs:
+        try:
+            yield (job, "ok", function(*job))
+        except Exception:
+            yield (job, "error", traceback.format_exc())
+
+
+def _solve_job(source, spec, solver=None, cache_directory=None):
+    """
+    solve_spec for a job of run_batch, which keeps the source of a spec.
+    """
+    return solve_spec(spec, solver, cache_directory)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Solve a stream of games from JSONL and NPZ files, "
+                    "writing the solutions as JSONL in order of completion.")
+    parser.add_argument("inputs", nargs="+",
+                        help="JSONL or .npz files, directories of them, or "
+                             "- for JSONL on stdin")
+    parser.add_argument("--output", default="-",
+                        help="JSONL output file, stdout by default")
+    parser.add_argument("--solver",
+                        help="solver of every game without one, chosen by "
+                             "the cost model by default")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes")
+    parser.add_argument("--timeout", type=float,
+                        help="cutoff in seconds of a single game")
+    parser.add_argument("--cache",
+                        help="directory of a solution cache shared by the "
+                             "workers and across runs")
+    parser.add_argument("--summary",
+                        help="JSON file to write the throughput report to")
+    args = parser.parse_args()
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        report = run_batch(args.inputs, output, args.solver, args.workers,
+                           args.timeout, args.cache)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print("{games} games in {elapsed:.1f}s, {games_per_second:.2f} games/s, "
+          "ok: {ok} timeouts: {timeout} errors: {error}".format(**report),
+          file=sys.stderr)
+    for solver, stats in report["solvers"].items():
+        print("{:<20} {:>8} games, mean {:.4f}s, max {:.4f}s".format(
+            solver, stats["games"], stats["mean_wall_time"],
+            stats["max_wall_time"]), file=sys.stderr)
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(report, f, indent=2)
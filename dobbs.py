@@ -1,16 +1,19 @@
 import itertools
-import pulp as plp
+from solver_backends import pulp as plp
 import numpy as np
 import time
+from phase_timer import PhaseTimer, save_times
+from profiling import profiled
 
+@profiled("__init__", "solve")
 class Dobbs:
     """
     Init dobbs will internally store an MILP representation
     of the game provided as the only constructor argument.
     """
     def __init__(self, game):
-        # init the game as an MILP
-        self.prob = plp.LpProblem(name="DOBBS", sense=plp.LpMaximize)
+        self.timer = PhaseTimer()
+        self.timer.switch("game_transform")
 
         # get payoffs and adversary probability distribution
         self.C = game.attacker_payoffs
@@ -21,6 +24,10 @@ class Dobbs:
         X, Q, L = self.R.shape
         self.X, self.Q, self.L = (X, Q, L)
 
+        # init the game as an MILP
+        self.timer.switch("model_build")
+        self.prob = plp.LpProblem(name="DOBBS", sense=plp.LpMaximize)
+
         # init z_ijl vars as lp variables
         self.z = np.ndarray(shape=(X, Q, L),
                             dtype=type(plp.LpVariable("dummy")))
@@ -81,14 +88,14 @@ class Dobbs:
         for i, l in itertools.product(range(X), range(L)):
             self.prob += sum([self.z[i,j,l] for j in range(Q)]) == \
                             sum([self.z[i,j,0] for j in range(Q)])
+        self.timer.stop()
 
     def solve(self):
         # use GLPK solver
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
+        self.timer.switch("solver_call")
         self.prob.solve(plp.GLPK(keepFiles=0, msg=0))
-
-        # save solution time (without overhead)
-        self.solution_time = time.time() - start_time
+        self.timer.switch("solution_extract")
 
         # save status
         self.status = plp.LpStatus[self.prob.status]
@@ -113,8 +120,9 @@ class Dobbs:
         # convert to tuple
         self.opt_attacker_pure_strategy = tuple(self.opt_attacker_pure_strategy)
 
-        # save solution time with overhead
-        self.solution_time_with_overhead = time.time() - start_time
+        # save phase times, solution time and solution time with overhead
+        self.timer.stop()
+        save_times(self, start_time)
 
 # for testing
 
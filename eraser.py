@@ -1,15 +1,24 @@
-import pulp as plp
+from solver_backends import pulp as plp
 import numpy as np
 import time
+from phase_timer import PhaseTimer, save_times
+from profiling import profiled
+from origami import Origami
 
 
+@profiled("__init__", "solve")
 class Eraser:
     """
     Init will internally store an MILP representation
-    of the security game provided as the only constructor argument
+    of the security game provided as the only constructor argument.
+    With origami_seed, Origami is run first and the MILP is restricted to
+    certifying its solution, see _seed_with_origami.
     """
 
-    def __init__(self, game, attacker_type=0):
+    def __init__(self, game, attacker_type=0, sparse=False,
+                 origami_seed=False):
+        self.timer = PhaseTimer()
+        self.timer.switch("game_transform")
         self.attacker_uncovered = game.attacker_uncovered[:,attacker_type]
         self.attacker_covered = game.attacker_covered[:,attacker_type]
         self.defender_uncovered = game.defender_uncovered[:,attacker_type]
@@ -21,6 +30,28 @@ class Eraser:
         # large constant
         self.Z = 9999
 
+        # set by _seed_with_origami
+        self.origami = None
+        self.num_free_binaries = self.num_targets
+        self.cutoff_tolerance = 1e-6
+        self.certify_tolerance = 1e-4
+
+        # build the MILP as sparse matrices for the in-process solver
+        self.sparse = sparse
+        self.timer.switch("model_build")
+        if self.sparse:
+            from milp_builders import eraser_model
+            self.model = eraser_model(self.attacker_uncovered,
+                                      self.attacker_covered,
+                                      self.defender_uncovered,
+                                      self.defender_covered,
+                                      self.max_coverage,
+                                      self.Z)
+            if origami_seed:
+                self._seed_with_origami(game, attacker_type)
+            self.timer.stop()
+            return
+
         self.prob = plp.LpProblem(name="ERASER", sense=plp.LpMaximize)
         self.d = plp.LpVariable("d", cat="Contineous")
         self.k = plp.LpVariable("k", cat="Contineous")
@@ -66,27 +97,129 @@ class Eraser:
                             (1 - self.C[t]) * self.attacker_uncovered[t]) - \
                             self.k <= 0
 
+        if origami_seed:
+            self._seed_with_origami(game, attacker_type)
+        self.timer.stop()
+
+    def _seed_with_origami(self, game, attacker_type):
+        """
+        Solve the game with Origami and restrict the MILP with its solution:
+        the a_t binaries of targets outside the attack-set are fixed to 0,
+        Origami's solution is set as the initial value of every variable,
+        and its defender payoff is imposed as a cutoff on the objective, so
+        that the solver starts from Origami's incumbent. GLPK does not read
+        initial values, the cutoff is what prunes its branch-and-bound.
+        """
+        self.origami = Origami(game, attacker_type)
+        self.origami.solve()
+        self.timer.add(self.origami.timer.take())
+
+        attack_set = set(self.origami.opt_attack_set)
+        incumbent = self.origami.opt_defender_payoff - self.cutoff_tolerance
+        target = self.origami.opt_attacked_target
+        coverage = self.origami.opt_coverage
+
+        # the remaining MILP work is branching on the attack-set only
+        self.num_free_binaries = len(attack_set)
+
+        if self.sparse:
+            # variables are laid out as [d, k, C, a]
+            for t in range(self.num_targets):
+                if t not in attack_set:
+                    self.model.upper[2 + self.num_targets + t] = 0
+            cutoff = np.zeros(2 + 2 * self.num_targets)
+            cutoff[0] = 1
+            self.model.add_constraint(cutoff, incumbent, np.inf)
+            return
+
+        for t in range(self.num_targets):
+            if t not in attack_set:
+                self.a[t].upBound = 0
+            self.C[t].setInitialValue(coverage[t])
+            self.a[t].setInitialValue(int(t == target))
+        self.d.setInitialValue(self.origami.opt_defender_payoff)
+        self.k.setInitialValue(coverage[target] * self.attacker_covered[target] +
+                               (1 - coverage[target]) *
+                               self.attacker_uncovered[target])
+        self.prob += self.d >= incumbent
+
+    def _certify_origami(self):
+        """
+        Record whether the MILP confirms the payoff found by Origami.
+        """
+        self.certified = self.status == "Optimal" and \
+            abs(self.opt_defender_payoff -
+                self.origami.opt_defender_payoff) <= self.certify_tolerance
 
     def solve(self):
+        if self.sparse:
+            self._solve_sparse()
+            return
+
         # record start time
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
 
         # use GLPK solver
+        self.timer.switch("solver_call")
         self.prob.solve(plp.GLPK(keepFiles=0, msg=0))
-
-        # save solution time (without overhead)
-        self.solution_time = time.time() - start_time
+        self.timer.switch("solution_extract")
 
         # save status
         self.status = plp.LpStatus[self.prob.status]
 
-        # save optimal coverage
-        self.opt_coverage = [plp.value(x) for x in self.C]
-
-        # save optimal attacked target and defender payoff
-        self.opt_defender_payoff = plp.value(self.prob.objective)
-        self.opt_attacked_target = [t for t in range(self.num_targets)
-                                    if plp.value(self.a[t]) == 1][0]
-
-        # save solution time with overhead
-        self.solution_time_with_overhead = time.time() - start_time
+        if self.status == "Optimal":
+            # save optimal coverage
+            self.opt_coverage = [plp.value(x) for x in self.C]
+
+            # save optimal attacked target and defender payoff
+            self.opt_defender_payoff = plp.value(self.prob.objective)
+            self.opt_attacked_target = [t for t in range(self.num_targets)
+                                        if plp.value(self.a[t]) == 1][0]
+        else:
+            # only possible if Origami's cutoff could not be met
+            self.opt_coverage = None
+            self.opt_defender_payoff = float("-inf")
+            self.opt_attacked_target = None
+
+        if self.origami is not None:
+            self.timer.switch("bookkeeping")
+            self._certify_origami()
+
+        # save phase times, solution time and solution time with overhead
+        self.timer.stop()
+        save_times(self, start_time)
+
+    def _solve_sparse(self):
+        start_time = time.perf_counter_ns()
+        self.timer.switch("solver_call")
+        self.model.solve()
+        self.timer.switch("solution_extract")
+
+        # save status and the branch-and-bound nodes HiGHS explored
+        self.status = self.model.status
+        self.mip_node_count = self.model.mip_node_count
+
+        if self.status == "Optimal":
+            # variables are laid out as [d, k, C, a]
+            C = self.model.x[2:2 + self.num_targets]
+            a = self.model.x[2 + self.num_targets:]
+
+            # save optimal coverage
+            self.opt_coverage = list(C)
+
+            # save optimal attacked target and defender payoff
+            self.opt_defender_payoff = -self.model.objective
+            self.opt_attacked_target = int(np.argmax(a))
+        else:
+            # only possible if Origami's cutoff could not be met
+            self.opt_coverage = None
+            self.opt_defender_payoff = float("-inf")
+            self.opt_attacked_target = None
+
+        if self.origami is not None:
+            self.timer.switch("bookkeeping")
+            self._certify_origami()
+
+        # save phase times, solution time and solution time with overhead
+        self.timer.stop()
+        save_times(self, start_time)
@@ -0,0 +1,152 @@
+import multiprocessing as mp
+import os
+import signal
+import time
+import traceback
+from multiprocessing.connection import wait
+
+# marks the end of the jobs
+_NO_JOB = object()
+
+
+class ExperimentScheduler:
+    """
+    Runs jobs, tuples of arguments to function, on a bounded pool of worker
+    processes. Workers are long lived and take their next job as soon as
+    they are done, so the pool stays saturated. A job running longer than
+    timeout seconds is cut off by killing its worker, together with any
+    solver subprocess it started, and only then is a new worker spawned.
+    With max_jobs_per_worker, workers are recycled after that many jobs.
+    function must be importable from a module, and is best given jobs that
+    build their game from a seed rather than pickled games or solvers.
+    """
+    def __init__(self, function, workers=None, timeout=None,
+                 max_jobs_per_worker=None):
+        self.function = function
+        self.workers = workers or os.cpu_count()
+        self.timeout = timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+
+        # number of worker processes started
+        self.num_spawned = 0
+
+    def run(self, jobs):
+        """
+        Run every job and yield (job, status, result) in order of
+        completion. status is "ok" with the return value of function as
+        result, "error" with the traceback of the exception it raised, or
+        "timeout" with result None.
+        jobs may be any iterable, e.g. a generator reading them from a file.
+        It is consumed only as workers become free, one job ahead, and
+        workers are spawned as jobs arrive, so a long stream of jobs is
+        held in memory a few at a time and is read no faster than it is
+        run, or than its results are taken from this generator.
+        """
+        jobs = iter(jobs)
+        job = next(jobs, _NO_JOB)
+        idle = []
+        busy = {}
+        try:
+            while job is not _NO_JOB or busy:
+                while job is not _NO_JOB and len(busy) < self.workers:
+                    worker = idle.pop() if idle else self._spawn()
+                    worker.job = job
+                    worker.start_time = time.time()
+                    worker.connection.send(worker.job)
+                    busy[worker.connection] = worker
+                    job = next(jobs, _NO_JOB)
+
+                # wait for a result or the first timeout
+                timeout = None
+                if self.timeout is not None:
+                    timeout = max(0, min(worker.start_time
+                                         for worker in busy.values()) +
+                                  self.timeout - time.time())
+                for connection in wait(list(busy), timeout):
+                    worker = busy.pop(connection)
+                    try:
+                        status, result = connection.recv()
+                        alive = True
+                    except EOFError:
+                        status, result = "error", "worker exited"
+                        alive = False
+                    worker.num_jobs += 1
+                    if not alive or (
+                            self.max_jobs_per_worker is not None and
+                            worker.num_jobs >= self.max_jobs_per_worker):
+                        self._stop(worker)
+                    else:
+                        idle.append(worker)
+                    yield (worker.job, status, result)
+
+                if self.timeout is None:
+                    continue
+                now = time.time()
+                for connection, worker in list(busy.items()):
+                    if now - worker.start_time >= self.timeout:
+                        del busy[connection]
+                        self._kill(worker)
+                        yield (worker.job, "timeout", None)
+        finally:
+            for worker in idle:
+                self._stop(worker)
+            for worker in busy.values():
+                self._kill(worker)
+
+    def _spawn(self):
+        connection, worker_connection = mp.Pipe()
+        process = mp.Process(target=_worker_loop,
+                             args=(self.function, worker_connection),
+                             daemon=True)
+        process.start()
+        worker_connection.close()
+        self.num_spawned += 1
+        return _Worker(process, connection)
+
+    def _stop(self, worker):
+        """
+        Let an idle worker exit.
+        """
+        try:
+            worker.connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        worker.process.join()
+        worker.connection.close()
+
+    def _kill(self, worker):
+        """
+        Kill a busy worker. It leads its own process group, so a GLPK
+        subprocess it is waiting on is killed with it.
+        """
+        try:
+            os.killpg(worker.process.pid, signal.SIGKILL)
+        except (AttributeError, OSError):
+            worker.process.kill()
+        worker.process.join()
+        worker.connection.close()
+
+
+class _Worker:
+    def __init__(self, process, connection):
+        self.process = process
+        self.connection = connection
+        self.num_jobs = 0
+        self.job = None
+        self.start_time = None
+
+
+def _worker_loop(function, connection):
+    """
+    Run the jobs sent over connection until None is sent.
+    """
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    while True:
+        job = connection.recv()
+        if job is None:
+            break
+        try:
+            connection.send(("ok", function(*job)))
+        except Exception:
+            connection.send(("error", traceback.format_exc()))
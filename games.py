@@ -106,6 +106,7 @@ class NormalFormGame:
         Transform given game into normalform if it's compact form,
         Conduct harsanyi transformation if requested or if given game is already
         in normalform.
+        Make a game of the given defender_payoffs and attacker_payoffs.
         Otherwise, generate a random game given arguments.
         """
         if "partial_game_from" in kwargs.keys():
@@ -130,6 +131,9 @@ class NormalFormGame:
                 # game already in normal form, so perform harsanyi
                 self._harsanyi()
 
+        elif "defender_payoffs" in kwargs.keys():
+            self._load_payoffs(kwargs)
+
         # game was not provided, so generate a random game
         else:
             self._generate_new_game(kwargs)
@@ -164,6 +168,28 @@ class NormalFormGame:
 
 
 
+    def _load_payoffs(self, kwargs):
+        """
+        Make a game of given payoffs, arrays of shape (num_defender_strategies,
+        num_attacker_strategies, num_attacker_types), and of the given
+        attacker_type_probability, uniform if not given.
+        """
+        self.defender_payoffs = np.array(kwargs['defender_payoffs'],
+                                         dtype=float)
+        self.attacker_payoffs = np.array(kwargs['attacker_payoffs'],
+                                         dtype=float)
+        (self.num_defender_strategies,
+         self.num_attacker_strategies,
+         self.num_attacker_types) = self.defender_payoffs.shape
+
+        if kwargs.get('attacker_type_probability') is not None:
+            self.attacker_type_probability = np.array(
+                kwargs['attacker_type_probability'], dtype=float)
+        else:
+            self.attacker_type_probability = np.zeros(
+                (self.num_attacker_types))
+            self.attacker_type_probability += (1.0 / self.num_attacker_types)
+
     def _compact_to_normal(self):
         """
         every possible comination of pure coverages is a defender strategy
@@ -278,9 +304,14 @@ class NormalFormGame:
         self.prob_typespace = float(
             self.game.attacker_type_probability[list(self.attacker_types)].sum())
 
-        for i, t in enumerate(self.attacker_types):
-            self.attacker_type_probability[i] = \
-                self.game.attacker_type_probability[t] / self.prob_typespace
+        if self.prob_typespace == 0:
+            # a typespace that never occurs, its types are weighed alike
+            self.attacker_type_probability += 1.0 / self.num_attacker_types
+        else:
+            for i, t in enumerate(self.attacker_types):
+                self.attacker_type_probability[i] = \
+                    self.game.attacker_type_probability[t] / \
+                    self.prob_typespace
 
 
 # TODO enable SecurityGame to deal with partial games
@@ -297,6 +328,8 @@ class SecurityGame:
             self.game = kwargs['partial_game_from']
             self.attacker_types = kwargs['attacker_types']
             self._create_partial_game()
+        elif "defender_covered" in kwargs.keys():
+            self._load_payoffs(kwargs)
         else:
             self.num_targets = kwargs['num_targets']
             self.max_coverage = kwargs['max_coverage']
@@ -330,6 +363,33 @@ class SecurityGame:
         # store the type of this representation
         self.type = "compact"
 
+    def _load_payoffs(self, kwargs):
+        """
+        Make a game of given payoffs, arrays of shape (num_targets,
+        num_attacker_types), max_coverage and attacker_type_probability,
+        uniform if not given.
+        """
+        self.defender_covered = np.array(kwargs['defender_covered'],
+                                         dtype=float)
+        self.defender_uncovered = np.array(kwargs['defender_uncovered'],
+                                           dtype=float)
+        self.attacker_covered = np.array(kwargs['attacker_covered'],
+                                         dtype=float)
+        self.attacker_uncovered = np.array(kwargs['attacker_uncovered'],
+                                           dtype=float)
+        self.max_coverage = int(kwargs['max_coverage'])
+        self.num_targets, self.num_attacker_types = \
+            self.defender_covered.shape
+        self.num_attacker_strategies = self.num_targets
+
+        if kwargs.get('attacker_type_probability') is not None:
+            self.attacker_type_probability = np.array(
+                kwargs['attacker_type_probability'], dtype=float)
+        else:
+            self.attacker_type_probability = np.zeros(
+                (self.num_attacker_types))
+            self.attacker_type_probability += (1.0 / self.num_attacker_types)
+
     def _create_partial_game(self):
         """
         Make a partial game out of game and attacker_types.
@@ -356,6 +416,11 @@ class SecurityGame:
         self.prob_typespace = float(
             self.game.attacker_type_probability[list(self.attacker_types)].sum())
 
-        for i, t in enumerate(self.attacker_types):
-            self.attacker_type_probability[i] = \
-                self.game.attacker_type_probability[t] / self.prob_typespace
+        if self.prob_typespace == 0:
+            # a typespace that never occurs, its types are weighed alike
+            self.attacker_type_probability += 1.0 / self.num_attacker_types
+        else:
+            for i, t in enumerate(self.attacker_types):
+                self.attacker_type_probability[i] = \
+                    self.game.attacker_type_probability[t] / \
+                    self.prob_typespace
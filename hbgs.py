@@ -1,129 +1,268 @@
+import json
 import numpy as np
+from dataclasses import dataclass, asdict
 from games import NormalFormGame, SecurityGame
-from multipleLP import SingleLP
-from origami import Origami
+from multipleLP import ParametricLP
+from origami import BatchedOrigami
+from phase_timer import PhaseTimer, save_times, timed
+from profiling import profiled
+from solution_cache import game_key, lp_key
+import bisect
+import heapq
 import time
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor,
+                                Future, wait, FIRST_COMPLETED)
 
 
+@profiled("__init__", "solve", "solve_anytime", "resolve")
 class HBGS:
     """
     Works on normal form general bayesian games
     """
 
-    def __init__(self, game, origami_for_leaves=False, approx=1.0):
+    def __init__(self, game, origami_for_leaves=False, approx=1.0, workers=1,
+                 lp_workers=1, tree="index", cache=None):
         self.game = game
         self.num_attacker_strategies = game.num_attacker_strategies
         self.num_attacker_types = game.num_attacker_types
         self.attacker_type_probability = game.attacker_type_probability
 
-        # bounds is implemented as a dictionary
+        # feasible strategies of every typespace, as a sorted array of their
+        # codes (see _encode), or as a sorted list of pure strategy tuples if
+        # the codes of the game would overflow int64
+        self.encoded = self.num_attacker_strategies ** \
+            self.num_attacker_types <= np.iinfo(np.int64).max
+        self.feasible_strategies = {}
+
+        # bounds[attacker_types] holds the bound of every feasible strategy
+        # of the typespace, aligned with feasible_strategies[attacker_types]
         self.bounds = {}
 
-        # feasible strategies
-        self.feasible_strategies = {}
+        # partial games and idle LP models of every typespace
+        self.partial_games = {}
+        self.node_lps = {}
+
+        # opt payoff and mixed strategy of every solved typespace
+        self.node_results = {}
+
+        # the type probabilities the tree was last solved for
+        self.solved_probability = None
 
         # accumulated LP solver time
         self.solution_time = 0
 
+        # phases of the search, with those of every LP and Origami call
+        # rolled up
+        self.timer = PhaseTimer()
+
         # use origami for computing the leaves
         self.origami_for_leaves = origami_for_leaves
+        self.leaf_origami = None
 
         # approximation algorithm
         self.approx = approx
 
-    def _solve(self, attacker_types=None):
-        """
-        Solve the tree recursively given attacker_types
-        """
-        # if no attacker_type, we're at the root
-        if attacker_types is None:
-            attacker_types = tuple(range(self.num_attacker_types))
-            self.num_attacker_types = len(attacker_types)
+        # number of processes solving sibling subtrees in parallel
+        self.workers = workers
 
-        # print("ATTACKER TYPES: {}".format(attacker_types))
-        num_attacker_types = len(attacker_types)
-        if num_attacker_types > 1:
-            # first solve hierarchially lower games to obtain bounds
-            self._solve(attacker_types=attacker_types[:(num_attacker_types//2)])
-            self._solve(attacker_types=attacker_types[(num_attacker_types//2):])
+        # number of LPs of a typespace evaluated in parallel
+        self.lp_workers = lp_workers
+        self.lp_pool = None
 
+        # anytime mode, see solve_anytime
+        self.deadline = None
+        self.lp_cache = None
 
-            # Optain feasible strategies
-            pure_strategies = self._get_feasible_strategies(attacker_types)
-            # number of feasible strategies:
-            self.num_feasible_strategies = len(pure_strategies)
+        # SolutionCache of the LPs, shared across solvers and runs, and the
+        # key of the partial game of every typespace, see lp_key
+        self.cache = cache
+        self.lp_keys = {}
 
-            print("type: {}, num_pure_strat: {}".format(attacker_types, len(pure_strategies)))
+        # shape of the tree over the attacker types, see _build_tree
+        self.tree_shape = tree
+        self.timer.switch("bookkeeping")
+        self.root, self.tree = self._build_tree(tree)
+        self.timer.stop()
 
-            # print("attackertype: {}".format(attacker_types))
-            # print("num feasible strats: {}".format(len(pure_strategies)))
+        # search statistics of every solved typespace
+        self.stats = {}
 
-            # Sort the pure strategies in descending order of upper-bounds
-            pure_strategies = sorted(pure_strategies,
-                                     key = lambda x : self._get_bound(
-                                         attacker_types,
-                                         x),
-                                     reverse=True)
-            # Generate partial game
-            if self.game.type == "normal":
-                partial_game = NormalFormGame(partial_game_from=self.game,
-                                            attacker_types=attacker_types)
+    def _build_tree(self, shape):
+        """
+        Build the tree over the attacker types. Returns the root typespace
+        and a dict mapping every inner typespace to its two halves.
+        - "index": types are split in index order at the middle,
+        - "balanced": types are ordered by clustering them on the
+          similarity of their best responses, then split at the middle,
+        - "clustered": the tree is the hierarchy of that clustering, which
+          need not be balanced.
+        """
+        if shape == "index":
+            hierarchy = _split(tuple(range(self.num_attacker_types)))
+        elif shape == "balanced":
+            hierarchy = _split(_flatten(cluster_types(
+                type_similarity(self.game))))
+        elif shape == "clustered":
+            hierarchy = cluster_types(type_similarity(self.game))
+        else:
+            raise ValueError("unknown tree shape: {}".format(shape))
 
-            else:
-                partial_game = SecurityGame(partial_game_from=self.game,
-                                            attacker_types=attacker_types)
+        tree = {}
 
-            # Solve the
-            self._solve_pure_strategies(attacker_types,
-                                        pure_strategies,
-                                        partial_game)
+        def add(node):
+            if isinstance(node, int):
+                return tuple([node])
+            left, right = add(node[0]), add(node[1])
+            tree[left + right] = (left, right)
+            return left + right
 
-        else:
-            # --- BASECASE ---
-            if self.origami_for_leaves:
-                self._origami_for_leaves(attacker_types[0])
-            else:
-                # obtain feasible stragies
-                pure_strategies = self._get_feasible_strategies(attacker_types)
+        return (add(hierarchy), tree)
 
-                # Generate partial game
-                if self.game.type == "normal":
-                    partial_game = NormalFormGame(partial_game_from=self.game,
-                                                attacker_types=attacker_types)
+    def _children(self, attacker_types):
+        """
+        The two typespaces a typespace is split into, none for a leaf.
+        """
+        return self.tree.get(attacker_types, ())
 
-                else:
-                    partial_game = SecurityGame(partial_game_from=self.game,
-                                                attacker_types=attacker_types)
+    def _solve(self, attacker_types=None):
+        """
+        Solve the tree recursively given attacker_types
+        """
+        # if no attacker_type, we're at the root
+        if attacker_types is None:
+            attacker_types = self.root
+            self.num_attacker_types = len(attacker_types)
 
-                # print("num attacker types: {}".format(partial_game.num_attacker_types))
-                self._solve_pure_strategies(attacker_types,
-                                            pure_strategies,
-                                            partial_game)
+        # first solve hierarchially lower games to obtain bounds
+        for child in self._children(attacker_types):
+            self._solve(attacker_types=child)
 
+        self._solve_node(attacker_types)
 
-    def _origami_for_leaves(self, attacker_type):
-        # solve this singleton typespace with origami
-        origami = Origami(self.game, attacker_type)
-        origami.solve()
-        attack_set = origami.opt_attack_set
+    def _solve_node(self, attacker_types):
+        """
+        Solve a single typespace, given that the typespaces it is split
+        into have been solved.
+        """
+        if len(attacker_types) == 1 and self.origami_for_leaves:
+            self._origami_for_leaves(attacker_types[0])
+            return
+
+        # Optain feasible strategies and their bounds
+        start_time = time.perf_counter()
+        pure_strategies = self._get_feasible_strategies(attacker_types)
+        self._init_bounds(attacker_types)
+        # number of feasible strategies:
+        self.num_feasible_strategies = len(pure_strategies)
+        setup_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        partial_game = self._get_partial_game(attacker_types)
+        build_time = time.perf_counter() - start_time
+
+        self._solve_pure_strategies(attacker_types, partial_game)
+
+        stats = self.stats[attacker_types]
+        stats.build_time += build_time
+        stats.bookkeeping_time += setup_time
+        stats.wall_time += setup_time + build_time
+
+    def _solve_in_pool(self):
+        """
+        Solve the tree with a pool of self.workers processes. A typespace is
+        submitted to the pool as soon as both of its halves are solved, with
+        their feasible strategies and bounds, so sibling subtrees are solved
+        in parallel. Origami leaves are solved in this process, as one
+        batched call covers all of them.
+        """
+        root = self.root
+        parents = {}
+        leaves = []
+        nodes = [root]
+        while nodes:
+            node = nodes.pop()
+            children = self._children(node)
+            if not children:
+                leaves.append(node)
+            for child in children:
+                parents[child] = node
+                nodes.append(child)
+
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 initializer=_init_worker,
+                                 initargs=(self.game,
+                                           self.origami_for_leaves,
+                                           self.approx,
+                                           self.lp_workers,
+                                           self.tree_shape,
+                                           self.cache)) as pool:
+            running = {}
+
+            def submit(node):
+                children = dict((child, (self.feasible_strategies[child],
+                                         self.bounds[child]))
+                                for child in self._children(node))
+                running[pool.submit(_solve_node_in_worker,
+                                    node, children)] = node
+
+            def solved(node):
+                # submit the parent once both of its halves are solved
+                parent = parents.get(node)
+                if parent is not None and all(
+                        child in self.bounds
+                        for child in self._children(parent)):
+                    submit(parent)
+
+            for leaf in leaves:
+                if self.origami_for_leaves:
+                    self._solve_node(leaf)
+                    solved(leaf)
+                else:
+                    submit(leaf)
+
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    (self.feasible_strategies[node],
+                     self.bounds[node],
+                     timer,
+                     self.opt_defender_payoff,
+                     self.opt_defender_mixed_strategy,
+                     self.stats[node]) = future.result()
+                    self.node_results[node] = (
+                        self.opt_defender_payoff,
+                        self.opt_defender_mixed_strategy)
+                    # workers run concurrently, their phases are summed
+                    self.timer.add(timer, nested=False)
+                    solved(node)
 
-        # save solution time
-        self.solution_time += origami.solution_time
+
+    def _origami_for_leaves(self, attacker_type):
+        # every leaf of the tree is solved by a single batched origami call
+        if self.leaf_origami is None:
+            self.leaf_origami = BatchedOrigami.from_game(self.game)
+            self.leaf_origami.solve()
+
+            # roll up the phases of origami
+            timer = self.leaf_origami.timer.take()
+            self.timer.add(timer)
+            solution_time = timer.seconds()["solver_call"]
+        else:
+            solution_time = 0
+        origami = self.leaf_origami
+        attack_set = origami.opt_attack_set(attacker_type)
 
         # feasible strategies are all targets in attackset
         self.feasible_strategies[tuple([attacker_type])] = \
-            set([tuple([i]) for i in attack_set])
+            self._leaf_strategies(sorted(attack_set))
+        self._init_bounds(tuple([attacker_type]))
 
         # bounds are defender payoffs
-        for t in range(len(attack_set)):
-            target = attack_set[t]
+        for target in attack_set:
             attacker_types = tuple([attacker_type])
             pure_strat = tuple([target])
-            # compute payoff for this pure_strategy
-            pay_off = (origami.defender_covered[target] * \
-                            origami.opt_coverage[target]) + \
-                        ((1 - origami.opt_coverage[target]) * \
-                        origami.defender_uncovered[target])
+            pay_off = origami.opt_defender_payoffs[attacker_type, target]
             probability = self.attacker_type_probability[attacker_type]
 
             self._update_bound(attacker_types,
@@ -131,120 +270,540 @@ class HBGS:
                                pay_off,
                                probability)
 
-            # update opt_defender payoff for class
-            self.opt_defender_payoff = origami.opt_defender_payoff
-            self.opt_defender_mixed_strategy = origami.opt_coverage
+        # update opt_defender payoff for class
+        self.opt_defender_payoff = origami.opt_defender_payoff[attacker_type]
+        self.opt_defender_mixed_strategy = origami.opt_coverage[attacker_type]
+        self.node_results[tuple([attacker_type])] = (
+            self.opt_defender_payoff, self.opt_defender_mixed_strategy)
+
+        incumbent = self._get_bound(tuple([attacker_type]),
+                                    tuple([origami.opt_attacked_target[
+                                        attacker_type]]))
+        self.stats[tuple([attacker_type])] = NodeStats(
+            attacker_types=tuple([attacker_type]),
+            num_feasible_strategies=len(attack_set),
+            solve_time=solution_time,
+            wall_time=solution_time,
+            best_bound=incumbent,
+            incumbent=incumbent,
+            upper_bound=incumbent,
+            opt_defender_payoff=self.opt_defender_payoff)
 
-        return (origami.opt_defender_payoff, origami.opt_coverage)
+        return (self.opt_defender_payoff, self.opt_defender_mixed_strategy)
 
 
     def solve(self):
         """
         Visible API for this class
         """
-        start_time_overhead = time.time()
-        self._solve()
-        self.solution_time_with_overhead = time.time() - start_time_overhead
+        start_time = time.perf_counter_ns()
+        self.timer.switch("bookkeeping")
+        self.solved_probability = np.array(self.attacker_type_probability,
+                                           dtype=float)
+        try:
+            if self.workers > 1:
+                self._solve_in_pool()
+            else:
+                self._solve()
+        finally:
+            self.close()
+        self._save_upper_bound()
+        self.timer.stop()
+        save_times(self, start_time)
+
+    def solve_anytime(self, time_limit, approx=0.5):
+        """
+        Solve within about time_limit seconds of wall clock. The tree is
+        solved repeatedly, starting with the given approx, which is tightened
+        towards 1 after every pass: straight to 1 if the time left allows
+        for a few more passes like the last one, otherwise halfway. LPs solved
+        in a pass are cached for the next ones, and the best root solution of
+        all passes is kept. Once the deadline has passed, every typespace
+        still to be solved stops at its first feasible strategy, so there is
+        always a root solution, at the cost of overrunning the deadline by a
+        few LPs per typespace. Passes are solved in this process.
+        Reports upper_bound, the smallest proven upper bound of all passes,
+        and achieved_ratio as in _save_upper_bound, both None if the result
+        is heuristic, i.e. with origami_for_leaves.
+        """
+        start_time = time.perf_counter_ns()
+        self.timer.switch("bookkeeping")
+        self.deadline = time.perf_counter() + time_limit
+        self.lp_cache = {}
+        self.solved_probability = np.array(self.attacker_type_probability,
+                                           dtype=float)
+
+        best = None
+        upper_bound = float("inf")
+        self.approx = approx
+        self.num_passes = 0
+        try:
+            while True:
+                pass_start_time = time.perf_counter()
+                self._solve()
+                self.num_passes += 1
+
+                # the bound of the search, proven unless the result is
+                # heuristic, steers the passes either way
+                pass_upper_bound = self._search_upper_bound()
+                upper_bound = min(upper_bound, pass_upper_bound)
+                if best is None or \
+                        self.opt_defender_payoff > best[0]:
+                    best = (self.opt_defender_payoff,
+                            self.opt_defender_mixed_strategy)
+                if best[0] >= upper_bound or self.approx >= 1:
+                    break
+
+                now = time.perf_counter()
+                if now >= self.deadline:
+                    break
+                if self.deadline - now > 3 * (now - pass_start_time):
+                    self.approx = 1.0
+                else:
+                    ratio = _achieved_ratio(self.opt_defender_payoff,
+                                            pass_upper_bound)
+                    self.approx = max(1 - (1 - self.approx) / 2,
+                                      1 - (1 - ratio) / 2)
+        finally:
+            self.deadline = None
+            self.lp_cache = None
+            self.close()
+
+        self.opt_defender_payoff, self.opt_defender_mixed_strategy = best
+        self._save_upper_bound(upper_bound)
+        self.timer.stop()
+        save_times(self, start_time)
+
+    def _save_upper_bound(self, upper_bound=None):
+        """
+        Save upper_bound, a proven upper bound on the optimal defender
+        payoff, by default the one of the root search, and achieved_ratio,
+        opt_defender_payoff / upper_bound, see _achieved_ratio.
+        With origami_for_leaves nothing is proven: the payoffs of the Origami
+        leaves are not LP bounds, and their feasible strategies are cut down
+        to the Origami attack sets. Then heuristic is True and upper_bound
+        and achieved_ratio are None.
+        """
+        self.heuristic = self.origami_for_leaves
+        if self.heuristic:
+            self.upper_bound = None
+            self.achieved_ratio = None
+            return
+
+        if upper_bound is None:
+            upper_bound = self._search_upper_bound()
+        self.upper_bound = upper_bound
+        self.achieved_ratio = _achieved_ratio(self.opt_defender_payoff,
+                                              upper_bound)
+
+    def _search_upper_bound(self):
+        """
+        The upper bound on the defender payoff of the last root search.
+        """
+        prob_typespace = float(
+            self.attacker_type_probability[list(self.root)].sum())
+        return self.stats[self.root].upper_bound / prob_typespace
 
-    def _solve_pure_strategy(self, game, pure_strat):
+    def resolve(self, attacker_type_probability=None, changed_types=()):
+        """
+        Re-solve a solved tree after the type probabilities and/or the
+        payoffs of changed_types have changed. New payoffs are expected to be
+        written into self.game already, new probabilities may be passed here.
+        Only the typespaces on the path from a changed type to the root are
+        solved again:
+        - a typespace holding a changed type is solved from scratch, as its
+          feasible strategies may have changed, and so is a typespace whose
+          probability changed from or to 0, as its bounds cannot be rescaled,
+        - a typespace whose types keep their relative probabilities keeps its
+          feasible strategies and solutions, and its bounds are rescaled to
+          the new probability of the typespace. This covers every leaf, whose
+          feasible strategies do not depend on the probabilities,
+        - any other typespace keeps its feasible strategies, as the
+          best-response constraints do not depend on the probabilities, and
+          its branch-and-bound is rerun on bounds rebuilt from its halves.
+        phase_times and solution_time are those of the re-solve only.
+        """
+        start_time = time.perf_counter_ns()
+        self.timer = PhaseTimer()
+        self.timer.switch("bookkeeping")
+        if attacker_type_probability is not None:
+            attacker_type_probability = np.array(attacker_type_probability,
+                                                 dtype=float)
+            self.game.attacker_type_probability = attacker_type_probability
+            self.attacker_type_probability = attacker_type_probability
+        new_probability = np.array(self.attacker_type_probability,
+                                   dtype=float)
+
+        changed_types = set(changed_types)
+        if changed_types:
+            self.leaf_origami = None
+
+        root = self.root
+        try:
+            self._resolve(root, self.solved_probability, new_probability,
+                          changed_types)
+        finally:
+            self.close()
+        self.solved_probability = new_probability
+        self.opt_defender_payoff, self.opt_defender_mixed_strategy = \
+            self.node_results[root]
+        self._save_upper_bound()
+        self.timer.stop()
+        save_times(self, start_time)
+
+    def _resolve(self, attacker_types, old_probability, new_probability,
+                 changed_types):
         """
-        Will solve the game given the pure strategy and output
-        opt payoff and corresponding mixed strategy for defender.
+        Re-solve the tree recursively given attacker_types, see resolve.
         """
-        solver = SingleLP(game, pure_strat)
-        start_time = time.time()
+        for child in self._children(attacker_types):
+            self._resolve(child, old_probability, new_probability,
+                          changed_types)
+
+        old_prob_typespace = old_probability[list(attacker_types)].sum()
+        new_prob_typespace = new_probability[list(attacker_types)].sum()
+        payoffs_changed = not changed_types.isdisjoint(attacker_types)
+        rescaled = old_prob_typespace != new_prob_typespace
+        # bounds cannot be rescaled from or to a typespace that never occurs,
+        # e.g. unsolved leaf strategies would get a bound of 0 * inf
+        invalidated = rescaled and (old_prob_typespace == 0 or
+                                    new_prob_typespace == 0)
+        reweighted = old_prob_typespace > 0 and new_prob_typespace > 0 and \
+            not np.allclose(
+                old_probability[list(attacker_types)] / old_prob_typespace,
+                new_probability[list(attacker_types)] / new_prob_typespace)
+
+        # the partial game and its LPs hold the old payoffs and probabilities
+        if payoffs_changed or rescaled or reweighted:
+            self.partial_games.pop(attacker_types, None)
+            self.node_lps.pop(attacker_types, None)
+            self.lp_keys.pop(attacker_types, None)
+
+        if payoffs_changed or invalidated:
+            self._solve_node(attacker_types)
+        elif reweighted:
+            self._init_bounds(attacker_types)
+            self._solve_pure_strategies(
+                attacker_types,
+                self._get_partial_game(attacker_types))
+        elif rescaled:
+            self.bounds[attacker_types] *= \
+                new_prob_typespace / old_prob_typespace
+
+    @timed("game_transform")
+    def _get_partial_game(self, attacker_types):
+        """
+        The partial game of a typespace, generated once.
+        """
+        if attacker_types not in self.partial_games:
+            if self.game.type == "normal":
+                partial_game = NormalFormGame(partial_game_from=self.game,
+                                              attacker_types=attacker_types)
+            else:
+                partial_game = SecurityGame(partial_game_from=self.game,
+                                            attacker_types=attacker_types)
+            self.partial_games[attacker_types] = partial_game
+            if self.cache is not None:
+                self.lp_keys[attacker_types] = game_key(partial_game,
+                                                        lp="SingleLP")
+        return self.partial_games[attacker_types]
+
+    def _solve_pure_strategy(self, attacker_types, pure_strat):
+        """
+        Will solve the partial game of attacker_types given the pure
+        strategy and output opt payoff and corresponding mixed strategy for
+        defender, and the phase timer of the LP.
+        The LP model of a typespace is built once and only its objective and
+        best-response constraints are replaced per pure strategy. Runs in the
+        LP pool when lp_workers > 1, so every thread takes its own model from
+        the idle models of the typespace and leaves the bookkeeping, and
+        rolling up the timer, to the caller. The partial game is created by
+        the caller.
+        """
+        idle_lps = self.node_lps.setdefault(attacker_types, [])
+        try:
+            solver = idle_lps.pop()
+        except IndexError:
+            solver = ParametricLP(self.partial_games[attacker_types])
+        solver.set_pure_strategy(pure_strat)
         solver.solve()
-        self.solution_time += time.time() - start_time
-        return (solver.opt_defender_payoff, solver.opt_defender_mixed_strategy)
+        timer = solver.timer.take()
+        idle_lps.append(solver)
+        return (solver.opt_defender_payoff,
+                solver.opt_defender_mixed_strategy,
+                timer)
 
+    def _get_lp_pool(self):
+        """
+        The thread pool evaluating LPs, created on first use. Threads are
+        enough as every LP is solved by a GLPK subprocess.
+        """
+        if self.lp_pool is None:
+            self.lp_pool = ThreadPoolExecutor(max_workers=self.lp_workers)
+        return self.lp_pool
+
+    def close(self):
+        """
+        Shut down the LP pool, if it was started. solve, solve_anytime and
+        resolve close it when they return, the next call starts a new one.
+        """
+        if self.lp_pool is not None:
+            self.lp_pool.shutdown()
+            self.lp_pool = None
 
     def _solve_pure_strategies(self,
                                attacker_types,
-                               pure_strategies,
                                partial_game):
         """
-        Will solve every pure strategy in pure strategies and update bounds
-        and feasible strategies. Will stop if the opt_payoff for a given pure st
-        strategy is higher than the upper bound of the next strategy pure stra-
-        tegy.
+        Best-first branch-and-bound over the feasible strategies of a
+        typespace. Pure strategies are taken in the order of their upper
+        bounds from _candidates, and the search stops once the best
+        remaining bound times approx is no better than the incumbent, i.e.
+        the best prob_typespace * opt_payoff found so far, or once the
+        deadline has passed and there is an incumbent. Solved strategies get
+        their exact bound, infeasible ones are removed from the feasible
+        strategies, and pruned ones keep their upper bound.
+        With lp_workers > 1, up to lp_workers LPs are in flight at once,
+        dispatched in bound order, and the incumbent is updated as their
+        results arrive. LPs found in lp_cache or in the solution cache are
+        not solved again, and solved LPs are added to the solution cache.
+        The search is recorded in self.stats[attacker_types].
         """
-
-        # solve the partial game for each pure strategy
+        start_time = time.perf_counter()
+        stats = NodeStats(attacker_types=attacker_types,
+                          num_feasible_strategies=len(
+                              self.feasible_strategies[attacker_types]))
+        # wall time spent on LPs, the rest is bookkeeping
+        lp_time = 0
+
+        candidates = self._candidates(attacker_types)
+        candidate = next(candidates, None)
+        if candidate is not None:
+            stats.best_bound = candidate[0]
+        infeasible = []
+
+        # the incumbent in bound units, and the corresponding solution
+        incumbent = float("-inf")
         max_payoff = float("-inf")
         opt_mixed_strat = None
+        # the best bound that was pruned
+        pruned_bound = float("-inf")
 
-        for i, pure_strat in enumerate(pure_strategies):
-            (opt_defender_payoff, opt_defender_mixed_strategy) = \
-                    self._solve_pure_strategy(partial_game, pure_strat)
-
-            # update max_payoff
-            if opt_defender_payoff > max_payoff:
-                max_payoff = opt_defender_payoff
-                opt_mixed_strat = opt_defender_mixed_strategy
-
-            # remove pure strat from feasible_strategies if necessary
-            if opt_defender_payoff == float('-inf'):
-                self.feasible_strategies[attacker_types].remove(pure_strat)
-                continue
-
-            self._update_bound(attacker_types,
-                                pure_strat,
-                                opt_defender_payoff,
-                                partial_game.prob_typespace)
-
-            # if the prob_typespace * opt_payoff is higher than the
-            # upper-bound of the next pure strategy, then terminate.
-            if len(attacker_types) % 2 == 0:#== self.num_attacker_types:
-                    if i < len(pure_strategies) - 1:
-                        # print("=======")
-                        # # print("this: {}: {}".format(pure_strat, self._get_bound(attacker_types, pure_strat)))
-                        # print("this:{}:{}".format(pure_strat, self._get_bound(attacker_types, pure_strat)))
-                        # print("next:{}: {}".format(pure_strategies[i+1], self._get_bound(attacker_types, pure_strategies[i+1])))
-
-                        # print("part 1")
-                        # # print("PART: {}".format(pure_strategies[i+1][:2]))
-                        # print(self._get_bound(attacker_types[:2], pure_strategies[i+1][:2]))
-
-
-                        # # print("PART: {}".format(pure_strategies[i+1][:2][0]))
-                        # print(self._get_bound(tuple([attacker_types[0]]), tuple([pure_strategies[i+1][:2][0]])))
-
-                        # # print("Part: {}".format(pure_strategies[i+1][:2][1]))
-
-                        # print(self._get_bound(tuple([attacker_types[1]]), tuple([pure_strategies[i+1][:2][1]])))
-
-
-                        # # print("PART: {}".format(pure_strategies[i+1][2:]))
-                        # print("part 2")
-
-                        # print(self._get_bound(attacker_types[2:], pure_strategies[i+1][2:]))
-
-
-                        # # print("PART: {}".format(pure_strategies[i+1][2:][0]))
-
-                        # print(self._get_bound(tuple([attacker_types[2]]), tuple([pure_strategies[i+1][2:][0]])))
-
-
-                        # # print("PART: {}".format(pure_strategies[i+1][2:][1]))
-
-
-                        # print(self._get_bound(tuple([attacker_types[3]]), tuple([pure_strategies[i+1][2:][1]])))
-
-
-                        # print("=======")
-                        if self._get_bound(attacker_types, pure_strategies[i+1])\
-                                * self.approx \
-                        <= self._get_bound(attacker_types, pure_strat):
-                            print("BRANCH BOUND")
-                            break
+        if self.lp_cache is not None:
+            lp_cache = self.lp_cache.setdefault(attacker_types, {})
+        else:
+            lp_cache = None
+
+        running = {}
+        while True:
+            # dispatch LPs while the best remaining bound beats the incumbent
+            while candidate is not None and len(running) < self.lp_workers:
+                bound, code = candidate
+                if bound * self.approx <= incumbent or (
+                        self.deadline is not None
+                        and incumbent > float("-inf")
+                        and time.perf_counter() > self.deadline):
+                    # prune every remaining pure strategy
+                    pruned_bound = bound
+                    candidate = None
+                    break
+                candidate = next(candidates, None)
+                pure_strat = self._decode(code, len(attacker_types))
+                cached = None
+                if lp_cache is not None:
+                    cached = lp_cache.get(code)
+                if cached is None and self.cache is not None:
+                    cached = self.cache.get(
+                        lp_key(self.lp_keys[attacker_types], pure_strat))
+                if cached is not None:
+                    # no timer, as no LP was solved
+                    future = _Solved(tuple(cached) + (None,))
+                elif self.lp_workers > 1:
+                    future = self._get_lp_pool().submit(
+                        self._solve_pure_strategy, attacker_types, pure_strat)
+                else:
+                    lp_start_time = time.perf_counter()
+                    future = _Solved(self._solve_pure_strategy(attacker_types,
+                                                               pure_strat))
+                    lp_time += time.perf_counter() - lp_start_time
+                running[future] = pure_strat
+
+            if not running:
+                break
+
+            lp_start_time = time.perf_counter()
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            lp_time += time.perf_counter() - lp_start_time
+            for future in done:
+                pure_strat = running.pop(future)
+                (opt_defender_payoff,
+                 opt_defender_mixed_strategy,
+                 timer) = future.result()
+                code = self._encode(pure_strat)
+                if timer is None:
+                    stats.num_cached += 1
+                else:
+                    # LPs in the pool ran concurrently with this thread
+                    times = timer.seconds()
+                    self.timer.add(timer, nested=self.lp_workers == 1)
+                    stats.num_lps += 1
+                    stats.solve_time += times["solver_call"]
+                    stats.build_time += times["model_build"]
+                    if lp_cache is not None:
+                        lp_cache[code] = (opt_defender_payoff,
+                                          opt_defender_mixed_strategy)
+                    if self.cache is not None:
+                        self.cache.put(
+                            lp_key(self.lp_keys[attacker_types], pure_strat),
+                            (opt_defender_payoff,
+                             opt_defender_mixed_strategy))
+
+                # remove pure strat from feasible_strategies if necessary
+                if opt_defender_payoff == float('-inf'):
+                    infeasible.append(code)
+                    stats.num_infeasible += 1
+                    self._update_bound(attacker_types,
+                                       pure_strat,
+                                       float('-inf'),
+                                       1)
+                    continue
+
+                self._update_bound(attacker_types,
+                                   pure_strat,
+                                   opt_defender_payoff,
+                                   partial_game.prob_typespace)
+
+                # update the incumbent
+                if opt_defender_payoff > max_payoff:
+                    max_payoff = opt_defender_payoff
+                    opt_mixed_strat = opt_defender_mixed_strategy
+                    incumbent = self._get_bound(attacker_types, pure_strat)
+
+        self._remove_strategies(attacker_types, infeasible)
 
         # save opt defender payoff and corresponding mixed strategy
         self.opt_defender_payoff = max_payoff
         self.opt_defender_mixed_strategy = opt_mixed_strat
+        self.node_results[attacker_types] = (max_payoff, opt_mixed_strat)
+
+        stats.num_pruned = stats.num_feasible_strategies - stats.num_lps - \
+            stats.num_cached
+        stats.incumbent = incumbent
+        stats.upper_bound = max(incumbent, pruned_bound)
+        stats.opt_defender_payoff = max_payoff
+        stats.wall_time = time.perf_counter() - start_time
+        stats.bookkeeping_time = stats.wall_time - lp_time
+        self.stats[attacker_types] = stats
 
         return (max_payoff, opt_mixed_strat)
 
 
+    def _candidates(self, attacker_types):
+        """
+        Yield (bound, code) for the feasible strategies of a typespace, in
+        decreasing order of their bounds. For an inner typespace the
+        strategies are a lazy k-best merge of the feasible strategies of its
+        halves, each sorted by bound: a heap holds one frontier pair per
+        strategy of the first half, so the cross product is only enumerated
+        as far as the search gets.
+        """
+        bounds = self.bounds[attacker_types]
+        feasible = self.feasible_strategies[attacker_types]
+        children = self._children(attacker_types)
+        if not children:
+            for k in np.argsort(-bounds, kind="stable"):
+                yield (bounds[k], feasible[k])
+            return
+
+        halves = []
+        for child in children:
+            codes = self.feasible_strategies[child]
+            child_bounds = self.bounds[child]
+            order = np.argsort(-child_bounds, kind="stable")
+            halves.append((_take(codes, order), child_bounds[order]))
+        (left, left_bounds), (right, right_bounds) = halves
+        if not len(left) or not len(right):
+            return
+        radix = self.num_attacker_strategies ** len(children[1])
+
+        # whether strategies were removed from the cross product of the
+        # halves, e.g. by an earlier solve of the typespace
+        complete = len(feasible) == len(left) * len(right)
+
+        queue = [(-(left_bounds[0] + right_bounds[0]), 0, 0)]
+        while queue:
+            _, i, j = heapq.heappop(queue)
+            if j == 0 and i + 1 < len(left):
+                heapq.heappush(queue, (-(left_bounds[i+1] + right_bounds[0]),
+                                       i + 1, 0))
+            if j + 1 < len(right):
+                heapq.heappush(queue, (-(left_bounds[i] + right_bounds[j+1]),
+                                       i, j + 1))
+
+            if self.encoded:
+                code = left[i] * radix + right[j]
+            else:
+                code = left[i] + right[j]
+            if not complete and _find(feasible, code) is None:
+                continue
+            yield (left_bounds[i] + right_bounds[j], code)
+
+    def _encode(self, pure_strategies):
+        """
+        Encode pure strategy tuples as integers in mixed radix
+        num_attacker_strategies, the first attacker type being the most
+        significant digit. Takes a single tuple or a sequence of tuples.
+        Without codes, see self.encoded, a pure strategy is its own key.
+        """
+        if not self.encoded:
+            return tuple(int(i) for i in pure_strategies)
+        pure_strategies = np.asarray(pure_strategies, dtype=np.int64)
+        num_types = pure_strategies.shape[-1]
+        radix = self.num_attacker_strategies ** \
+            np.arange(num_types - 1, -1, -1, dtype=np.int64)
+        return pure_strategies @ radix
+
+    def _decode(self, code, num_types):
+        """
+        The pure strategy tuple of a code of a typespace of num_types types.
+        """
+        if not self.encoded:
+            return code
+        return tuple(int(i) for i in np.unravel_index(
+            code, (self.num_attacker_strategies,) * num_types))
+
+    def _init_bounds(self, attacker_types):
+        """
+        Create the bounds of the feasible strategies of a typespace. The
+        bound of a leaf strategy is infinite until it has been solved, the
+        bound of a strategy of an inner typespace is the sum of the bounds of
+        its two halves, which is one broadcasted addition of the children's
+        bounds over the cross product of their feasible strategies. Feasible
+        strategies of the typespace that are not in that cross product, as a
+        half of them was found infeasible since, are removed.
+        """
+        feasible = self.feasible_strategies[attacker_types]
+        children = self._children(attacker_types)
+        if not children:
+            # nothing is known about a leaf strategy before it is solved
+            self.bounds[attacker_types] = np.full(len(feasible), float("inf"))
+            return
+
+        product = self._cross_product(attacker_types)
+        bounds = np.add.outer(*(self.bounds[child]
+                                for child in children)).ravel()
+        if len(product) != len(feasible) or np.any(product != feasible):
+            # strategies were removed, e.g. by an earlier solve of the
+            # typespace
+            if self.encoded:
+                kept = np.isin(product, feasible, assume_unique=True)
+            else:
+                kept = np.array([_find(feasible, code) is not None
+                                 for code in product], dtype=bool)
+            self.feasible_strategies[attacker_types] = _take(product, kept)
+            bounds = bounds[kept]
+        self.bounds[attacker_types] = bounds
+
     def _update_bound(self,
                       attacker_types,
                       pure_strat,
@@ -253,118 +812,367 @@ class HBGS:
         """
         Update the bound for a given pure strategy for some attacker_types
         """
-        # generate a key for the pure strategy
-        pure_strat_key = np.array([-1] * self.num_attacker_types)
-        pure_strat_key[list(attacker_types)] = list(pure_strat)
-        pure_strat_key = tuple(pure_strat_key)
-        # print("UB: {}".format(pure_strat_key))
         # value of bound is the prob of typespace times opt_defender_payoff
-        # print("prob_typespace: {}".format(prob_typespace))
-        # print("pure_strat_key: {}".format(pure_strat_key))
-        # print("opt_defender_payoff: {}".format(opt_defender_payoff))
-        new_bound = prob_typespace * opt_defender_payoff
-        # update bound
-        self.bounds[pure_strat_key] = new_bound
+        k = _find(self.feasible_strategies[attacker_types],
+                  self._encode(pure_strat))
+        self.bounds[attacker_types][k] = prob_typespace * opt_defender_payoff
 
     def _get_bound(self, attacker_types, pure_strat):
         """
-        Computes and returns the bound for a given pure strategy.
-        As a side effect, will save the new bound to self.bounds
+        Returns the bound for a given pure strategy.
         """
-        num_attacker_types = len(attacker_types)
+        k = _find(self.feasible_strategies[attacker_types],
+                  self._encode(pure_strat))
+        return self.bounds[attacker_types][k]
 
-        # generate the key for the pure strategy
-        pure_strat_key = np.array([-1] * self.num_attacker_types)
-        pure_strat_key[list(attacker_types)] = list(pure_strat)
-        pure_strat_key = tuple(pure_strat_key)
-        # print("GB: {}".format(pure_strat_key))
-        try:
-            # basecase
-            return self.bounds[pure_strat_key]
-        except KeyError:
-            # recursively compute, save and return bound
-            index = num_attacker_types // 2
-
-            # new bound is sum of bounds
-            new_bound = self._get_bound(attacker_types[:index],
-                                                 pure_strat[:index]) + \
-                        self._get_bound(attacker_types[index:],
-                                                 pure_strat[index:])
-            # save this bound
-            self.bounds[pure_strat_key] = new_bound
-
-            # return new bound
-            return new_bound
+    def _remove_strategies(self, attacker_types, codes):
+        """
+        Remove strategies from the feasible strategies of a typespace, and
+        their bounds.
+        """
+        if not len(codes):
+            return
+        feasible = self.feasible_strategies[attacker_types]
+        kept = np.ones(len(feasible), dtype=bool)
+        kept[[_find(feasible, code) for code in codes]] = False
+        self.feasible_strategies[attacker_types] = _take(feasible, kept)
+        self.bounds[attacker_types] = self.bounds[attacker_types][kept]
 
     def _get_feasible_strategies(self, attacker_types):
         """
-        Takes an attacker_types tuple, compute the set of feasible strategies
-        and outputs these as a list.
+        Takes an attacker_types tuple, compute the feasible strategies and
+        outputs these as a sorted array of codes. The strategies of an inner
+        typespace are the cross product of those of its halves, computed as
+        one broadcasted operation on the codes.
         """
         num_attacker_types = len(attacker_types)
         if num_attacker_types == 1:
             # generate feasible strategies
-            strategies = [tuple([i]) for i in range(self.num_attacker_strategies)]
+            strategies = self._leaf_strategies(
+                range(self.num_attacker_strategies))
         else:
-            f1 = self.feasible_strategies[
-                attacker_types[:(num_attacker_types//2)]]
-            f2 = self.feasible_strategies[
-                attacker_types[(num_attacker_types//2):]]
-            strategies = [x+y for x in f1 for y in f2]
+            strategies = self._cross_product(attacker_types)
 
-        # update feasible strategies
-        self.feasible_strategies[attacker_types] = set(strategies)
+        # update feasible strategies
+        self.feasible_strategies[attacker_types] = strategies
 
-        # return the feasible strategies as a list
         return strategies
 
-# from games import SecurityGame
-# sec_game = SecurityGame(num_targets=10,
-#                         max_coverage=3,
-#                         num_attacker_types=4)
-
-# game = NormalFormGame(game=sec_game, harsanyi=False)
-game = NormalFormGame(num_defender_strategies=5,
-                      num_attacker_strategies=5,
-                      num_attacker_types=10)
-
-
-# print("====================")
-# solver = HBGS(sec_game, origami_for_leaves=True)
-# solver.solve()
-# print("++++++++++++++++++++++++++")
-# print("payoff: {}".format(solver.opt_defender_payoff))
-# print("mixed: {}".format(solver.opt_defender_mixed_strategy))
-# print("sol time for HBGS: {}".format(solver.solution_time))
-# print("sol OH: {}".format(solver.solution_time_with_overhead))
-print("====================")
-solver = HBGS(game, False, approx=0.8)
-solver.solve()
-print("payoff: {}".format(solver.opt_defender_payoff))
-print("mixed: {}".format(solver.opt_defender_mixed_strategy))
-print("sol time for HBGS: {}".format(solver.solution_time))
-print("sol OH: {}".format(solver.solution_time_with_overhead))
-
-
-# print("====================")
-
-from dobbs import Dobbs
-dob = Dobbs(game)
-dob.solve()
-print("DOBBS")
-print("payoff: {}".format(dob.opt_defender_payoff))
-print("mixed: {}".format(dob.opt_defender_mixed_strategy))
-print("sol time for dobs: {}".format(dob.solution_time))
-
-# print("====================")
-# from multipleLP import Multiple_SingleLP
-# start_time = time.time()
-# mul = Multiple_SingleLP(sec_game)
-# mul.solve()
-# print("MUL")
-# print("REAAAL TIME: {}".format(time.time() - start_time))
-# print("payoff: {}".format(mul.opt_defender_payoff))
-# print("mixed: {}".format(mul.opt_defender_mixed_strategy))
-# print("sol time: {}".format(mul.solution_time))
+    def _cross_product(self, attacker_types):
+        """
+        The codes of the cross product of the feasible strategies of the two
+        halves of a typespace, sorted as those of the halves are.
+        """
+        left, right = self._children(attacker_types)
+        f1 = self.feasible_strategies[left]
+        f2 = self.feasible_strategies[right]
+        if not self.encoded:
+            return [a + b for a in f1 for b in f2]
+        radix = self.num_attacker_strategies ** len(right)
+        return (f1[:, np.newaxis] * radix + f2).ravel()
+
+    def _leaf_strategies(self, strategies):
+        """
+        The feasible strategies of a leaf from its sorted attacker
+        strategies.
+        """
+        if not self.encoded:
+            return [tuple([j]) for j in strategies]
+        return np.array(strategies, dtype=np.int64)
+
+    def level_report(self):
+        """
+        Per level of the tree, from the root down, the number of typespaces,
+        the number of feasible strategies they kept and the number of LPs
+        solved for them.
+        """
+        report = []
+        level = [self.root]
+        while level:
+            report.append({
+                "level": len(report),
+                "typespaces": len(level),
+                "feasible_strategies": sum(
+                    len(self.feasible_strategies.get(node, ()))
+                    for node in level),
+                "lps": sum(self.stats[node].num_lps
+                           for node in level if node in self.stats)})
+            level = [child for node in level
+                     for child in self._children(node)]
+        return report
+
+    def stats_records(self):
+        """
+        The statistics of the solved typespaces as a list of dicts, from the
+        root down in depth-first order, with the level of every typespace in
+        the tree. Non-finite bounds are given as None, so the records can be
+        dumped to JSON as they are.
+        """
+        records = []
+        nodes = [(self.root, 0)]
+        while nodes:
+            node, level = nodes.pop()
+            if node in self.stats:
+                record = self.stats[node].to_dict()
+                record["level"] = level
+                records.append(record)
+            nodes.extend((child, level + 1)
+                         for child in reversed(self._children(node)))
+        return records
+
+    def export_stats(self, path):
+        """
+        Write stats_records to a JSON file.
+        """
+        with open(path, "w") as f:
+            json.dump(self.stats_records(), f, indent=2)
 
 
+def type_similarity(game):
+    """
+    Similarity of every pair of attacker types, the correlation of their best
+    responses. For a normal form game these are the best responses to every
+    defender pure strategy, for a security game the best responses to
+    uniform coverages of every target from 0 to 1.
+    """
+    if game.type == "normal":
+        payoffs = game.attacker_payoffs
+    else:
+        coverage = np.linspace(0, 1, 11)[:, np.newaxis, np.newaxis]
+        payoffs = (1 - coverage) * game.attacker_uncovered + \
+            coverage * game.attacker_covered
+
+    # one-hot best responses of every type, one row per type
+    best_responses = payoffs == payoffs.max(axis=1, keepdims=True)
+    best_responses = best_responses.transpose(2, 0, 1).reshape(
+        game.num_attacker_types, -1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        similarity = np.corrcoef(best_responses)
+    # types with constant best responses are uncorrelated with the others
+    similarity = np.nan_to_num(np.atleast_2d(similarity))
+    np.fill_diagonal(similarity, 1)
+    return similarity
+
+
+def cluster_types(similarity):
+    """
+    Average linkage agglomerative clustering of the attacker types on their
+    similarity. Returns the hierarchy as nested pairs of type indices, the
+    most similar types being siblings.
+    """
+    num_types = similarity.shape[0]
+    clusters = list(range(num_types))
+    sizes = np.ones(num_types)
+    linkage = np.array(similarity, dtype=float)
+    np.fill_diagonal(linkage, float("-inf"))
+
+    for _ in range(num_types - 1):
+        a, b = np.unravel_index(np.argmax(linkage), linkage.shape)
+        a, b = min(a, b), max(a, b)
+
+        # merge b into a, the linkage of the merged cluster is the size
+        # weighted average of the linkages of its halves
+        clusters[a] = (clusters[a], clusters[b])
+        linkage[a] = (sizes[a] * linkage[a] + sizes[b] * linkage[b]) / \
+            (sizes[a] + sizes[b])
+        linkage[:, a] = linkage[a]
+        linkage[a, a] = float("-inf")
+        sizes[a] += sizes[b]
+
+        # drop b
+        linkage[b] = float("-inf")
+        linkage[:, b] = float("-inf")
+        sizes[b] = 0
+
+    return clusters[0]
+
+
+def _achieved_ratio(payoff, upper_bound):
+    """
+    payoff / upper_bound, a guarantee for positive payoffs only: 1 if the
+    payoff is proven optimal and 0 if the bound is not positive otherwise.
+    """
+    if payoff >= upper_bound:
+        return 1.0
+    if upper_bound > 0 and payoff > 0:
+        return payoff / upper_bound
+    return 0.0
+
+
+def _find(codes, code):
+    """
+    The position of code in the sorted codes, an array or a list of tuples,
+    None if it is not there.
+    """
+    k = bisect.bisect_left(codes, code)
+    if k < len(codes) and codes[k] == code:
+        return k
+    return None
+
+
+def _take(codes, indices):
+    """
+    codes[indices] for an array or a list of tuples of codes, indices being
+    an array of positions or a boolean mask.
+    """
+    if isinstance(codes, np.ndarray):
+        return codes[indices]
+    if indices.dtype == bool:
+        indices = np.flatnonzero(indices)
+    return [codes[k] for k in indices]
+
+
+def _flatten(hierarchy):
+    """
+    The types of a hierarchy of nested pairs, in order.
+    """
+    if isinstance(hierarchy, int):
+        return tuple([hierarchy])
+    return _flatten(hierarchy[0]) + _flatten(hierarchy[1])
+
+
+def _split(attacker_types):
+    """
+    The balanced hierarchy splitting attacker_types at the middle.
+    """
+    num_attacker_types = len(attacker_types)
+    if num_attacker_types == 1:
+        return attacker_types[0]
+    return (_split(attacker_types[:(num_attacker_types//2)]),
+            _split(attacker_types[(num_attacker_types//2):]))
+
+@dataclass
+class NodeStats:
+    """
+    Search statistics of a single typespace. The times are in seconds of
+    time.perf_counter, the clock of the phase timer: build_time is spent on
+    partial games and setting up LPs, solve_time in the LP solver and
+    bookkeeping_time on the rest of wall_time. With lp_workers > 1, build
+    and solve times are summed over concurrent LPs.
+    best_bound is the largest bound of a feasible strategy before the search,
+    incumbent the bound of the best strategy found and upper_bound a proven
+    upper bound on the bound of the optimum, all in units of
+    prob_typespace * payoff. num_cached counts LPs taken from lp_cache or the
+    solution cache.
+    """
+    attacker_types: tuple
+    num_feasible_strategies: int = 0
+    num_lps: int = 0
+    num_cached: int = 0
+    num_pruned: int = 0
+    num_infeasible: int = 0
+    build_time: float = 0.0
+    solve_time: float = 0.0
+    bookkeeping_time: float = 0.0
+    wall_time: float = 0.0
+    best_bound: float = float("-inf")
+    incumbent: float = float("-inf")
+    upper_bound: float = float("-inf")
+    opt_defender_payoff: float = float("-inf")
+
+    def to_dict(self):
+        record = asdict(self)
+        record["attacker_types"] = [int(l) for l in self.attacker_types]
+        for key, value in record.items():
+            if isinstance(value, float) and not np.isfinite(value):
+                record[key] = None
+            elif isinstance(value, np.generic):
+                record[key] = value.item()
+        return record
+
+
+class _Solved(Future):
+    """
+    A future that is already done, for LPs solved in the calling thread.
+    """
+    def __init__(self, result):
+        super().__init__()
+        self.set_result(result)
+
+
+# HBGS instance of a pool worker, see HBGS._solve_in_pool
+_worker_hbgs = None
+
+
+def _init_worker(game, origami_for_leaves, approx, lp_workers, tree, cache):
+    global _worker_hbgs
+    _worker_hbgs = HBGS(game, origami_for_leaves, approx,
+                        lp_workers=lp_workers, tree=tree, cache=cache)
+
+
+def _solve_node_in_worker(attacker_types, children):
+    """
+    Solve a single typespace in a pool worker. children maps the two halves
+    of the typespace to their feasible strategies and bounds. Returns the
+    feasible strategies and bounds of the typespace, the phase timer of
+    the worker, the optimal payoff and mixed strategy of the typespace and its search
+    statistics.
+    """
+    hbgs = _worker_hbgs
+    hbgs.feasible_strategies = dict((child, feasible)
+                                    for child, (feasible, _) in
+                                    children.items())
+    hbgs.bounds = dict((child, bounds)
+                       for child, (_, bounds) in children.items())
+    hbgs.timer = PhaseTimer()
+    hbgs.timer.switch("bookkeeping")
+    hbgs._solve_node(attacker_types)
+    hbgs.timer.stop()
+    return (hbgs.feasible_strategies[attacker_types],
+            hbgs.bounds[attacker_types],
+            hbgs.timer,
+            hbgs.opt_defender_payoff,
+            hbgs.opt_defender_mixed_strategy,
+            hbgs.stats[attacker_types])
+
+
+if __name__ == "__main__":
+    # from games import SecurityGame
+    # sec_game = SecurityGame(num_targets=10,
+    #                         max_coverage=3,
+    #                         num_attacker_types=4)
+
+    # game = NormalFormGame(game=sec_game, harsanyi=False)
+    game = NormalFormGame(num_defender_strategies=5,
+                          num_attacker_strategies=5,
+                          num_attacker_types=10)
+
+
+    # print("====================")
+    # solver = HBGS(sec_game, origami_for_leaves=True)
+    # solver.solve()
+    # print("++++++++++++++++++++++++++")
+    # print("payoff: {}".format(solver.opt_defender_payoff))
+    # print("mixed: {}".format(solver.opt_defender_mixed_strategy))
+    # print("sol time for HBGS: {}".format(solver.solution_time))
+    # print("sol OH: {}".format(solver.solution_time_with_overhead))
+    print("====================")
+    solver = HBGS(game, False, approx=0.8)
+    solver.solve()
+    print("payoff: {}".format(solver.opt_defender_payoff))
+    print("mixed: {}".format(solver.opt_defender_mixed_strategy))
+    print("sol time for HBGS: {}".format(solver.solution_time))
+    print("sol OH: {}".format(solver.solution_time_with_overhead))
+
+
+    # print("====================")
+
+    from dobbs import Dobbs
+    dob = Dobbs(game)
+    dob.solve()
+    print("DOBBS")
+    print("payoff: {}".format(dob.opt_defender_payoff))
+    print("mixed: {}".format(dob.opt_defender_mixed_strategy))
+    print("sol time for dobs: {}".format(dob.solution_time))
+
+    # print("====================")
+    # from multipleLP import Multiple_SingleLP
+    # start_time = time.time()
+    # mul = Multiple_SingleLP(sec_game)
+    # mul.solve()
+    # print("MUL")
+    # print("REAAAL TIME: {}".format(time.time() - start_time))
+    # print("payoff: {}".format(mul.opt_defender_payoff))
+    # print("mixed: {}".format(mul.opt_defender_mixed_strategy))
+    # print("sol time: {}".format(mul.solution_time))
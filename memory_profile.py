@@ -0,0 +1,153 @@
+import os
+import sys
+import tracemalloc
+import numpy as np
+try:
+    import resource
+except ImportError:
+    # not available on windows
+    resource = None
+
+# ru_maxrss is in kilobytes on linux and in bytes on macOS
+_MAXRSS_SCALE = 1 if sys.platform == "darwin" else 1024
+
+
+def peak_rss():
+    """
+    The peak resident set size in bytes of this process, and the largest
+    peak of its terminated children, e.g. the GLPK subprocesses, as a tuple.
+    Both are peaks over the lifetime of the process, so a job is measured on
+    its own by running it in a fresh process. On linux the peak of a child
+    starts from the resident set size of this process when it was forked,
+    so a small GLPK subprocess reports about the size of its parent.
+    None where not available.
+    """
+    if resource is None:
+        return (None, None)
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss *
+            _MAXRSS_SCALE,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss *
+            _MAXRSS_SCALE)
+
+
+def current_rss():
+    """
+    The current resident set size in bytes of this process, None where
+    /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def traced(function, *args, **kwargs):
+    """
+    Call function under tracemalloc. Returns its result, the peak of the
+    memory allocated during the call in bytes, and a snapshot of the
+    allocations still alive at its end, i.e. those held by the result.
+    numpy reports its array buffers to tracemalloc, so they are included.
+    """
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    start_size = tracemalloc.get_traced_memory()[0]
+    try:
+        result = function(*args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1] - start_size
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    return (result, peak, snapshot)
+
+
+def top_allocations(snapshot, filename="games.py", limit=5):
+    """
+    The lines of filename holding the most memory in a snapshot, as a list
+    of ("file:line", bytes) pairs.
+    """
+    snapshot = snapshot.filter_traces(
+        [tracemalloc.Filter(True, "*" + filename)])
+    return [("{}:{}".format(os.path.basename(statistic.traceback[0].filename),
+                            statistic.traceback[0].lineno),
+             statistic.size)
+            for statistic in snapshot.statistics("lineno")[:limit]]
+
+
+def array_bytes(obj):
+    """
+    Bytes held by the numpy arrays among the attributes of obj, e.g. the
+    payoff tensors of a game. Views are counted at their own size.
+    """
+    return sum(value.nbytes for value in vars(obj).values()
+               if isinstance(value, np.ndarray))
+
+
+def model_bytes(solver, depth=4):
+    """
+    Approximate bytes held by the PuLP models and sparse MILPs of a solver,
+    found among its attributes and, up to depth levels down, in the lists,
+    dicts and objects they hold. A PuLP model is measured by the size of
+    its variables, constraints and objective with their coefficients, a
+    SparseMILP by its arrays. Games are not searched.
+    """
+    seen = set()
+
+    def size(obj, depth):
+        if id(obj) in seen or depth < 0:
+            return 0
+        seen.add(id(obj))
+        if _is_pulp_problem(obj):
+            return _pulp_problem_bytes(obj)
+        if hasattr(obj, "integrality") and hasattr(obj, "A"):
+            # SparseMILP
+            return sum(_sparse_bytes(value) for value in vars(obj).values())
+        if isinstance(obj, dict):
+            values = obj.values()
+        elif isinstance(obj, (list, tuple)):
+            values = obj
+        elif hasattr(obj, "__dict__") and not _is_game(obj) and \
+                not isinstance(obj, type):
+            values = vars(obj).values()
+        else:
+            return 0
+        return sum(size(value, depth - 1) for value in values)
+
+    return size(solver, depth)
+
+
+def _is_pulp_problem(obj):
+    return type(obj).__name__ == "LpProblem"
+
+
+def _is_game(obj):
+    return hasattr(obj, "num_attacker_types") and \
+        hasattr(obj, "attacker_type_probability") and \
+        not hasattr(obj, "solve")
+
+
+def _pulp_problem_bytes(prob):
+    float_size = sys.getsizeof(1.0)
+    total = sys.getsizeof(prob)
+    for variable in prob.variables():
+        total += sys.getsizeof(variable) + sys.getsizeof(variable.name)
+    expressions = [prob.objective] if prob.objective is not None else []
+    for constraint in prob.constraints.values():
+        total += sys.getsizeof(constraint)
+        # the coefficients of a constraint are held in its expression
+        expressions.append(getattr(constraint, "expr", constraint))
+    for expression in expressions:
+        total += sys.getsizeof(expression) + len(expression) * float_size
+    return total
+
+
+def _sparse_bytes(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, "data") and hasattr(value, "indices"):
+        return value.data.nbytes + value.indices.nbytes + \
+            value.indptr.nbytes
+    return 0
@@ -0,0 +1,143 @@
+import numpy as np
+import time
+from scipy import optimize, sparse
+
+# status strings matching pulp.LpStatus for the codes of scipy.optimize.milp
+LP_STATUS = {0: "Optimal",
+             1: "Not Solved",
+             2: "Infeasible",
+             3: "Unbounded",
+             4: "Undefined"}
+
+
+class SparseMILP:
+    """
+    A MILP held as sparse coefficient matrices:
+        minimize c @ x
+        subject to lb <= A @ x <= ub, lower <= x <= upper,
+        x[i] integer wherever integrality[i] == 1.
+    It is solved in-process by HiGHS through scipy.optimize.milp.
+    """
+    def __init__(self, c, A, lb, ub, lower, upper, integrality):
+        self.c = c
+        self.A = A
+        self.lb = lb
+        self.ub = ub
+        self.lower = lower
+        self.upper = upper
+        self.integrality = integrality
+
+    def solve(self):
+        start_time = time.perf_counter()
+        self.result = optimize.milp(
+            self.c,
+            constraints=optimize.LinearConstraint(self.A, self.lb, self.ub),
+            bounds=optimize.Bounds(self.lower, self.upper),
+            integrality=self.integrality)
+        self.solution_time = time.perf_counter() - start_time
+
+        # save status and solution
+        self.status = LP_STATUS[self.result.status]
+        self.x = self.result.x
+        self.objective = self.result.fun
+        self.mip_node_count = getattr(self.result, "mip_node_count", None)
+
+    def add_constraint(self, coefficients, lb, ub):
+        """
+        Append the row lb <= coefficients @ x <= ub.
+        """
+        self.A = sparse.vstack((self.A,
+                                sparse.csr_matrix(coefficients)),
+                               format="csr")
+        self.lb = np.append(self.lb, lb)
+        self.ub = np.append(self.ub, ub)
+
+
+def eraser_model(attacker_uncovered,
+                 attacker_covered,
+                 defender_uncovered,
+                 defender_covered,
+                 max_coverage,
+                 Z=9999):
+    """
+    Build the ERASER MILP of Eraser straight from the payoff vectors.
+    Variables are laid out as [d, k, c_0..c_{T-1}, a_0..a_{T-1}], the payoff
+    of target t given coverage c_t is c_t * covered[t] + (1-c_t) * uncovered[t].
+    """
+    T = attacker_uncovered.size
+    identity = sparse.identity(T, format="csr")
+    ones = np.ones((T, 1))
+    zeros = np.zeros((T, 1))
+
+    A = sparse.bmat([
+        # Constraint 1: sum a == 1
+        [None, None, sparse.csr_matrix((1, T)), np.ones((1, T))],
+        # Constraint 2: sum c <= max_coverage
+        [None, None, np.ones((1, T)), sparse.csr_matrix((1, T))],
+        # Constraint 3: d - defender payoff of t <= (1 - a_t) Z
+        [ones, zeros,
+         sparse.diags(defender_uncovered - defender_covered), Z * identity],
+        # Constraint 4: k - attacker payoff of t <= (1 - a_t) Z
+        [zeros, ones,
+         sparse.diags(attacker_uncovered - attacker_covered), Z * identity],
+        # Constraint 5: attacker payoff of t - k <= 0
+        [zeros, -ones,
+         sparse.diags(attacker_covered - attacker_uncovered), None],
+    ], format="csr")
+
+    lb = np.concatenate(([1, -np.inf], np.full(3 * T, -np.inf)))
+    ub = np.concatenate(([1, max_coverage],
+                         Z + defender_uncovered,
+                         Z + attacker_uncovered,
+                         -attacker_uncovered))
+
+    # maximize d
+    c = np.zeros(2 + 2 * T)
+    c[0] = -1
+
+    lower = np.concatenate(([-np.inf, -np.inf], np.zeros(2 * T)))
+    upper = np.concatenate(([np.inf, np.inf], np.ones(2 * T)))
+    integrality = np.concatenate((np.zeros(2 + T), np.ones(T)))
+
+    return SparseMILP(c, A, lb, ub, lower, upper, integrality)
+
+
+def origami_milp_model(attacker_uncovered,
+                       attacker_covered,
+                       max_coverage,
+                       Z=9999):
+    """
+    Build the ORIGAMI-MILP of OrigamiMILP straight from the payoff vectors.
+    Variables are laid out as [k, c_0..c_{T-1}, y_0..y_{T-1}].
+    """
+    T = attacker_uncovered.size
+    identity = sparse.identity(T, format="csr")
+    ones = np.ones((T, 1))
+
+    A = sparse.bmat([
+        # Constraint 1: sum c <= max_coverage
+        [None, np.ones((1, T)), sparse.csr_matrix((1, T))],
+        # Constraint 2: attacker payoff of t <= k
+        [-ones, sparse.diags(attacker_covered - attacker_uncovered), None],
+        # Constraint 3: k - attacker payoff of t <= (1 - y_t) Z
+        [ones, sparse.diags(attacker_uncovered - attacker_covered),
+         Z * identity],
+        # Constraint 4: c_t <= y_t
+        [None, identity, -identity],
+    ], format="csr")
+
+    lb = np.full(1 + 3 * T, -np.inf)
+    ub = np.concatenate(([max_coverage],
+                         -attacker_uncovered,
+                         Z + attacker_uncovered,
+                         np.zeros(T)))
+
+    # minimize k
+    c = np.zeros(1 + 2 * T)
+    c[0] = 1
+
+    lower = np.concatenate(([-np.inf], np.zeros(2 * T)))
+    upper = np.concatenate(([np.inf], np.ones(2 * T)))
+    integrality = np.concatenate((np.zeros(1 + T), np.ones(T)))
+
+    return SparseMILP(c, A, lb, ub, lower, upper, integrality)
@@ -1,139 +1,229 @@
 import time
 import operator
-import pulp as plp
+from solver_backends import pulp as plp
 import itertools
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from phase_timer import PhaseTimer, save_times, timed
+from profiling import profiled
+from solution_cache import game_key, lp_key
 
+@profiled("__init__", "solve")
 class Multiple_SingleLP:
     """
-    Call SingleLP for every pure strategy in the given game
+    Call SingleLP for every pure strategy in the given game. With a
+    SolutionCache, the LPs of pure strategies found in the cache are neither
+    built nor solved, and the solutions of the others are added to it.
+    With lp_workers > 1, up to lp_workers LPs are solved at once, in a
+    thread pool where every thread waits on its GLPK subprocess.
     """
-    def __init__(self, game):
+    def __init__(self, game, cache=None, lp_workers=1):
         self.game = game
         self.type = game.type
-        self.attacker_pure_strategies = itertools.product(
+        self.lp_workers = lp_workers
+        self.attacker_pure_strategies = list(itertools.product(
             range(game.num_attacker_strategies),
-            repeat=game.num_attacker_types)
-
-        # the accumulated LP solve time
-        self.solution_time = 0
-
-        # Create an LP for every attacker pure strategy
+            repeat=game.num_attacker_types))
+
+        # the phases of every LP are rolled up into this timer
+        self.timer = PhaseTimer()
+
+        # (opt payoff, mixed strategy) of the pure strategies in the cache
+        self.cache = cache
+        self.cached = {}
+        if cache is not None:
+            self.timer.switch("game_transform")
+            self.key = game_key(game, lp="SingleLP")
+            for pure_strat in self.attacker_pure_strategies:
+                solution = cache.get(lp_key(self.key, pure_strat))
+                if solution is not None:
+                    self.cached[pure_strat] = solution
+        self.timer.switch("bookkeeping")
+
+        # Create an LP for every other attacker pure strategy
         self.LPs = []
         for pure_strat in self.attacker_pure_strategies:
+            if pure_strat in self.cached:
+                continue
             self.LPs.append(SingleLP(self.game, pure_strat))
+            self.timer.add(self.LPs[-1].timer.take())
+        self.timer.stop()
 
     def solve(self):
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
+        self.timer.switch("bookkeeping")
         self.opt_defender_payoff = float('-inf')
 
-        if self.type == "normal":
-            for lp in self.LPs:
-                lp.solve()
-                self.solution_time += lp.solution_time
-                if lp.opt_defender_payoff > self.opt_defender_payoff:
-                    self.opt_defender_payoff = lp.opt_defender_payoff
-                    self.opt_defender_mixed_strategy = lp.opt_defender_mixed_strategy
-                    self.opt_attacker_pure_strategy = lp.pure_strat
-        elif self.type == "compact":
+        if self.lp_workers > 1:
+            with self.timer.timing(None), \
+                    ThreadPoolExecutor(max_workers=self.lp_workers) as pool:
+                list(pool.map(operator.methodcaller("solve"), self.LPs))
+            # the LPs ran concurrently, their phases are summed
             for lp in self.LPs:
-                lp.solve()
-                self.solution_time += lp.solution_time
-                if lp.opt_defender_payoff > self.opt_defender_payoff:
-                    self.opt_defender_payoff = lp.opt_defender_payoff
-                    self.opt_coverage = lp.opt_coverage
-                    self.opt_defender_mixed_strategy = lp.opt_defender_mixed_strategy
-                    self.opt_attacker_pure_strategy = lp.pure_strat
+                self.timer.add(lp.timer.take(), nested=False)
 
-        self.solution_time_with_overhead = time.time() - start_time
-
-class SingleLP:
+        LPs = iter(self.LPs)
+        for pure_strat in self.attacker_pure_strategies:
+            if pure_strat in self.cached:
+                payoff, mixed_strategy = self.cached[pure_strat]
+            else:
+                lp = next(LPs)
+                if self.lp_workers == 1:
+                    lp.solve()
+                    self.timer.add(lp.timer.take())
+                payoff = lp.opt_defender_payoff
+                mixed_strategy = lp.opt_defender_mixed_strategy
+                if self.cache is not None:
+                    self.cache.put(lp_key(self.key, pure_strat),
+                                   (payoff, mixed_strategy))
+            if payoff > self.opt_defender_payoff:
+                self.opt_defender_payoff = payoff
+                self.opt_defender_mixed_strategy = mixed_strategy
+                self.opt_attacker_pure_strategy = pure_strat
+                if self.type == "compact":
+                    self.opt_coverage = mixed_strategy
+
+        self.timer.stop()
+        save_times(self, start_time)
+
+@profiled("__init__", "set_pure_strategy", "solve", lp=True)
+class ParametricLP:
     """
-    Takes a game and a bayesian attacker pure strategy, outputs
-    the opt_defender_payoff and corresponding mixed strategy.
+    The LP of SingleLP for a fixed game, with the attacker pure strategy as
+    a parameter. The variables and the constraints that do not depend on
+    the pure strategy are built once, set_pure_strategy replaces the
+    objective and updates the coefficients and right-hand sides of the
+    best-response constraints in place, computed by numpy.
     """
-    def __init__(self, game, pure_strat):
+    def __init__(self, game):
         self.type = game.type
-        L = game.num_attacker_types
-        p = game.attacker_type_probability
-        self.pure_strat = pure_strat
+        self.game = game
+        self.L = game.num_attacker_types
+        self.p = np.asarray(game.attacker_type_probability)
+        self.pure_strat = None
+
+        # best-response constraints by (attacker type, strategy), added on
+        # the first call to set_pure_strategy and updated in place after
+        self.best_responses = {}
+
+        self.timer = PhaseTimer()
+        self.timer.switch("model_build")
 
         # define maximization problem
-        self.prob = plp.LpProblem(name="Pure_strat: {}".format(pure_strat),
-                            sense=plp.LpMaximize)
+        self.prob = plp.LpProblem(name="Parametric", sense=plp.LpMaximize)
 
         if self.type == "normal":
-            R = game.defender_payoffs
-            C = game.attacker_payoffs
-            X = game.num_defender_strategies
-            Q = game.num_attacker_strategies
-
+            self.R = game.defender_payoffs
+            self.C = game.attacker_payoffs
+            self.Q = game.num_attacker_strategies
 
             # only vars are the mixed-strategy vars for defender
             self.x = [plp.LpVariable("x_{}".format(i),
-                                    lowBound=0,
-                                    upBound=1,
-                                    cat="Continuous") for i in range(X)]
-
-            # objective is expected defender payoff given pure strategy
-            self.prob += sum([self.x[i] * sum([
-                                        p[k] * R[i, pure_strat[k], k]
-                                        for k in range(L)])
-                            for i in range(X)])
-
-            # Constraint 1 (pure strategy must be a best response)
-            for k in range(L):
-                for j_prime in range(Q):
-                    self.prob += sum([self.x[i] * C[i,pure_strat[k], k] for i in
-                                range(X)]) >= \
-                            sum([self.x[i] * C[i, j_prime, k]
-                                for i in range(X)])
-
+                                     lowBound=0,
+                                     upBound=1,
+                                     cat="Continuous")
+                      for i in range(game.num_defender_strategies)]
+            self.vars = self.x
 
             # Constraint 2 (x is a prob. distribution)
-            self.prob += sum(self.x) == 1
+            self.prob += plp.lpSum(self.x) == 1
 
         elif self.type == "compact":
-            max_coverage = game.max_coverage
-            num_targets = game.num_targets
-            defender_uncovered = game.defender_uncovered
-            defender_covered = game.defender_covered
-            attacker_uncovered = game.attacker_uncovered
-            attacker_covered = game.attacker_covered
+            self.Q = game.num_targets
+            # payoff change from uncovered to fully covered
+            self.defender_gain = game.defender_covered - \
+                game.defender_uncovered
+            self.attacker_gain = game.attacker_covered - \
+                game.attacker_uncovered
 
             self.cov = [plp.LpVariable("cov_{}".format(i),
-                                            lowBound=0,
-                                            upBound=1,
-                                            cat="Continuous")
-                             for i in range(num_targets)]
-
-            # objective function is the expected defender payoff given coverage
-            self.prob += sum([p[k] * (self.cov[pure_strat[k]] * \
-                             defender_covered[pure_strat[k], k] + \
-                             (1 - self.cov[pure_strat[k]]) * \
-                             defender_uncovered[pure_strat[k], k]) for k \
-                             in range(L)])
-
-            # constraint 1 (best response condition)
-            for k in range(L):
-                for t_p in range(num_targets):
-                    self.prob += self.cov[pure_strat[k]] * \
-                        attacker_covered[pure_strat[k], k] + \
-                        (1-self.cov[pure_strat[k]]) * \
-                        attacker_uncovered[pure_strat[k], k] >= \
-                        self.cov[t_p] * attacker_covered[t_p, k] + \
-                        (1-self.cov[t_p]) * attacker_uncovered[t_p, k]
+                                       lowBound=0,
+                                       upBound=1,
+                                       cat="Continuous")
+                        for i in range(self.Q)]
+            self.vars = self.cov
 
             # constraint 2 (covereage must be less than max_cov
-            self.prob += sum(self.cov) <= max_coverage
+            self.prob += plp.lpSum(self.cov) <= game.max_coverage
+
+        self.timer.stop()
+
+    def _expression(self, coefficients, constant=0):
+        return plp.LpAffineExpression(list(zip(self.vars, coefficients)),
+                                      constant=constant)
+
+    def _set_best_response(self, k, j, coefficients, rhs):
+        """
+        Set the best-response constraint of attacker type k against
+        strategy j to coefficients @ vars >= rhs. Every variable has a
+        coefficient, so updating them replaces the whole expression.
+        """
+        constraint = self.best_responses.get((k, j))
+        if constraint is None:
+            constraint = plp.LpConstraint(self._expression(coefficients),
+                                          sense=plp.LpConstraintGE,
+                                          name="best_response_{}_{}".format(
+                                              k, j),
+                                          rhs=rhs)
+            self.prob.addConstraint(constraint)
+            self.best_responses[(k, j)] = constraint
+        else:
+            constraint.expr.update(zip(self.vars, coefficients))
+            constraint.changeRHS(rhs)
+
+    @timed("model_build")
+    def set_pure_strategy(self, pure_strat):
+        """
+        Replace the objective and best-response constraints with those of
+        pure_strat.
+        """
+        self.pure_strat = pure_strat
+        types = np.arange(self.L)
+        strat = np.asarray(pure_strat)
+
+        if self.type == "normal":
+            # objective is expected defender payoff given pure strategy
+            self.prob.setObjective(self._expression(
+                (self.R[:, strat, types] * self.p).sum(axis=1)))
 
+            # Constraint 1 (pure strategy must be a best response)
+            for k in range(self.L):
+                # row j' holds the payoff of pure_strat[k] minus that of j'
+                rows = self.C[:, strat[k], k][:, None] - self.C[:, :, k]
+                for j_prime in range(self.Q):
+                    self._set_best_response(k, j_prime, rows[:, j_prime], 0)
+
+        elif self.type == "compact":
+            game = self.game
+            defender_uncovered = game.defender_uncovered[strat, types]
+            attacker_uncovered = game.attacker_uncovered
+
+            # objective function is the expected defender payoff given
+            # coverage
+            objective = np.zeros(self.Q)
+            np.add.at(objective, strat,
+                      self.p * self.defender_gain[strat, types])
+            self.prob.setObjective(self._expression(
+                objective, constant=float(self.p @ defender_uncovered)))
 
+            # constraint 1 (best response condition)
+            for k in range(self.L):
+                for t_p in range(self.Q):
+                    coefficients = np.zeros(self.Q)
+                    coefficients[strat[k]] += self.attacker_gain[strat[k], k]
+                    coefficients[t_p] -= self.attacker_gain[t_p, k]
+                    self._set_best_response(
+                        k, t_p, coefficients,
+                        attacker_uncovered[t_p, k] -
+                        attacker_uncovered[strat[k], k])
 
     def solve(self):
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         # solve the LP
+        self.timer.switch("solver_call")
         self.prob.solve(plp.GLPK(keepFiles=0, msg=0))
-        self.solution_time = time.time() - start_time
-        # check if the pure strategy was feasible
+        self.timer.switch("solution_extract")
+        # check if the pure strategy was feasible
         self.feasible = self.prob.status == plp.LpStatusOptimal
         if self.feasible:
             # get the optimal defender payoff and the corresponding mixed strat.
@@ -148,23 +238,46 @@ class SingleLP:
             self.opt_defender_payoff = float("-inf")
             self.opt_defender_mixed_strategy = None
 
-        # save solution_time_with_overhead
-        self.solution_time_with_overhead = time.time() - start_time
+        # save phase times, solution_time and solution_time_with_overhead
+        self.timer.stop()
+        save_times(self, start_time)
 
 
+@profiled("__init__", lp=True)
+class SingleLP(ParametricLP):
+    """
+    Takes a game and a bayesian attacker pure strategy, outputs
+    the opt_defender_payoff and corresponding mixed strategy.
+    """
+    def __init__(self, game, pure_strat):
+        super().__init__(game)
+        self.set_pure_strategy(pure_strat)
+
 
+
+@profiled("__init__", "solve")
 class MultipleLP:
-    def __init__(self, game, attacker_type=0):
+    """
+    One LP per attacker pure strategy of attacker_type, the best of which is
+    the solution. With lp_workers > 1, up to lp_workers LPs are solved at
+    once, in a thread pool where every thread waits on its GLPK subprocess.
+    """
+    def __init__(self, game, attacker_type=0, lp_workers=1):
+        self.lp_workers = lp_workers
         # number of LPs is number of pure attacker strategies
         self.X = game.num_defender_strategies
         self.Q = game.num_attacker_strategies
         self.LPs = []
 
+        self.timer = PhaseTimer()
+        self.timer.switch("game_transform")
+
         # get payoffs
         self.C = game.attacker_payoffs[:, :, attacker_type]
         self.R = game.defender_payoffs[:, :, attacker_type]
 
         # construct an LP for each pure strategy
+        self.timer.switch("model_build")
         for j in range(self.Q):
             # define problem
             prob = plp.LpProblem(name="LP-{}".format(j), sense=plp.LpMaximize)
@@ -189,24 +302,28 @@ class MultipleLP:
 
             # add problems to the LPs container
             self.LPs.append({'x': lp_x, 'prob': prob})
+        self.timer.stop()
 
     def solve(self):
         # solve each LP sequentially
-        start_time = time.time()
-        for j, lp in enumerate(self.LPs):
-            lp['prob'].solve(plp.GLPK(keepFiles=0, msg=0))
-
-        # save solution time (without overhead)
-        self.solution_time = time.time() - start_time
+        start_time = time.perf_counter_ns()
+        self.timer.switch("solver_call")
+        if self.lp_workers > 1:
+            with ThreadPoolExecutor(max_workers=self.lp_workers) as pool:
+                list(pool.map(lambda lp: lp['prob'].solve(
+                    plp.GLPK(keepFiles=0, msg=0)), self.LPs))
+        else:
+            for j, lp in enumerate(self.LPs):
+                lp['prob'].solve(plp.GLPK(keepFiles=0, msg=0))
+        self.timer.switch("solution_extract")
 
-        # select the LP that yielded the highest objective value
-        optimal_LPs = filter(lambda x: x['prob'].status == plp.LpStatusOptimal,
-                             self.LPs)
-        objective_values = list(map(lambda x: plp.value(x['prob'].objective),
-                               optimal_LPs))
+        # select the LP that yielded the highest objective value, among
+        # those with a feasible pure strategy
+        objective_values = [(j, plp.value(lp['prob'].objective))
+                            for j, lp in enumerate(self.LPs)
+                            if lp['prob'].status == plp.LpStatusOptimal]
 
-        opt_q, opt_value = max(enumerate(objective_values), \
-                               key=operator.itemgetter(1))
+        opt_q, opt_value = max(objective_values, key=operator.itemgetter(1))
 
         # save the solution in instance variables
         self.opt_attacker_pure_strategy = opt_q
@@ -214,5 +331,6 @@ class MultipleLP:
         self.opt_defender_mixed_strategy  = \
                         list(map(lambda x: plp.value(x), self.LPs[opt_q]['x']))
 
-        # save solution time with overhead
-        self.solution_time_with_overhead = time.time() - start_time
+        # save phase times, solution time and solution time with overhead
+        self.timer.stop()
+        save_times(self, start_time)
@@ -1,13 +1,19 @@
 # from games import SecurityGame
 import numpy as np
 import time
+from phase_timer import PhaseTimer, save_times
+from profiling import profiled
 
+@profiled("__init__", "solve", "sweep")
 class Origami:
     """
     Origami is the procedure for computing the maximal attack-set
     it's given a security game, and will output the optimal coverage
     """
     def __init__(self, game, attacker_type=0):
+        self.timer = PhaseTimer()
+        self.timer.switch("game_transform")
+
         # copy game vars
         self.attacker_uncovered = game.attacker_uncovered[:, attacker_type]
         self.attacker_covered = game.attacker_covered[:, attacker_type]
@@ -15,6 +21,7 @@ class Origami:
         self.defender_covered = game.defender_covered[:, attacker_type]
         self.num_targets = game.num_targets
         self.max_coverage = game.max_coverage
+        self.timer.stop()
 
     def solve(self):
         """
@@ -26,7 +33,8 @@ class Origami:
         This implementation follows roughly the pseudo-code by Kiekintveld.
         """
         # record start time
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
+        self.timer.switch("solver_call")
 
         # get the targets sorted in descending order by attacker_uncovered payoff
         # and obtain the covered and uncovered payoff of these targets.
@@ -92,10 +100,10 @@ class Origami:
 
         # save the optimal coverage vector for the original target indices.
         self.opt_coverage = np.zeros((self.num_targets))
-        self.opt_coverage[sorted_targets] = coverage
+        self.opt_coverage[sorted_targets] = coverage[:, 0]
 
-        # save solution time without the overhead
-        self.solution_time = time.time() - start_time
+        # the rest is deriving the payoffs
+        self.timer.switch("solution_extract")
 
         # compute defender payoffs
         payoffs = np.zeros((self.attack_set.size,1))
@@ -118,5 +126,488 @@ class Origami:
         # save opt attack set
         self.opt_attack_set = sorted(self.attack_set)
 
-        # save solution time with overhead
-        self.solution_time_with_overhead = time.time() - start_time
+        # save phase times, solution time and solution time with overhead
+        self.timer.stop()
+        save_times(self, start_time)
+
+    def sweep(self, max_coverages):
+        """
+        Solve the game for every resource level in max_coverages at the cost
+        of roughly one solve. The order in which targets join the attack-set
+        does not depend on max_coverage, only where the growth stops does, so
+        the attack-set expansion is run once and its breakpoints recorded:
+        the attack-set holds more than i+1 targets once max_coverage
+        reaches breakpoints[i]. Results are stacked along the first axis in
+        the order of max_coverages:
+            sweep_coverage[k, t], sweep_attack_set_size[k],
+            sweep_defender_payoff[k], sweep_attacked_target[k]
+        The times of the sweep are reported as those of solve.
+        """
+        # record start time
+        start_time = time.perf_counter_ns()
+        self.timer.switch("solver_call")
+
+        self.sweep_max_coverage = np.asarray(max_coverages, dtype=float).ravel()
+
+        # sort the targets once, as in solve.
+        sorted_targets = np.argsort(self.attacker_uncovered)[::-1]
+        uncovered_payoff = np.take(self.attacker_uncovered,
+                                   sorted_targets)[None, :]
+        covered_payoff = np.take(self.attacker_covered, sorted_targets)[None, :]
+
+        inverse_range, needed_coverage, max_covered = \
+            _expand_attack_set(uncovered_payoff, covered_payoff)
+
+        # no budget can grow the attack-set past the first target that would
+        # require coverage >= 1 on a target already in the attack-set.
+        coverage_exceeded = (uncovered_payoff <= max_covered)[0]
+        coverage_exceeded[0] = False
+        if coverage_exceeded.any():
+            max_attack_set_size = coverage_exceeded.argmax()
+            first = np.argmax(covered_payoff[0, :max_attack_set_size] >=
+                              uncovered_payoff[0, max_attack_set_size])
+            max_coverage_bound = covered_payoff[0, first]
+        else:
+            max_attack_set_size = self.num_targets
+            max_coverage_bound = float('-inf')
+
+        # the coverage needed to admit each further target
+        self.breakpoints = np.maximum.accumulate(
+            needed_coverage[0, 1:max_attack_set_size])
+
+        # size of the attack-set for each resource level
+        attack_set_size = 1 + np.searchsorted(self.breakpoints,
+                                              self.sweep_max_coverage,
+                                              side='right')
+        coverage_bound = np.where(attack_set_size == max_attack_set_size,
+                                  max_coverage_bound,
+                                  float('-inf'))
+
+        coverage, in_attack_set = _allocate_coverage(uncovered_payoff,
+                                                     covered_payoff,
+                                                     inverse_range,
+                                                     attack_set_size,
+                                                     coverage_bound,
+                                                     self.sweep_max_coverage)
+
+        # the rest is deriving the payoffs
+        self.timer.switch("solution_extract")
+
+        # save the coverage for the original target indices.
+        self.sweep_coverage = np.zeros((attack_set_size.size,
+                                        self.num_targets))
+        self.sweep_coverage[:, sorted_targets] = coverage
+        attack_set = np.zeros(self.sweep_coverage.shape, dtype=bool)
+        attack_set[:, sorted_targets] = in_attack_set
+        self.sweep_attack_set_size = attack_set_size
+
+        # compute defender payoffs, the attacker picks the target in the
+        # attack-set that yields the highest defender payoff.
+        payoffs = np.where(attack_set,
+                           self.defender_covered * self.sweep_coverage +
+                           (1 - self.sweep_coverage) * self.defender_uncovered,
+                           float('-inf'))
+        self.sweep_attacked_target = payoffs.argmax(axis=1)
+        self.sweep_defender_payoff = payoffs.max(axis=1)
+
+        # save phase times, solution time and solution time with overhead
+        self.timer.stop()
+        save_times(self, start_time)
+
+
+def _expand_attack_set(uncovered_payoff, covered_payoff):
+    """
+    Given the (batch, targets) attacker payoffs of targets sorted in
+    descending order by uncovered payoff, compute for every prefix m
+    the total coverage needed to make the attacker indifferent between the
+    first m targets and target m, and the highest covered payoff among the
+    first m targets. Neither depends on the resource budget.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # coverage needed on t so that its payoff drops to level k is
+        # (k - uncovered[t]) * inverse_range[t]
+        inverse_range = 1.0 / (covered_payoff - uncovered_payoff)
+
+        # summed over the first m targets, the coverage needed to make
+        # the attacker indifferent to target m is
+        # uncovered[m] * W[m] - V[m]
+        W = np.zeros_like(inverse_range)
+        V = np.zeros_like(inverse_range)
+        W[:, 1:] = np.cumsum(inverse_range, axis=1)[:, :-1]
+        V[:, 1:] = np.cumsum(uncovered_payoff * inverse_range,
+                             axis=1)[:, :-1]
+        needed_coverage = uncovered_payoff * W - V
+
+    # target m cannot be added if a target before it already needs
+    # coverage >= 1, i.e. its covered payoff is >= uncovered[m].
+    max_covered = np.full_like(covered_payoff, float('-inf'))
+    max_covered[:, 1:] = np.maximum.accumulate(covered_payoff, axis=1)[:, :-1]
+
+    return (inverse_range, needed_coverage, max_covered)
+
+
+def _allocate_coverage(uncovered_payoff,
+                       covered_payoff,
+                       inverse_range,
+                       attack_set_size,
+                       coverage_bound,
+                       max_coverage):
+    """
+    Allocate max_coverage over the attack-set made of the first
+    attack_set_size sorted targets of every row, as at the end of
+    Origami.solve. The payoff arrays may hold a single row that is shared
+    by every attack_set_size. Returns the sorted coverage and the
+    attack-set mask.
+    """
+    num_targets = uncovered_payoff.shape[1]
+    in_attack_set = np.arange(num_targets) < attack_set_size[:, None]
+
+    # coverage that makes the attacker indifferent between the
+    # attack-set and its last target
+    level = np.take_along_axis(
+        np.broadcast_to(uncovered_payoff, in_attack_set.shape),
+        (attack_set_size - 1)[:, None], axis=1)
+    with np.errstate(invalid='ignore'):
+        coverage = np.where(in_attack_set,
+                            (level - uncovered_payoff) * inverse_range,
+                            0.0)
+
+    # spread the coverage that is left over the attack-set
+    left = max_coverage - coverage.sum(axis=1)
+    ratio = np.where(in_attack_set, -inverse_range, 0.0)
+    coverage += ratio * (left / ratio.sum(axis=1))[:, None]
+
+    # a target assigned coverage >= 1 bounds the payoff of the attack-set
+    full = in_attack_set & (coverage >= 1)
+    coverage_bound = np.maximum(
+        coverage_bound,
+        np.where(full, covered_payoff, float('-inf')).max(axis=1))
+    bounded = coverage_bound > float('-inf')
+    with np.errstate(invalid='ignore'):
+        bounded_coverage = (coverage_bound[:, None] - uncovered_payoff) * \
+            inverse_range
+    coverage = np.where(bounded[:, None] & in_attack_set,
+                        bounded_coverage, coverage)
+
+    return (coverage, in_attack_set)
+
+
+@profiled("__init__", "solve")
+class BatchedOrigami:
+    """
+    BatchedOrigami runs ORIGAMI on a stack of independent problems at once.
+    Every row of the (batch, targets) payoff arrays is one single-type
+    security game. Instead of growing the attack-set target by target, the
+    coverage needed to admit every prefix of the sorted targets is computed
+    with cumulative sums, and the attack-set of each row ends at the first
+    prefix that violates one of the two ORIGAMI termination conditions.
+    Rows may come from games of different sizes, padded targets are masked
+    out with an uncovered attacker payoff of -inf.
+    """
+    def __init__(self,
+                 attacker_uncovered,
+                 attacker_covered,
+                 defender_uncovered,
+                 defender_covered,
+                 max_coverage):
+        self.timer = PhaseTimer()
+        self.timer.switch("game_transform")
+        self.attacker_uncovered = np.atleast_2d(attacker_uncovered)
+        self.attacker_covered = np.atleast_2d(attacker_covered)
+        self.defender_uncovered = np.atleast_2d(defender_uncovered)
+        self.defender_covered = np.atleast_2d(defender_covered)
+        self.batch_size, self.num_targets = self.attacker_uncovered.shape
+
+        # max_coverage may be given per row or once for the whole batch
+        self.max_coverage = np.broadcast_to(
+            np.asarray(max_coverage, dtype=float), (self.batch_size,))
+
+        # targets that are only there to pad a row to num_targets
+        self.target_mask = np.isfinite(self.attacker_uncovered)
+        self.timer.stop()
+
+    @classmethod
+    def from_game(cls, game, attacker_types=None):
+        """
+        Stack the given attacker types of a security game, one row per type.
+        """
+        return cls.from_games([game], attacker_types)
+
+    @classmethod
+    def from_games(cls, games, attacker_types=None):
+        """
+        Stack the attacker types of several security games. Rows are ordered
+        by game and then by attacker type, the row of (game g, type l) is
+        recorded in self.rows.
+        """
+        timer = PhaseTimer()
+        timer.switch("game_transform")
+        num_targets = max(game.num_targets for game in games)
+        rows = []
+        payoffs = {'attacker_uncovered': [], 'attacker_covered': [],
+                   'defender_uncovered': [], 'defender_covered': []}
+        max_coverage = []
+
+        for g, game in enumerate(games):
+            types = range(game.num_attacker_types) if attacker_types is None \
+                else attacker_types
+            types = list(types)
+            pad = ((0, num_targets - game.num_targets), (0, 0))
+            for name, rows_of_name in payoffs.items():
+                # padded targets are never attacked, see target_mask.
+                fill = float('-inf') if name == 'attacker_uncovered' else 0.0
+                payoff = getattr(game, name)[:, types]
+                rows_of_name.append(np.pad(payoff, pad,
+                                           constant_values=fill).T)
+            max_coverage.extend([game.max_coverage] * len(types))
+            rows.extend((g, l) for l in types)
+        timer.stop()
+
+        batch = cls(*[np.concatenate(payoffs[name]) for name in payoffs],
+                    max_coverage=max_coverage)
+        batch.rows = rows
+        batch.timer.add(timer, nested=False)
+        return batch
+
+    def solve(self):
+        """
+        Solve every row of the batch. The outputs mirror those of Origami,
+        stacked along the first axis:
+            opt_coverage[b, t]: coverage of target t in row b
+            attack_set[b, t]: whether target t is in the attack-set of row b
+            attack_set_size[b]: number of targets in the attack-set of row b
+            opt_defender_payoffs[b, t]: defender payoff for targets in the
+                attack-set, -inf for every other target
+            opt_defender_payoff[b], opt_attacked_target[b]
+        """
+        # record start time
+        start_time = time.perf_counter_ns()
+        self.timer.switch("solver_call")
+
+        batch = np.arange(self.batch_size)[:, None]
+
+        # sort every row in descending order by attacker_uncovered payoff
+        sorted_targets = np.argsort(self.attacker_uncovered, axis=1)[:, ::-1]
+        uncovered_payoff = self.attacker_uncovered[batch, sorted_targets]
+        covered_payoff = self.attacker_covered[batch, sorted_targets]
+
+        inverse_range, needed_coverage, max_covered = \
+            _expand_attack_set(uncovered_payoff, covered_payoff)
+        with np.errstate(invalid='ignore'):
+            padded = ~self.target_mask[batch, sorted_targets]
+            coverage_exceeded = (uncovered_payoff <= max_covered) & ~padded
+            coverage_depleted = needed_coverage > self.max_coverage[:, None]
+
+        # the attack-set of every row ends at the first violating target,
+        # or at the first padded target.
+        terminate = coverage_exceeded | coverage_depleted | padded
+        terminate[:, 0] = False
+        stopped = terminate.any(axis=1)
+        attack_set_size = np.where(stopped, terminate.argmax(axis=1),
+                                   self.num_targets)
+        in_attack_set = np.arange(self.num_targets) < attack_set_size[:, None]
+
+        # coverage_bound is the covered payoff of the first target that
+        # would need coverage >= 1 to admit the next one.
+        coverage_bound = np.full(self.batch_size, float('-inf'))
+        bounded = stopped & coverage_exceeded[batch[:, 0],
+                                              np.minimum(attack_set_size,
+                                                         self.num_targets - 1)]
+        if bounded.any():
+            next_payoff = uncovered_payoff[batch[:, 0],
+                                           np.minimum(attack_set_size,
+                                                      self.num_targets - 1)]
+            first = ((covered_payoff >= next_payoff[:, None]) &
+                     in_attack_set).argmax(axis=1)
+            coverage_bound[bounded] = covered_payoff[bounded, first[bounded]]
+
+        coverage, in_attack_set = _allocate_coverage(uncovered_payoff,
+                                                     covered_payoff,
+                                                     inverse_range,
+                                                     attack_set_size,
+                                                     coverage_bound,
+                                                     self.max_coverage)
+
+        # save the optimal coverage for the original target indices.
+        self.opt_coverage = np.zeros((self.batch_size, self.num_targets))
+        self.opt_coverage[batch, sorted_targets] = coverage
+        self.attack_set = np.zeros((self.batch_size, self.num_targets),
+                                   dtype=bool)
+        self.attack_set[batch, sorted_targets] = in_attack_set
+        self.attack_set_size = attack_set_size
+
+        # the rest is deriving the payoffs
+        self.timer.switch("solution_extract")
+
+        # compute defender payoffs for the targets of every attack-set
+        payoffs = self.defender_covered * self.opt_coverage + \
+            (1 - self.opt_coverage) * self.defender_uncovered
+        self.opt_defender_payoffs = np.where(self.attack_set, payoffs,
+                                             float('-inf'))
+
+        # the attacked target is the target that yield highest defender payoff
+        self.opt_attacked_target = self.opt_defender_payoffs.argmax(axis=1)
+        self.opt_defender_payoff = self.opt_defender_payoffs[
+            batch[:, 0], self.opt_attacked_target]
+
+        # save phase times, solution time and solution time with overhead
+        self.timer.stop()
+        save_times(self, start_time)
+
+    def opt_attack_set(self, b):
+        """
+        The sorted attack-set of row b, as in Origami.opt_attack_set
+        """
+        return list(np.nonzero(self.attack_set[b])[0])
+
+
+def _top_targets(values, k, chunk_size):
+    """
+    Find the k targets with the highest values, sorted in descending order,
+    reading values chunk by chunk so that at most k + chunk_size of them are
+    held in memory at any time. Returns the targets and their values.
+    """
+    top_targets = np.zeros(0, dtype=np.intp)
+    top_values = np.zeros(0)
+    for start in range(0, len(values), chunk_size):
+        chunk = np.asarray(values[start:start + chunk_size], dtype=float)
+        targets = np.concatenate((top_targets,
+                                  np.arange(start, start + chunk.size)))
+        candidates = np.concatenate((top_values, chunk))
+        if candidates.size > k:
+            # keep only the k highest candidates seen so far
+            keep = np.argpartition(candidates, candidates.size - k)[-k:]
+            targets, candidates = targets[keep], candidates[keep]
+        top_targets, top_values = targets, candidates
+
+    order = np.argsort(top_values)[::-1]
+    return (top_targets[order], top_values[order])
+
+
+@profiled("__init__", "solve")
+class OutOfCoreOrigami:
+    """
+    OutOfCoreOrigami runs ORIGAMI on a single-type security game whose
+    payoff columns are too large to copy, e.g. np.memmap arrays. Only the
+    targets that can enter the attack-set are read into memory: the
+    prefix_size targets with the highest uncovered attacker payoff are
+    selected chunk by chunk, and the prefix is doubled until the attack-set
+    terminates inside it. Memory use therefore scales with the size of the
+    attack-set rather than with the number of targets.
+    Coverage is only stored for the attack-set, every other target has
+    coverage 0.
+    """
+    def __init__(self,
+                 attacker_uncovered,
+                 attacker_covered,
+                 defender_uncovered,
+                 defender_covered,
+                 max_coverage,
+                 prefix_size=1024,
+                 chunk_size=2**20):
+        self.timer = PhaseTimer()
+        self.attacker_uncovered = attacker_uncovered
+        self.attacker_covered = attacker_covered
+        self.defender_uncovered = defender_uncovered
+        self.defender_covered = defender_covered
+        self.num_targets = len(attacker_uncovered)
+        self.max_coverage = max_coverage
+
+        self.prefix_size = prefix_size
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def from_game(cls, game, attacker_type=0, **kwargs):
+        """
+        Solve the given attacker type of a security game, the payoff columns
+        are passed on as views.
+        """
+        return cls(game.attacker_uncovered[:, attacker_type],
+                   game.attacker_covered[:, attacker_type],
+                   game.defender_uncovered[:, attacker_type],
+                   game.defender_covered[:, attacker_type],
+                   game.max_coverage,
+                   **kwargs)
+
+    def solve(self):
+        """
+        Grow the sorted prefix until the attack-set terminates inside it,
+        then allocate the coverage over the attack-set as in Origami.
+        """
+        # record start time
+        start_time = time.perf_counter_ns()
+        self.timer.switch("solver_call")
+
+        prefix_size = min(self.prefix_size, self.num_targets)
+        while True:
+            sorted_targets, uncovered_payoff = _top_targets(
+                self.attacker_uncovered, prefix_size, self.chunk_size)
+            uncovered_payoff = uncovered_payoff[None, :]
+            covered_payoff = np.asarray(
+                self.attacker_covered[sorted_targets], dtype=float)[None, :]
+
+            inverse_range, needed_coverage, max_covered = \
+                _expand_attack_set(uncovered_payoff, covered_payoff)
+            coverage_exceeded = (uncovered_payoff <= max_covered)[0]
+            terminate = coverage_exceeded | \
+                (needed_coverage[0] > self.max_coverage)
+            terminate[0] = False
+
+            # the attack-set is known once a target of the prefix is left out
+            if terminate.any() or prefix_size == self.num_targets:
+                break
+            prefix_size = min(2 * prefix_size, self.num_targets)
+        self.num_materialized_targets = prefix_size
+
+        attack_set_size = terminate.argmax() if terminate.any() \
+            else prefix_size
+        coverage_bound = float('-inf')
+        if terminate.any() and coverage_exceeded[attack_set_size]:
+            first = np.argmax(covered_payoff[0, :attack_set_size] >=
+                              uncovered_payoff[0, attack_set_size])
+            coverage_bound = covered_payoff[0, first]
+
+        coverage, _ = _allocate_coverage(uncovered_payoff[:, :attack_set_size],
+                                         covered_payoff[:, :attack_set_size],
+                                         inverse_range[:, :attack_set_size],
+                                         np.array([attack_set_size]),
+                                         np.array([coverage_bound]),
+                                         self.max_coverage)
+
+        # save the attack-set in ascending target order with its coverage
+        order = np.argsort(sorted_targets[:attack_set_size])
+        self.opt_attack_set = sorted_targets[:attack_set_size][order]
+        self.opt_attack_set_coverage = coverage[0, order]
+
+        # the rest is deriving the payoffs
+        self.timer.switch("solution_extract")
+
+        # compute defender payoffs for the attack-set
+        defender_covered = np.asarray(
+            self.defender_covered[self.opt_attack_set], dtype=float)
+        defender_uncovered = np.asarray(
+            self.defender_uncovered[self.opt_attack_set], dtype=float)
+        self.opt_defender_payoffs = \
+            defender_covered * self.opt_attack_set_coverage + \
+            (1 - self.opt_attack_set_coverage) * defender_uncovered
+
+        # the attacked target is the target that yield highest defender payoff
+        self.opt_defender_payoff = self.opt_defender_payoffs.max()
+        self.opt_attacked_target = \
+            self.opt_attack_set[np.argmax(self.opt_defender_payoffs)]
+
+        # save phase times, solution time and solution time with overhead
+        self.timer.stop()
+        save_times(self, start_time)
+
+    def dense_coverage(self, out=None):
+        """
+        Write the coverage of every target to out, which may itself be a
+        np.memmap, and return it.
+        """
+        if out is None:
+            out = np.zeros(self.num_targets)
+        else:
+            out[:] = 0
+        out[self.opt_attack_set] = self.opt_attack_set_coverage
+        return out
@@ -1,10 +1,15 @@
-import pulp as plp
+from solver_backends import pulp as plp
 import numpy as np
 import time
+from phase_timer import PhaseTimer, save_times
+from profiling import profiled
 
 
+@profiled("__init__", "solve")
 class OrigamiMILP:
-    def __init__(self, game, attacker_type=0):
+    def __init__(self, game, attacker_type=0, sparse=False):
+        self.timer = PhaseTimer()
+        self.timer.switch("game_transform")
         self.attacker_uncovered = game.attacker_uncovered[:,attacker_type]
         self.attacker_covered = game.attacker_covered[:,attacker_type]
         self.defender_uncovered = game.defender_uncovered[:,attacker_type]
@@ -16,6 +21,18 @@ class OrigamiMILP:
         # large constant
         self.Z = 9999
 
+        # build the MILP as sparse matrices for the in-process solver
+        self.sparse = sparse
+        self.timer.switch("model_build")
+        if self.sparse:
+            from milp_builders import origami_milp_model
+            self.model = origami_milp_model(self.attacker_uncovered,
+                                            self.attacker_covered,
+                                            self.max_coverage,
+                                            self.Z)
+            self.timer.stop()
+            return
+
         self.prob = plp.LpProblem(name="ORIGAMI-MILP", sense=plp.LpMinimize)
         self.k = plp.LpVariable("k", cat="Contineous")
 
@@ -52,13 +69,18 @@ class OrigamiMILP:
 
             # Constraint 4
             self.prob += self.C[t] <= self.y[t]
+        self.timer.stop()
 
     def solve(self):
+        if self.sparse:
+            self._solve_sparse()
+            return
+
         # use GLPK solver
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
+        self.timer.switch("solver_call")
         self.prob.solve(plp.GLPK(keepFiles=0, msg=0))
-        # save solution time (without overhead)
-        self.solution_time = time.time() - start_time
+        self.timer.switch("solution_extract")
         # save status
         self.status = plp.LpStatus[self.prob.status]
 
@@ -87,5 +109,43 @@ class OrigamiMILP:
                 # set the attacked target
                 self.opt_attacked_target = t
 
-        # save solution_time with overhead
-        self.solution_time_with_overhead = time.time() - start_time
+        # save phase times, solution_time and solution_time with overhead
+        self.timer.stop()
+        save_times(self, start_time)
+
+    def _solve_sparse(self):
+        start_time = time.perf_counter_ns()
+        self.timer.switch("solver_call")
+        self.model.solve()
+        self.timer.switch("solution_extract")
+        # save status
+        self.status = self.model.status
+
+        if self.status == "Optimal":
+            # variables are laid out as [k, C, y]
+            C = self.model.x[1:1 + self.num_targets]
+            y = self.model.x[1 + self.num_targets:]
+
+            # save optimal coverage
+            self.opt_coverage = list(C)
+
+            # the attackset are targets with y = 1, the attacked target is
+            # the one in the attackset with the highest defender payoff.
+            self.opt_attack_set = list(np.nonzero(y > 0.5)[0])
+            defender_payoffs = C[self.opt_attack_set] * \
+                self.defender_covered[self.opt_attack_set] + \
+                (1 - C[self.opt_attack_set]) * \
+                self.defender_uncovered[self.opt_attack_set]
+            self.opt_defender_payoff = defender_payoffs.max()
+            self.opt_attacked_target = self.opt_attack_set[
+                np.argmax(defender_payoffs)]
+        else:
+            # HiGHS found no solution, e.g. it hit a limit
+            self.opt_coverage = None
+            self.opt_attack_set = []
+            self.opt_defender_payoff = float("-inf")
+            self.opt_attacked_target = None
+
+        # save phase times, solution_time and solution_time with overhead
+        self.timer.stop()
+        save_times(self, start_time)
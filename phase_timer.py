@@ -0,0 +1,114 @@
+import functools
+import time
+from contextlib import contextmanager
+
+# the phases every solver reports, in the order they usually run:
+# game_transform - deriving the solver's view of the game (slices, partial
+#                  games),
+# model_build - setting up the (MI)LP or the arrays of the algorithm,
+# solver_call - the LP/MILP solver or the core of the algorithm,
+# solution_extract - reading the solution back and deriving payoffs,
+# bookkeeping - everything else, e.g. the branch-and-bound of HBGS.
+PHASES = ("game_transform",
+          "model_build",
+          "solver_call",
+          "solution_extract",
+          "bookkeeping")
+
+
+class PhaseTimer:
+    """
+    Accumulates the wall clock time spent in every phase, with
+    time.perf_counter_ns. At most one phase runs at a time: switch ends the
+    running phase and starts the next, timing runs a phase for the duration
+    of a with block and then resumes the phase it interrupted.
+    A nested solver keeps its own timer, which is rolled up into the timer of
+    the solver calling it with add, so that its phases are counted once, as
+    its own, and not as part of the phase the caller was in.
+    """
+    def __init__(self):
+        self.ns = dict.fromkeys(PHASES, 0)
+        self.phase = None
+        self._start_ns = None
+
+    def switch(self, phase=None):
+        """
+        End the running phase, if any, and start phase, if not None.
+        """
+        now = time.perf_counter_ns()
+        if self.phase is not None:
+            self.ns[self.phase] += now - self._start_ns
+        self.phase = phase
+        self._start_ns = now
+
+    def stop(self):
+        self.switch(None)
+
+    @contextmanager
+    def timing(self, phase):
+        previous = self.phase
+        self.switch(phase)
+        try:
+            yield self
+        finally:
+            self.switch(previous)
+
+    def add(self, other, nested=True):
+        """
+        Roll up the phases of other, the timer of a nested solver. If nested,
+        the nested solver ran in this thread within the running phase of this
+        timer, which is not charged for that time. Nested solvers that ran
+        concurrently, in threads or processes, are added with nested=False,
+        so that their phases are summed.
+        """
+        for phase in PHASES:
+            self.ns[phase] += other.ns[phase]
+        if nested and self.phase is not None:
+            self.ns[self.phase] -= other.total_ns
+
+    def take(self):
+        """
+        Return a stopped copy of this timer and reset it, for rolling up a
+        solver that is used more than once.
+        """
+        taken = PhaseTimer()
+        taken.ns = self.ns
+        self.ns = dict.fromkeys(PHASES, 0)
+        return taken
+
+    @property
+    def total_ns(self):
+        return sum(self.ns.values())
+
+    def seconds(self):
+        """
+        The time of every phase in seconds.
+        """
+        return dict((phase, ns / 1e9) for phase, ns in self.ns.items())
+
+
+def timed(phase):
+    """
+    Decorator running a method as phase of self.timer.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.timer.timing(phase):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def save_times(solver, start_ns):
+    """
+    Report the times of a solver, the same way for every solver:
+    phase_times, the seconds spent in every phase of solver.timer since the
+    solver was created, solution_time, the seconds spent in the solver_call
+    phase, and solution_time_with_overhead, the seconds since start_ns, the
+    time.perf_counter_ns() at which solve was called.
+    """
+    solver.phase_times = solver.timer.seconds()
+    solver.solution_time = solver.phase_times["solver_call"]
+    solver.solution_time_with_overhead = \
+        (time.perf_counter_ns() - start_ns) / 1e9
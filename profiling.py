@@ -0,0 +1,157 @@
+import cProfile
+import functools
+import itertools
+import os
+import threading
+from contextlib import contextmanager
+
+# set to a directory to profile every solver from import on
+PROFILE_DIR_VARIABLE = "SOLVER_PROFILE_DIR"
+# set to 1 to also profile every LP of HBGS and Multiple_SingleLP on its own
+PROFILE_LPS_VARIABLE = "SOLVER_PROFILE_LPS"
+
+# the game dimensions a profile is tagged with, and the attributes of a
+# game or solver holding them
+DIMENSIONS = (("x", ("num_defender_strategies", "X")),
+              ("q", ("num_attacker_strategies", "Q")),
+              ("t", ("num_targets",)),
+              ("l", ("num_attacker_types", "L")),
+              ("b", ("batch_size",)))
+
+# (class, method names, lp) of every class registered by profiled
+_classes = []
+# whether the profiling wrappers are installed, and the original methods
+_installed = False
+_originals = {}
+# (directory, lps) while profiling is switched on
+_config = None
+# the profilers running in every thread, innermost last, as (profiler, lp)
+_local = threading.local()
+_counter = itertools.count()
+
+
+def profiled(*names, lp=False):
+    """
+    Class decorator registering methods of a solver for profiling. The
+    methods are left as they are, so profiling costs nothing until it is
+    switched on by the SOLVER_PROFILE_DIR environment variable or the
+    profiling context manager. Then every call of a method writes its
+    cProfile stats to the profile directory, unless it is made within a
+    profiled call, e.g. Origami within Eraser, in which case it is part of
+    that profile. Classes with lp=True are only profiled with lps, every
+    call on its own, apart from the profile of the solver calling it.
+    """
+    def decorator(cls):
+        _classes.append((cls, names, lp))
+        if _installed:
+            _install_class(cls, names, lp)
+        return cls
+    return decorator
+
+
+@contextmanager
+def profiling(directory, lps=False):
+    """
+    Profile the registered solvers within a with block, writing one .prof
+    file per call to directory, see profiled.
+    """
+    global _config
+    previous = _config
+    _config = (directory, lps)
+    installed = not _installed
+    if installed:
+        _install()
+    try:
+        yield
+    finally:
+        _config = previous
+        if installed:
+            _uninstall()
+
+
+def profile_path(directory, solver, method_name):
+    """
+    The file a profile of a call of method_name on solver is written to:
+    <class>.<method>.<game dimensions>.<pid>.<count>.prof
+    """
+    return os.path.join(directory, "{}.{}.{}.{}.{}.prof".format(
+        type(solver).__name__, method_name.strip("_"), _tag(solver),
+        os.getpid(), next(_counter)))
+
+
+def _tag(solver):
+    """
+    The game dimensions of a solver, e.g. x5-q3-l2, taken from its game if
+    it keeps one and otherwise from the solver itself.
+    """
+    sources = [getattr(solver, "game", None), solver]
+    parts = []
+    for prefix, attributes in DIMENSIONS:
+        for source in sources:
+            value = next((getattr(source, attribute)
+                          for attribute in attributes
+                          if isinstance(getattr(source, attribute, None),
+                                        int)), None)
+            if value is not None:
+                parts.append("{}{}".format(prefix, value))
+                break
+    return "-".join(parts) or "unknown"
+
+
+def _install():
+    global _installed
+    _installed = True
+    for cls, names, lp in _classes:
+        _install_class(cls, names, lp)
+
+
+def _install_class(cls, names, lp):
+    for name in names:
+        original = cls.__dict__[name]
+        _originals[(cls, name)] = original
+        setattr(cls, name, _wrap(original, lp))
+
+
+def _uninstall():
+    global _installed
+    _installed = False
+    for (cls, name), original in _originals.items():
+        setattr(cls, name, original)
+    _originals.clear()
+
+
+def _wrap(method, lp):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        config = _config
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        if config is None or (lp and not config[1]) or \
+                (stack and (not lp or stack[-1][1])):
+            return method(self, *args, **kwargs)
+
+        # an LP profiled within a solver is left out of the solver's profile
+        if stack:
+            stack[-1][0].disable()
+        profiler = cProfile.Profile()
+        stack.append((profiler, lp))
+        profiler.enable()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            profiler.disable()
+            stack.pop()
+            os.makedirs(config[0], exist_ok=True)
+            profiler.dump_stats(profile_path(config[0], self,
+                                             method.__name__))
+            if stack:
+                stack[-1][0].enable()
+    return wrapper
+
+
+if os.environ.get(PROFILE_DIR_VARIABLE):
+    _config = (os.environ[PROFILE_DIR_VARIABLE],
+               os.environ.get(PROFILE_LPS_VARIABLE) == "1")
+    # classes are installed as they are registered
+    _installed = True
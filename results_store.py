@@ -0,0 +1,137 @@
+import json
+import sqlite3
+import time
+
+# timings stored in their own columns, so they can be aggregated in SQL
+METRICS = ("solution_time", "solution_time_with_overhead", "wall_time")
+
+# memory use in bytes, aggregated from the metrics JSON
+MEMORY_METRICS = ("peak_rss_bytes", "glpk_peak_rss_bytes", "payoff_bytes",
+                  "model_bytes")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    experiment TEXT NOT NULL,
+    spec TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    solver TEXT NOT NULL,
+    config TEXT NOT NULL,
+    status TEXT NOT NULL,
+    solution_time REAL,
+    solution_time_with_overhead REAL,
+    wall_time REAL,
+    metrics TEXT,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (experiment, spec, seed, solver, config)
+)
+"""
+
+
+def _key(experiment, spec, seed, solver, config=None):
+    """
+    The primary key of a run, with spec and config as canonical JSON.
+    """
+    return (experiment,
+            json.dumps(spec, sort_keys=True),
+            int(seed),
+            solver,
+            json.dumps(config or {}, sort_keys=True))
+
+
+class ResultsStore:
+    """
+    Append-only store of experiment runs in an SQLite database, keyed by
+    (experiment, game spec, seed, solver, solver config). Every run is
+    committed as soon as it is recorded, so an interrupted experiment can
+    be resumed by skipping the runs already recorded. spec and config are
+    dicts, stored as JSON.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(SCHEMA)
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def record(self, experiment, spec, seed, solver, config, status,
+               metrics=None):
+        """
+        Record a run with its status ("ok", "timeout", "error") and metrics,
+        a dict of the solution times and any other values. A run that is
+        already recorded is kept as it is.
+        """
+        metrics = metrics or {}
+        self.connection.execute(
+            "INSERT OR IGNORE INTO results VALUES "
+            "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            _key(experiment, spec, seed, solver, config) +
+            (status,) +
+            tuple(metrics.get(metric) for metric in METRICS) +
+            (json.dumps(metrics), time.time()))
+        self.connection.commit()
+
+    def get(self, experiment, spec, seed, solver, config=None):
+        """
+        The (status, metrics) of a recorded run, or None.
+        """
+        row = self.connection.execute(
+            "SELECT status, metrics FROM results WHERE experiment = ? AND "
+            "spec = ? AND seed = ? AND solver = ? AND config = ?",
+            _key(experiment, spec, seed, solver, config)).fetchone()
+        if row is None:
+            return None
+        return (row["status"], json.loads(row["metrics"]))
+
+    def is_recorded(self, experiment, spec, seed, solver, config=None):
+        return self.get(experiment, spec, seed, solver, config) is not None
+
+    def aggregate(self, experiment, size_key=None, metric="solution_time"):
+        """
+        Number of runs and mean, median, min and max of a metric over the
+        successful runs of an experiment, per solver, config and size. The
+        size is the size_key entry of the game spec, or the whole spec if
+        size_key is None. Memory metrics are read from the metrics JSON.
+        Computed in SQL, returned as a list of dicts.
+        """
+        parameters = ()
+        if metric in MEMORY_METRICS:
+            parameters += (metric,)
+            metric = "json_extract(metrics, '$.' || ?)"
+        elif metric not in METRICS:
+            raise ValueError("unknown metric: {}".format(metric))
+        if size_key is None:
+            size = "spec"
+        else:
+            size = "json_extract(spec, '$.' || ?)"
+            parameters = (size_key,) + parameters
+        parameters += (experiment,)
+
+        query = """
+            WITH runs AS (
+                SELECT * FROM (
+                    SELECT solver, config, {size} AS size, {metric} AS value
+                    FROM results
+                    WHERE experiment = ? AND status = 'ok')
+                WHERE value IS NOT NULL),
+            ranked AS (
+                SELECT *,
+                       ROW_NUMBER() OVER (PARTITION BY solver, config, size
+                                          ORDER BY value) AS rank,
+                       COUNT(*) OVER (PARTITION BY solver, config, size) AS n
+                FROM runs)
+            SELECT solver, config, size, n,
+                   AVG(value) AS mean,
+                   AVG(CASE WHEN rank IN ((n + 1) / 2, (n + 2) / 2)
+                            THEN value END) AS median,
+                   MIN(value) AS min,
+                   MAX(value) AS max
+            FROM ranked
+            GROUP BY solver, config, size
+            ORDER BY solver, config, size
+        """.format(size=size, metric=metric)
+        return [dict(row) for row in
+                self.connection.execute(query, parameters)]
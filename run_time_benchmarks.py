@@ -0,0 +1,383 @@
+import argparse
+import csv
+import functools
+import itertools
+import json
+import sys
+import time
+import numpy as np
+from games import PatrolGame, NormalFormGame, SecurityGame
+from dobbs import Dobbs
+from multipleLP import MultipleLP, Multiple_SingleLP
+from hbgs import HBGS
+from origami import Origami
+from origami_milp import OrigamiMILP
+from eraser import Eraser
+from experiment_scheduler import ExperimentScheduler
+from results_store import ResultsStore
+from memory_profile import (peak_rss, current_rss, traced, top_allocations,
+                            array_bytes, model_bytes)
+
+# game generators, called with the sizes of a grid
+GAMES = {
+    "patrol": lambda **size: PatrolGame(size["m"], size["d"],
+                                        size["num_attacker_types"]),
+    "normal": NormalFormGame,
+    "security": SecurityGame,
+}
+
+# benchmark name: (game, transformation of the game, solver). Benchmarks
+# without a solver time the construction and transformation of games.
+BENCHMARKS = {
+    "PatrolGame": ("patrol", None, None),
+    "NormalFormGame": ("normal", None, None),
+    "SecurityGame": ("security", None, None),
+    "Harsanyi": ("normal",
+                 lambda game: NormalFormGame(game=game),
+                 None),
+    "SecurityGame->NormalFormGame": ("security",
+                                     lambda game: NormalFormGame(
+                                         game=game, harsanyi=False),
+                                     None),
+    "Dobbs": ("normal", None, Dobbs),
+    "MultipleLP": ("normal",
+                   lambda game: NormalFormGame(game=game),
+                   MultipleLP),
+    "Multiple_SingleLP": ("normal", None, Multiple_SingleLP),
+    "HBGS": ("normal", None, HBGS),
+    "HBGS-origami": ("security",
+                     None,
+                     functools.partial(HBGS, origami_for_leaves=True)),
+    "HBGS-security": ("security", None, HBGS),
+    "Multiple_SingleLP-security": ("security", None, Multiple_SingleLP),
+    "Origami": ("security", None, Origami),
+    "OrigamiMILP": ("security", None, OrigamiMILP),
+    "Eraser": ("security", None, Eraser),
+}
+
+# sizes of the games of every benchmark
+GRIDS = {
+    "small": {
+        "patrol": [dict(m=m, d=2, num_attacker_types=a)
+                   for m in (2, 3) for a in (1, 2, 3)],
+        "normal": [dict(num_defender_strategies=5,
+                        num_attacker_strategies=3,
+                        num_attacker_types=l)
+                   for l in (1, 2, 3)],
+        "security": [dict(num_targets=t,
+                          max_coverage=t // 3,
+                          num_attacker_types=l)
+                     for t in (5, 10) for l in (1, 2)],
+    },
+    "large": {
+        "patrol": [dict(m=m, d=2, num_attacker_types=a)
+                   for m in (2, 3, 4) for a in range(1, 8)],
+        "normal": [dict(num_defender_strategies=x,
+                        num_attacker_strategies=q,
+                        num_attacker_types=l)
+                   for x in (10, 20) for q in (3, 5)
+                   for l in range(1, 7)],
+        "security": [dict(num_targets=t,
+                          max_coverage=t // 3,
+                          num_attacker_types=l)
+                     for t in (10, 20, 50) for l in (1, 2, 3, 4)],
+    },
+}
+
+# the benchmarks a large grid would take too long for
+EXPENSIVE = {"MultipleLP": {"num_attacker_types": 4},
+             "Dobbs": {"num_attacker_types": 5},
+             "Multiple_SingleLP-security": {"num_attacker_types": 3}}
+
+
+def run_case(benchmark, size, seed, memory=False):
+    """
+    Generate a game of the given size from seed, transform it and solve it
+    as set by the benchmark. Returns the game construction and
+    transformation times and, for solvers, the wall time of setting up and
+    solving, solution_time, solution_time_with_overhead, the time of every
+    phase of the solver as <phase>_time and the payoff.
+    With memory, also returns in bytes:
+    - baseline_rss_bytes, the resident set size before the game is built,
+    - game_peak_bytes and transformation_peak_bytes, the peaks allocated
+      while building and transforming the game, traced by tracemalloc, with
+      game_allocations and transformation_allocations, the lines of
+      games.py holding the most memory afterwards,
+    - payoff_bytes, the numpy arrays of the game the solver is given,
+    - model_bytes, the PuLP models or sparse MILPs of the solver,
+    - peak_rss_bytes and glpk_peak_rss_bytes, the peak resident set sizes of
+      this process and of its largest GLPK subprocess.
+    tracemalloc slows down the game construction and transformation, so
+    their times are not comparable with runs without memory. The peak
+    resident set sizes cover the lifetime of the process, see
+    run_benchmarks for running every case in a fresh one.
+    """
+    game_name, transformation, solver_class = BENCHMARKS[benchmark]
+    np.random.seed(seed)
+    metrics = {}
+    if memory:
+        metrics["baseline_rss_bytes"] = current_rss()
+
+    start_time = time.perf_counter()
+    if memory:
+        game, metrics["game_peak_bytes"], snapshot = traced(
+            GAMES[game_name], **size)
+        metrics["game_allocations"] = top_allocations(snapshot)
+    else:
+        game = GAMES[game_name](**size)
+    metrics["game_time"] = time.perf_counter() - start_time
+
+    if transformation is not None:
+        start_time = time.perf_counter()
+        if memory:
+            game, metrics["transformation_peak_bytes"], snapshot = traced(
+                transformation, game)
+            metrics["transformation_allocations"] = top_allocations(snapshot)
+        else:
+            game = transformation(game)
+        metrics["transformation_time"] = time.perf_counter() - start_time
+    if memory:
+        metrics["payoff_bytes"] = array_bytes(game)
+
+    if solver_class is not None:
+        start_time = time.perf_counter()
+        solver = solver_class(game)
+        solver.solve()
+        metrics["wall_time"] = time.perf_counter() - start_time
+        metrics["solution_time"] = solver.solution_time
+        metrics["solution_time_with_overhead"] = \
+            solver.solution_time_with_overhead
+        for phase, seconds in solver.phase_times.items():
+            metrics[phase + "_time"] = seconds
+        metrics["opt_defender_payoff"] = float(solver.opt_defender_payoff)
+        if memory:
+            metrics["model_bytes"] = model_bytes(solver)
+
+    if memory:
+        metrics["peak_rss_bytes"], metrics["glpk_peak_rss_bytes"] = \
+            peak_rss()
+    return metrics
+
+
+def summarize(samples):
+    """
+    Median and spread of a list of samples.
+    """
+    samples = np.asarray(samples, dtype=float)
+    q1, median, q3 = np.percentile(samples, [25, 50, 75])
+    return {"median": float(median),
+            "q1": float(q1),
+            "q3": float(q3),
+            "min": float(samples.min()),
+            "max": float(samples.max()),
+            "n": int(samples.size)}
+
+
+def cases(grid, benchmarks=None):
+    """
+    The (benchmark, size) pairs of a grid.
+    """
+    for benchmark in benchmarks or BENCHMARKS:
+        game_name = BENCHMARKS[benchmark][0]
+        limits = EXPENSIVE.get(benchmark, {})
+        for size in GRIDS[grid][game_name]:
+            if all(size.get(key, 0) <= limit
+                   for key, limit in limits.items()):
+                yield (benchmark, size)
+
+
+def run_benchmarks(grid="small", benchmarks=None, repetitions=5, seed=0,
+                   workers=1, timeout=None, store=None, memory=False):
+    """
+    Run every case of a grid repetitions times, on the games generated from
+    seeds seed..seed+repetitions-1, so every case sees the same games.
+    With workers > 1 or a timeout in seconds, the runs are scheduled on an
+    ExperimentScheduler, and runs that time out or fail are counted instead
+    of sampled. Concurrent runs share the machine, so use workers=1 for
+    timings that are compared across machines.
+    With a ResultsStore, runs are recorded in it as they complete and runs
+    already recorded are taken from it, so an interrupted run resumes.
+    With memory, the memory use of every run is measured as in run_case,
+    and every run is made in a fresh worker process so that its peak
+    resident set size is its own.
+    Returns a record with the samples and their summary per case, time
+    and memory metrics are summarized.
+    """
+    jobs = [(benchmark, size, seed + repetition)
+            for benchmark, size in cases(grid, benchmarks)
+            for repetition in range(repetitions)]
+
+    recorded = []
+    if store is not None:
+        for job in list(jobs):
+            outcome = store.get(*_store_key(*job))
+            if outcome is not None:
+                recorded.append((job,) + outcome)
+                jobs.remove(job)
+
+    if workers > 1 or timeout is not None or memory:
+        scheduler = ExperimentScheduler(
+            functools.partial(run_case, memory=memory), workers, timeout,
+            max_jobs_per_worker=1 if memory else None)
+        outcomes = scheduler.run(jobs)
+    else:
+        outcomes = ((job, "ok", run_case(*job)) for job in jobs)
+    if store is not None:
+        outcomes = _record(store, outcomes)
+    outcomes = itertools.chain(recorded, outcomes)
+
+    results = {}
+    for benchmark, size in cases(grid, benchmarks):
+        results[(benchmark, json.dumps(size, sort_keys=True))] = {
+            "benchmark": benchmark,
+            "size": size,
+            "samples": {},
+            "timeouts": 0,
+            "errors": 0}
+
+    for (benchmark, size, _), status, metrics in outcomes:
+        result = results[(benchmark, json.dumps(size, sort_keys=True))]
+        if status == "timeout":
+            result["timeouts"] += 1
+        elif status == "error":
+            result["errors"] += 1
+            print("{} {} failed:\n{}".format(benchmark, size, metrics))
+        else:
+            for metric, value in metrics.items():
+                result["samples"].setdefault(metric, []).append(value)
+
+    for result in results.values():
+        result["summary"] = dict((metric, summarize(values))
+                                 for metric, values in
+                                 result["samples"].items()
+                                 if metric.endswith(("time", "bytes")) and
+                                 None not in values)
+        summary = result["summary"]
+        metric = next((metric for metric in ("wall_time",
+                                             "transformation_time",
+                                             "game_time")
+                       if metric in summary), "-")
+        print("{:<30} {:<70} {:<20} {} timeouts: {} errors: {}".format(
+            result["benchmark"], json.dumps(result["size"], sort_keys=True),
+            metric, "{:.4f}s".format(summary[metric]["median"])
+            if metric in summary else "-",
+            result["timeouts"], result["errors"]))
+    return {"grid": grid, "repetitions": repetitions, "seed": seed,
+            "timeout": timeout, "results": list(results.values())}
+
+
+def _store_key(benchmark, size, seed):
+    """
+    The results store key of a benchmark run.
+    """
+    spec = dict(size, game=BENCHMARKS[benchmark][0])
+    return ("benchmarks", spec, seed, benchmark)
+
+
+def _record(store, outcomes):
+    """
+    Record outcomes in store as they pass.
+    """
+    for job, status, metrics in outcomes:
+        store.record(*_store_key(*job), config=None, status=status,
+                     metrics=metrics if status == "ok" else
+                     {"error": metrics})
+        yield (job, status, metrics)
+
+
+def write_csv(record, path):
+    """
+    Write the summary of every case and metric as a row of a CSV file.
+    """
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["benchmark", "size", "metric",
+                         "median", "q1", "q3", "min", "max", "n"])
+        for result in record["results"]:
+            for metric, summary in sorted(result["summary"].items()):
+                writer.writerow([result["benchmark"],
+                                 json.dumps(result["size"], sort_keys=True),
+                                 metric] +
+                                [summary[key] for key in
+                                 ("median", "q1", "q3", "min", "max", "n")])
+
+
+def compare_to_baseline(record, baseline, tolerance=0.25, min_delta=1e-3):
+    """
+    Compare the medians of a record with those of a baseline record. A case
+    regresses in a metric if its median is more than tolerance times and
+    min_delta above the baseline median, in seconds or bytes. Returns the
+    regressions as dicts.
+    """
+    baseline_summaries = dict(
+        ((result["benchmark"], json.dumps(result["size"], sort_keys=True)),
+         result["summary"])
+        for result in baseline["results"])
+
+    regressions = []
+    for result in record["results"]:
+        key = (result["benchmark"],
+               json.dumps(result["size"], sort_keys=True))
+        if key not in baseline_summaries:
+            continue
+        for metric, summary in result["summary"].items():
+            if metric not in baseline_summaries[key]:
+                continue
+            old = baseline_summaries[key][metric]["median"]
+            new = summary["median"]
+            if new > old * (1 + tolerance) and new - old > min_delta:
+                regressions.append({"benchmark": result["benchmark"],
+                                    "size": result["size"],
+                                    "metric": metric,
+                                    "baseline": old,
+                                    "median": new,
+                                    "ratio": new / old if old else
+                                    float("inf")})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the solvers and game generators.")
+    parser.add_argument("--grid", default="small", choices=sorted(GRIDS))
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS),
+                        help="benchmarks to run, all by default")
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default="benchmarks.json",
+                        help="output file with samples and summaries")
+    parser.add_argument("--csv", default="benchmarks.csv",
+                        help="output file with summaries")
+    parser.add_argument("--baseline",
+                        help="benchmarks.json of an earlier run to "
+                             "compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes")
+    parser.add_argument("--timeout", type=float,
+                        help="cutoff in seconds of a single run")
+    parser.add_argument("--store",
+                        help="SQLite results store to record runs in and "
+                             "resume from")
+    parser.add_argument("--memory", action="store_true",
+                        help="measure peak memory and allocations, every "
+                             "run in a fresh process")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.store) if args.store else None
+    record = run_benchmarks(args.grid, args.benchmarks, args.repetitions,
+                            args.seed, args.workers, args.timeout, store,
+                            args.memory)
+    with open(args.json, "w") as f:
+        json.dump(record, f, indent=2)
+    write_csv(record, args.csv)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(record, baseline, args.tolerance)
+        for regression in regressions:
+            print("REGRESSION {benchmark} {size} {metric}: "
+                  "{baseline:.4f} -> {median:.4f}".format(**regression))
+        if regressions:
+            sys.exit(1)
@@ -1,8 +1,45 @@
+import argparse
+import functools
+import os
 import numpy as np
 from games import PatrolGame, NormalFormGame
 from multipleLP import Multiple_SingleLP, MultipleLP
 from dobbs import Dobbs
-import multiprocessing as mp
+from experiment_scheduler import ExperimentScheduler
+from results_store import ResultsStore
+from memory_profile import peak_rss, array_bytes, model_bytes
+
+
+def solve_patrol_game(sol_num, num_houses, patrol_size, num_types, seed,
+                      memory=False):
+    """
+    Generate the patrol game of seed and solve it with solver sol_num:
+    0 for dobbs, 1 for multiple single LPs, 2 for multipleLP on the
+    harsanyi transformed game. Returns the solution time with and without
+    overhead and the memory use in bytes of the payoff arrays of the game
+    the solver is given and of the models of the solver. With memory, also
+    the peak resident set size of the process and of its largest GLPK
+    subprocess, which are those of this solve only if it runs in a fresh
+    scheduler worker. Only the seed is sent over to the worker.
+    """
+    np.random.seed(seed)
+    game = PatrolGame(num_houses, patrol_size, num_types)
+    if sol_num == 0:
+        solver = Dobbs(game)
+    elif sol_num == 1:
+        solver = Multiple_SingleLP(game)
+    else:
+        game = NormalFormGame(game=game, harsanyi=True)
+        solver = MultipleLP(game)
+    solver.solve()
+    metrics = {"solution_time": solver.solution_time,
+               "solution_time_with_overhead":
+               solver.solution_time_with_overhead,
+               "payoff_bytes": array_bytes(game),
+               "model_bytes": model_bytes(solver)}
+    if memory:
+        metrics["peak_rss_bytes"], metrics["glpk_peak_rss_bytes"] = peak_rss()
+    return metrics
 
 
 class Run_time_experiments:
@@ -10,82 +47,87 @@ class Run_time_experiments:
     MAX_NUM_TYPES = 7
     PATROL_SIZE = 2
     NUM_REPETITIONS = 5
+    NUM_WORKERS = os.cpu_count()
+
+    # every solve is recorded in this store as soon as it is done
+    EXPERIMENT = "run_time_experiment_1"
+    SOLVER_NAMES = ["dobbs", "multiple_single_lp", "multiple_lp"]
+    results_path = "run_time_experiments.sqlite"
 
     run_times = np.zeros((3, MAX_NUM_TYPES, NUM_REPETITIONS))
     run_times_overheads = np.zeros((3, MAX_NUM_TYPES, NUM_REPETITIONS))
+    peak_rss = np.zeros((3, MAX_NUM_TYPES, NUM_REPETITIONS))
 
-    temp_solve_time = 0
-    temp_solve_time_overhead = 0
-
-    def solve(self, solver, sol_time, sol_time_oh):
-        """
-        The solver process
-        """
-        solver.solve()
-        sol_time.value = solver.solution_time
-        sol_time_oh.value = solver.solution_time_with_overhead
-
-    def handler(self, solver):
+    def run_experiment(self, num_houses, memory=False):
         """
-        Handles the solver process.
-        Will terminate solver process if it doesn't terminate
-        before the cutoff time has elapsed
+        Solve every game with every solver on a pool of NUM_WORKERS
+        processes. The three solvers get the same game for a given number
+        of types and run, and solves that don't terminate before the cutoff
+        time are recorded as -1. Solves already in the results store, e.g.
+        from an interrupted run, are not repeated. With memory, every solve
+        runs in a fresh process, so its peak memory is measured on its own;
+        otherwise the workers are reused and solves have a peak of -1, as
+        do solves recorded without it.
         """
-        sol_time = mp.Value('d', -1.0)
-        sol_time_oh = mp.Value('d', -1.0)
-        p = mp.Process(target=self.solve, args=(solver,
-                                                    sol_time,
-                                                    sol_time_oh))
-        p.start()
-        p.join(self.cutoff_time)
-        if p.is_alive():
-            # terminate the process
-            print("cut off!")
-            p.terminate()
-            p.join()
-            return None
-        else:
-            return (sol_time.value, sol_time_oh.value)
-
-    def get_run_times(self, solver, sol_num, num_types, run_num):
-        times = self.handler(solver)
-        if times:
-            # if experiment terminated in time, record solutions times
-            self.run_times[sol_num, num_types-1, run_num] = times[0]
-            self.run_times_overheads[sol_num, num_types-1, run_num] = times[1]
-        else:
-            # experiment didn't finish before cutoff time
-            self.run_times[sol_num, num_types-1, run_num] = -1
-            self.run_times_overheads[sol_num, num_types-1, run_num] = -1
-
-    def run_experiment(self, num_houses):
         self.run_times = np.zeros((3, self.MAX_NUM_TYPES, self.NUM_REPETITIONS))
         self.run_times_overheads = np.zeros((3, self.MAX_NUM_TYPES, self.NUM_REPETITIONS))
+        self.peak_rss = np.zeros((3, self.MAX_NUM_TYPES, self.NUM_REPETITIONS))
+        store = ResultsStore(self.results_path)
+
+        # store key and (solver, num_types, run) of every job
+        jobs = {}
         for run_num in range(self.NUM_REPETITIONS):
-            print("run: {}".format(run_num))
             for num_types in range(1, self.MAX_NUM_TYPES+1):
-                print("num types: {}".format(num_types))
-                # create numpy array to hold runtimes
-                # create game
-                game = PatrolGame(num_houses, self.PATROL_SIZE, num_types)
-                game_harsanyi = NormalFormGame(game=game, harsanyi=True)
-
-                # init solvers
-                dob = Dobbs(game)
-                bMlp = Multiple_SingleLP(game)
-                mlp = MultipleLP(game_harsanyi)
-
-                # get run times
-                print("dob")
-                self.get_run_times(dob, 0, num_types, run_num)
-                print("bmlp")
-                self.get_run_times(bMlp, 1, num_types, run_num)
-                print("mlp")
-                self.get_run_times(mlp, 2, num_types, run_num)
-                print(self.run_times[:,:,run_num])
+                seed = (num_houses * self.NUM_REPETITIONS + run_num) * \
+                    self.MAX_NUM_TYPES + num_types
+                spec = dict(game="patrol",
+                            m=num_houses,
+                            d=self.PATROL_SIZE,
+                            num_attacker_types=num_types)
+                for sol_num in range(3):
+                    key = (self.EXPERIMENT, spec, seed,
+                           self.SOLVER_NAMES[sol_num])
+                    jobs[(sol_num, num_houses, self.PATROL_SIZE, num_types,
+                          seed)] = (key, (sol_num, num_types, run_num))
+
+        scheduler = ExperimentScheduler(
+            functools.partial(solve_patrol_game, memory=memory),
+            self.NUM_WORKERS,
+            self.cutoff_time,
+            max_jobs_per_worker=1 if memory else None)
+        pending = [job for job, (key, _) in jobs.items()
+                   if not store.is_recorded(*key)]
+        for job, status, metrics in scheduler.run(pending):
+            key, (sol_num, num_types, run_num) = jobs[job]
+            print("solver: {}, num types: {}, run: {}, {}".format(
+                sol_num, num_types, run_num, status))
+            if status != "ok":
+                if status == "error":
+                    print(metrics)
+                metrics = {"error": metrics}
+            store.record(*key, config=None, status=status, metrics=metrics)
+
+        for key, (sol_num, num_types, run_num) in jobs.values():
+            status, metrics = store.get(*key)
+            if status == "ok":
+                # if experiment terminated in time, record solutions times
+                self.run_times[sol_num, num_types-1, run_num] = \
+                    metrics["solution_time"]
+                self.run_times_overheads[sol_num, num_types-1, run_num] = \
+                    metrics["solution_time_with_overhead"]
+                self.peak_rss[sol_num, num_types-1, run_num] = \
+                    metrics.get("peak_rss_bytes") or -1
+            else:
+                # experiment didn't finish before cutoff time
+                self.run_times[sol_num, num_types-1, run_num] = -1
+                self.run_times_overheads[sol_num, num_types-1, run_num] = -1
+                self.peak_rss[sol_num, num_types-1, run_num] = -1
+        store.close()
 
         self.average_run_times = np.average(self.run_times, axis=2)
         self.average_run_times_overhead = np.average(self.run_times_overheads, axis=2)
+        # peak memory in MB, next to the solution times
+        self.average_peak_rss = np.average(self.peak_rss, axis=2) / 2**20
 
         print("==== average ===== ")
         print(self.average_run_times)
@@ -96,16 +138,26 @@ class Run_time_experiments:
         np.savetxt("solution_times_overhead_houses_{}".format(num_houses),
                 self.average_run_times_overhead,
                    fmt='%1.4f')
+        np.savetxt("peak_rss_mb_houses_{}".format(num_houses),
+                self.average_peak_rss,
+                   fmt='%1.4f')
 
-# 2 houses
-c = Run_time_experiments()
-c.run_experiment(2)
-
-# 3 houses
-c = Run_time_experiments()
-c.run_experiment(3)
-
-# 4 houses
-c = Run_time_experiments()
-c.run_experiment(4)
-
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time the solvers on patrol games of 2 to 4 houses.")
+    parser.add_argument("--memory", action="store_true",
+                        help="measure the peak memory of every solve, "
+                             "starting a fresh process per solve")
+    args = parser.parse_args()
+
+    # 2 houses
+    c = Run_time_experiments()
+    c.run_experiment(2, args.memory)
+
+    # 3 houses
+    c = Run_time_experiments()
+    c.run_experiment(3, args.memory)
+
+    # 4 houses
+    c = Run_time_experiments()
+    c.run_experiment(4, args.memory)
@@ -0,0 +1,45 @@
+import subprocess
+import sys
+import numpy as np
+
+# every solver module and the modules built on them, imported in a fresh
+# interpreter each time
+MODULES = ["games", "origami", "eraser", "origami_milp", "dobbs",
+           "multipleLP", "hbgs", "milp_builders", "solver_backends",
+           "phase_timer", "solution_cache", "solver_selection", "batch_solve",
+           "experiment_scheduler", "results_store", "memory_profile",
+           "profiling"]
+NUM_REPETITIONS = 10
+
+# prints the import time in seconds and whether the solver backend
+# was loaded by the import.
+IMPORT_SCRIPT = """
+import sys, time
+start_time = time.perf_counter()
+import {module}
+print(time.perf_counter() - start_time, "pulp" in sys.modules)
+"""
+
+
+def import_time(module):
+    """
+    Import module in a new interpreter and return the import time and
+    whether pulp was imported along with it.
+    """
+    output = subprocess.check_output(
+        [sys.executable, "-c", IMPORT_SCRIPT.format(module=module)],
+        universal_newlines=True)
+    seconds, pulp_loaded = output.split()
+    return (float(seconds), pulp_loaded == "True")
+
+
+if __name__ == "__main__":
+    # the i, j entry is the import time of module i in repetition j
+    import_times = np.zeros((len(MODULES), NUM_REPETITIONS))
+    for i, module in enumerate(MODULES):
+        for j in range(NUM_REPETITIONS):
+            import_times[i, j], pulp_loaded = import_time(module)
+        print("{:<14} median: {:.4f}s  pulp loaded: {}".format(
+            module, np.median(import_times[i]), pulp_loaded))
+
+    np.savetxt("import_times.txt", import_times, fmt='%1.6f')
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# the arrays a game is identified by, those missing from a representation
+# are skipped
+KEY_ARRAYS = ("defender_payoffs",
+              "attacker_payoffs",
+              "defender_covered",
+              "defender_uncovered",
+              "attacker_covered",
+              "attacker_uncovered",
+              "attacker_type_probability")
+
+
+def game_key(game, **config):
+    """
+    A stable hash of a game and the configuration of a solver, as a hex
+    string: the sha256 of the type of the game, its payoff arrays and type
+    probabilities as float64, its max_coverage and config, which is dumped
+    to JSON. Equal games get equal keys across processes and runs.
+    """
+    digest = hashlib.sha256(game.type.encode())
+    for name in KEY_ARRAYS:
+        value = getattr(game, name, None)
+        if value is None:
+            continue
+        array = np.ascontiguousarray(value, dtype=np.float64)
+        digest.update(name.encode())
+        digest.update(repr(array.shape).encode())
+        digest.update(array.tobytes())
+    return derive_key(digest.hexdigest(),
+                      max_coverage=getattr(game, "max_coverage", None),
+                      **config)
+
+
+def derive_key(key, **config):
+    """
+    The key of config within the game of key, e.g. of one LP of a game,
+    without hashing the game again.
+    """
+    digest = hashlib.sha256(key.encode())
+    digest.update(json.dumps(config, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def lp_key(key, pure_strat):
+    """
+    The key of the SingleLP of pure_strat in a game of key, see
+    game_key(game, lp="SingleLP"). HBGS and Multiple_SingleLP share these
+    keys, so either reuses the LPs solved by the other.
+    """
+    return derive_key(key, pure_strat=[int(j) for j in pure_strat])
+
+
+class SolutionCache:
+    """
+    Solutions by key, see game_key, in an in-memory LRU of at most max_bytes
+    and, if directory is given, on disk. Values are pickled, so a cached
+    value is a copy that callers may change, and its size is that of its
+    pickle. The least recently used values are evicted from memory once
+    max_bytes is exceeded, values larger than max_bytes are only kept on
+    disk. The disk tier is one file per key and is never evicted, values
+    read from it are moved into memory. Files are written atomically, so
+    processes may share a directory. Pickling a cache, e.g. into a worker
+    process, copies its settings and not its values: processes only share
+    the disk tier.
+    """
+    def __init__(self, max_bytes=64 * 2 ** 20, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getstate__(self):
+        return {"max_bytes": self.max_bytes, "directory": self.directory}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, key, default=None):
+        """
+        The value of key, from memory or else from disk, default if it is
+        in neither.
+        """
+        with self._lock:
+            data = self._values.get(key)
+            if data is not None:
+                self._values.move_to_end(key)
+                self.hits += 1
+                return pickle.loads(data)
+
+        data = self._read(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return default
+            self.disk_hits += 1
+            self._remember(key, data)
+        return pickle.loads(data)
+
+    def put(self, key, value):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._remember(key, data)
+        self._write(key, data)
+
+    def clear(self):
+        """
+        Drop the values held in memory, the disk tier is left as it is.
+        """
+        with self._lock:
+            self._values.clear()
+            self.bytes = 0
+
+    def stats(self):
+        return {"entries": len(self._values),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions}
+
+    def _remember(self, key, data):
+        if key in self._values:
+            self.bytes -= len(self._values.pop(key))
+        if len(data) > self.max_bytes:
+            return
+        self._values[key] = data
+        self.bytes += len(data)
+        while self.bytes > self.max_bytes:
+            _, evicted = self._values.popitem(last=False)
+            self.bytes -= len(evicted)
+            self.evictions += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".pickle")
+
+    def _read(self, key):
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key, data):
+        if self.directory is None:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
@@ -0,0 +1,26 @@
+"""
+Solver backends are imported on first use rather than when a solver module
+is imported, so that importing the solvers is cheap and has no side effects.
+"""
+import importlib
+
+
+class LazyModule:
+    """
+    Stands in for a module and imports it the first time one of its
+    attributes is looked up.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def is_loaded(self):
+        return self._module is not None
+
+
+pulp = LazyModule("pulp")
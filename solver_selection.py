@@ -0,0 +1,385 @@
+import argparse
+import json
+import math
+import os
+import time
+import numpy as np
+from games import NormalFormGame
+from run_time_benchmarks import BENCHMARKS
+from solution_cache import game_key
+
+# cost model calibrated from benchmark runs, see CostModel.fit
+DEFAULT_COSTS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "solver_costs.json")
+
+# the solvers that may solve a game of the given type, mapped to their
+# benchmark in run_time_benchmarks.BENCHMARKS, whose game is the
+# representation the solver works on. HBGS and Multiple_SingleLP solve
+# security games as given, Dobbs and MultipleLP on their normal form.
+CANDIDATES = {
+    "normal": {"Dobbs": "Dobbs",
+               "MultipleLP": "MultipleLP",
+               "Multiple_SingleLP": "Multiple_SingleLP",
+               "HBGS": "HBGS"},
+    "compact": {"Origami": "Origami",
+                "OrigamiMILP": "OrigamiMILP",
+                "Eraser": "Eraser",
+                "Dobbs": "Dobbs",
+                "MultipleLP": "MultipleLP",
+                "Multiple_SingleLP": "Multiple_SingleLP-security",
+                "HBGS": "HBGS-security"},
+}
+
+# solvers that are not exact on bayesian games, and so are never chosen by
+# select_solver: HBGS with origami leaves keeps only the strategies of the
+# origami attack sets. solve runs them when they are named.
+HEURISTIC = {
+    "normal": {},
+    "compact": {"HBGS-origami": "HBGS-origami"},
+}
+
+# solvers that only solve games with a single attacker type
+SINGLE_TYPE = ("Origami", "OrigamiMILP", "Eraser")
+
+# the benchmark timing the transformation of a security game into its
+# normal form
+NORMAL_FORM = "SecurityGame->NormalFormGame"
+
+
+class Solution:
+    """
+    The solution of a game by any solver, see solve:
+    - solver: the name of the solver, as in CANDIDATES,
+    - game: the game the solver solved, the given game or its normal form
+      or harsanyi transformation, None for solutions taken from a cache,
+    - opt_defender_payoff,
+    - opt_defender_mixed_strategy: a distribution over the defender
+      strategies of game, or the coverage of every target if game is a
+      security game,
+    - opt_attacker_pure_strategy: the target or strategy every attacker
+      type of the given game responds with, as a tuple,
+    - solution_time, solution_time_with_overhead, phase_times: as reported
+      by the solver, the transformations of the game are timed in
+      phase_times["game_transform"], for cached solutions those of the
+      solve that was cached,
+    - predicted_time: the time predicted by the cost model, None if the
+      solver was chosen without it.
+    """
+    __slots__ = ("solver",
+                 "game",
+                 "opt_defender_payoff",
+                 "opt_defender_mixed_strategy",
+                 "opt_attacker_pure_strategy",
+                 "solution_time",
+                 "solution_time_with_overhead",
+                 "phase_times",
+                 "predicted_time")
+
+    def __init__(self, **kwargs):
+        for name in self.__slots__:
+            setattr(self, name, kwargs.get(name))
+
+    def __repr__(self):
+        return "Solution(solver={!r}, opt_defender_payoff={!r}, " \
+               "opt_attacker_pure_strategy={!r})".format(
+                   self.solver, self.opt_defender_payoff,
+                   self.opt_attacker_pure_strategy)
+
+
+def dimensions(game, normal_form=False):
+    """
+    The number of defender strategies, attacker strategies and attacker
+    types of a game. A security game has one defender strategy per target,
+    its coverage, or with normal_form as many as its normal form, one per
+    set of max_coverage targets.
+    """
+    if game.type == "compact":
+        return _security_dimensions(game.num_targets, game.max_coverage,
+                                    game.num_attacker_types, normal_form)
+    return (game.num_defender_strategies,
+            game.num_attacker_strategies,
+            game.num_attacker_types)
+
+
+def _security_dimensions(num_targets, max_coverage, num_attacker_types,
+                         normal_form):
+    if normal_form:
+        return (math.comb(num_targets, max_coverage),
+                num_targets,
+                num_attacker_types)
+    return (num_targets, num_targets, num_attacker_types)
+
+
+def _size_dimensions(game_name, size, normal_form=False):
+    """
+    The dimensions of the games a benchmark generates of the given size.
+    """
+    if game_name == "security":
+        return _security_dimensions(size["num_targets"],
+                                    size["max_coverage"],
+                                    size["num_attacker_types"],
+                                    normal_form)
+    if game_name == "normal":
+        return (size["num_defender_strategies"],
+                size["num_attacker_strategies"],
+                size["num_attacker_types"])
+    return None
+
+
+def _features(dimensions):
+    x, q, l = dimensions
+    return np.array([1.0, math.log(x), math.log(q), l, l * math.log(q)])
+
+
+class CostModel:
+    """
+    Predicts the wall time of every benchmark of run_time_benchmarks on a
+    game from its dimensions: log(time) is linear in log(x), log(q), l and
+    l * log(q), for x defender strategies, q attacker strategies and l
+    attacker types, the last term standing for the q^l attacker pure
+    strategies. coefficients maps benchmark names to the 5 coefficients.
+    """
+    def __init__(self, coefficients=None):
+        self.coefficients = dict(coefficients or {})
+
+    @classmethod
+    def fit(cls, records, ridge=1e-2):
+        """
+        Fit the model to benchmark records of run_time_benchmarks. The time
+        of a case is the median wall time of its solver plus that of the
+        transformation of its game, or only the latter for benchmarks of
+        transformations. Cases that timed out count with the timeout of
+        their run, as a lower bound. A small ridge penalty keeps the fit
+        determined when a benchmark was run on few sizes. The
+        transformation of security games into their normal form is fitted
+        to the dimensions of the normal form, the solvers of security games
+        to those of the security game.
+        """
+        samples = {}
+        for record in records:
+            for result in record["results"]:
+                benchmark = result["benchmark"]
+                game_name, transformation, solver_class = \
+                    BENCHMARKS[benchmark]
+                dims = _size_dimensions(game_name, result["size"],
+                                        normal_form=benchmark == NORMAL_FORM)
+                if dims is None or (transformation is None and
+                                    solver_class is None):
+                    continue
+                summary = result["summary"]
+                timed = "wall_time" if solver_class is not None \
+                    else "transformation_time"
+                if timed in summary:
+                    seconds = sum(summary[metric]["median"]
+                                  for metric in ("wall_time",
+                                                 "transformation_time")
+                                  if metric in summary)
+                elif result["timeouts"] and record.get("timeout"):
+                    seconds = record["timeout"]
+                else:
+                    continue
+                samples.setdefault(benchmark, []).append(
+                    (_features(dims), math.log(max(seconds, 1e-6))))
+
+        coefficients = {}
+        for benchmark, pairs in samples.items():
+            features = np.array([pair[0] for pair in pairs])
+            times = np.array([pair[1] for pair in pairs])
+            # the intercept is not penalized
+            penalty = ridge * np.eye(features.shape[1])
+            penalty[0, 0] = 0
+            coefficients[benchmark] = list(np.linalg.solve(
+                features.T @ features + penalty, features.T @ times))
+        return cls(coefficients)
+
+    @classmethod
+    def load(cls, path=DEFAULT_COSTS):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def save(self, path=DEFAULT_COSTS):
+        with open(path, "w") as f:
+            json.dump(self.coefficients, f, indent=2)
+
+    def predict(self, benchmark, dims):
+        """
+        The predicted seconds of a benchmark on a game of dimensions dims,
+        None if the benchmark is not calibrated.
+        """
+        if benchmark not in self.coefficients:
+            return None
+        return math.exp(float(_features(dims) @
+                              np.asarray(self.coefficients[benchmark])))
+
+
+def default_cost_model():
+    """
+    The cost model of DEFAULT_COSTS, an empty one if there is none.
+    """
+    if os.path.exists(DEFAULT_COSTS):
+        return CostModel.load(DEFAULT_COSTS)
+    return CostModel()
+
+
+def select_solver(game, cost_model=None):
+    """
+    Choose the solver with the least predicted time for a game, among the
+    candidates for its type. Returns the name of the solver and its
+    predicted time, from the benchmark of the solver on the representation
+    it solves. Solvers that solve security games on their normal form are
+    charged its transformation. Without any calibrated candidate: Origami
+    for single-type security games, HBGS for three or more attacker types
+    and DOBBS otherwise, with time None. HEURISTIC solvers are never
+    chosen.
+    """
+    if cost_model is None:
+        cost_model = default_cost_model()
+
+    best = (None, None)
+    for solver, benchmark in CANDIDATES[game.type].items():
+        if solver in SINGLE_TYPE and game.num_attacker_types > 1:
+            continue
+        normal_form = game.type == "compact" and \
+            BENCHMARKS[benchmark][0] == "normal"
+        dims = dimensions(game, normal_form)
+        seconds = cost_model.predict(benchmark, dims)
+        if seconds is None:
+            continue
+        if normal_form:
+            transformation = cost_model.predict(NORMAL_FORM, dims)
+            if transformation is None:
+                continue
+            seconds += transformation
+        if best[1] is None or seconds < best[1]:
+            best = (solver, seconds)
+    if best[0] is not None:
+        return best
+
+    if game.type == "compact" and game.num_attacker_types == 1:
+        return ("Origami", None)
+    if game.num_attacker_types >= 3:
+        return ("HBGS", None)
+    return ("Dobbs", None)
+
+
+def solve(game, solver=None, cost_model=None, cache=None, **options):
+    """
+    Solve a normal form or security game and return a Solution. The solver
+    is one of CANDIDATES or HEURISTIC, by default the one select_solver
+    predicts to be the fastest, and is created with options, e.g. approx
+    for HBGS. The game is transformed into the representation of the
+    benchmark of the solver, security games into their normal form only for
+    the solvers that need it.
+    With a SolutionCache, a solution of the same game by the same solver and
+    options is taken from the cache, and new solutions are added to it.
+    """
+    predicted_time = None
+    if solver is None:
+        solver, predicted_time = select_solver(game, cost_model)
+    benchmark = CANDIDATES[game.type].get(solver,
+                                          HEURISTIC[game.type].get(solver))
+    if benchmark is None:
+        raise ValueError("{} does not solve {} games".format(solver,
+                                                             game.type))
+    if solver in SINGLE_TYPE and game.num_attacker_types > 1:
+        raise ValueError("{} solves single type games only".format(solver))
+    game_name, transformation, solver_class = BENCHMARKS[benchmark]
+
+    if cache is not None:
+        key = game_key(game, solver=solver, benchmark=benchmark,
+                       options=options)
+        fields = cache.get(key)
+        if fields is not None:
+            return Solution(**fields)
+
+    start_time = time.perf_counter()
+    solver_game = game
+    if game.type == "compact" and game_name == "normal":
+        solver_game = NormalFormGame(game=solver_game, harsanyi=False)
+    if transformation is not None:
+        solver_game = transformation(solver_game)
+    transform_time = time.perf_counter() - start_time
+
+    instance = solver_class(solver_game, **options)
+    instance.solve()
+
+    phase_times = dict(instance.phase_times)
+    phase_times["game_transform"] += transform_time
+    mixed_strategy = instance.opt_defender_mixed_strategy \
+        if hasattr(instance, "opt_defender_mixed_strategy") \
+        else instance.opt_coverage
+    solution = Solution(solver=solver,
+                        game=solver_game,
+                        opt_defender_payoff=float(instance.opt_defender_payoff),
+                        opt_defender_mixed_strategy=np.asarray(
+                            mixed_strategy, dtype=float),
+                        opt_attacker_pure_strategy=_attacker_pure_strategy(
+                            instance, solver_game),
+                        solution_time=instance.solution_time,
+                        solution_time_with_overhead=transform_time +
+                        instance.solution_time_with_overhead,
+                        phase_times=phase_times,
+                        predicted_time=predicted_time)
+    if cache is not None:
+        cache.put(key, dict((name, getattr(solution, name))
+                            for name in Solution.__slots__
+                            if name != "game"))
+    return solution
+
+
+def _attacker_pure_strategy(instance, solver_game):
+    """
+    The response of every attacker type, from the solver where it reports
+    one, and otherwise the best responses to the defender strategy.
+    """
+    if hasattr(instance, "opt_attacked_target"):
+        return (int(instance.opt_attacked_target),)
+    if isinstance(instance.__dict__.get("opt_attacker_pure_strategy"),
+                  tuple):
+        return tuple(int(j) for j in instance.opt_attacker_pure_strategy)
+    if hasattr(solver_game, "attacker_pure_strategy_tuples"):
+        # MultipleLP on the harsanyi transformed game
+        return tuple(int(j) for j in solver_game.attacker_pure_strategy_tuples[
+            instance.opt_attacker_pure_strategy])
+    return best_responses(solver_game, instance.opt_defender_mixed_strategy)
+
+
+def best_responses(game, mixed_strategy, tolerance=1e-6):
+    """
+    The best response of every attacker type to a defender mixed strategy,
+    or coverage for security games, ties broken in favor of the defender.
+    """
+    mixed_strategy = np.asarray(mixed_strategy, dtype=float)
+    if game.type == "compact":
+        coverage = mixed_strategy[:, None]
+        attacker = coverage * game.attacker_covered + \
+            (1 - coverage) * game.attacker_uncovered
+        defender = coverage * game.defender_covered + \
+            (1 - coverage) * game.defender_uncovered
+    else:
+        attacker = np.einsum("i,ijl->jl", mixed_strategy,
+                             game.attacker_payoffs)
+        defender = np.einsum("i,ijl->jl", mixed_strategy,
+                             game.defender_payoffs)
+    best = attacker >= attacker.max(axis=0) - tolerance
+    return tuple(int(j) for j in
+                 np.where(best, defender, -np.inf).argmax(axis=0))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Calibrate the solver cost model from benchmark runs.")
+    parser.add_argument("records", nargs="+",
+                        help="benchmarks.json files of run_time_benchmarks")
+    parser.add_argument("--output", default=DEFAULT_COSTS)
+    args = parser.parse_args()
+
+    records = []
+    for path in args.records:
+        with open(path) as f:
+            records.append(json.load(f))
+    cost_model = CostModel.fit(records)
+    cost_model.save(args.output)
+    for benchmark, coefficients in sorted(cost_model.coefficients.items()):
+        print("{:<30} {}".format(benchmark, " ".join(
+            "{:8.3f}".format(c) for c in coefficients)))
@@ -0,0 +1,86 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from games import SecurityGame, NormalFormGame
+from batch_solve import save_game, load_game, run_batch
+from solver_selection import solve
+
+
+class TestBatchSolve(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_save_and_load(self):
+        """
+        Test that saved games are loaded with the same payoffs.
+        """
+        for game in (SecurityGame(num_targets=5, max_coverage=2,
+                                  num_attacker_types=2),
+                     NormalFormGame(num_defender_strategies=4,
+                                    num_attacker_strategies=3,
+                                    num_attacker_types=2)):
+            path = os.path.join(self.directory.name, game.type + ".npz")
+            save_game(path, game)
+            loaded = load_game(path)
+            self.assertEqual(loaded.type, game.type)
+            self.assertEqual(loaded.num_attacker_types, 2)
+            if game.type == "compact":
+                self.assertEqual(loaded.max_coverage, 2)
+                np.testing.assert_array_equal(loaded.attacker_covered,
+                                              game.attacker_covered)
+            else:
+                np.testing.assert_array_equal(loaded.defender_payoffs,
+                                              game.defender_payoffs)
+
+    def test_run_batch(self):
+        """
+        Test that every game of the stream gets one result line, in a pool
+        and in this process, and that bad lines are reported as errors.
+        """
+        game = SecurityGame(num_targets=5, max_coverage=2,
+                            num_attacker_types=1)
+        npz_path = os.path.join(self.directory.name, "game.npz")
+        save_game(npz_path, game)
+        specs = [{"id": "generated",
+                  "game": "normal",
+                  "size": {"num_defender_strategies": 4,
+                           "num_attacker_strategies": 3,
+                           "num_attacker_types": 2},
+                  "seed": 1,
+                  "solver": "HBGS"},
+                 {"npz": npz_path, "solver": "Origami"},
+                 {"type": "normal",
+                  "defender_payoffs": [[[1], [0]], [[0], [1]]],
+                  "attacker_payoffs": [[[0], [1]], [[1], [0]]],
+                  "solver": "Dobbs"}]
+        jsonl_path = os.path.join(self.directory.name, "games.jsonl")
+        with open(jsonl_path, "w") as f:
+            for spec in specs:
+                f.write(json.dumps(spec) + "\n")
+            f.write("not json\n")
+
+        for workers in (1, 2):
+            output = io.StringIO()
+            report = run_batch([jsonl_path], output, workers=workers)
+            records = dict((record["source"], record) for record in
+                           map(json.loads, output.getvalue().splitlines()))
+            self.assertEqual(len(records), 4)
+            self.assertEqual((report["games"], report["ok"],
+                              report["error"]), (4, 3, 1))
+            self.assertEqual(records[jsonl_path + ":1"]["id"], "generated")
+            self.assertEqual(records[jsonl_path + ":4"]["status"], "error")
+            self.assertAlmostEqual(
+                records[jsonl_path + ":2"]["opt_defender_payoff"],
+                solve(game, solver="Origami").opt_defender_payoff)
+            self.assertAlmostEqual(
+                records[jsonl_path + ":3"]["opt_defender_payoff"], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
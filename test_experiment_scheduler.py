@@ -0,0 +1,52 @@
+import os
+import time
+import unittest
+from experiment_scheduler import ExperimentScheduler
+
+
+def sleep_and_return(seconds, value):
+    time.sleep(seconds)
+    if value is None:
+        raise ValueError("no value")
+    return (value, os.getpid())
+
+
+class TestExperimentScheduler(unittest.TestCase):
+    def test_results_timeouts_and_errors(self):
+        """
+        Test that every job is reported once, with its result, a timeout
+        or an error, and that only timed out workers are replaced.
+        """
+        jobs = [(10, 2), (0.5, 1), (0.5, None), (0.5, 4), (0.5, 5)]
+        scheduler = ExperimentScheduler(sleep_and_return, workers=2,
+                                        timeout=1)
+        start_time = time.time()
+        outcomes = dict((job, (status, result))
+                        for job, status, result in scheduler.run(jobs))
+
+        self.assertLess(time.time() - start_time, 5)
+        self.assertEqual(set(outcomes), set(jobs))
+        self.assertEqual(outcomes[(10, 2)], ("timeout", None))
+        self.assertEqual(outcomes[(0.5, None)][0], "error")
+        self.assertIn("ValueError", outcomes[(0.5, None)][1])
+        for job in [(0.5, 1), (0.5, 4), (0.5, 5)]:
+            self.assertEqual(outcomes[job][0], "ok")
+            self.assertEqual(outcomes[job][1][0], job[1])
+        # the timed out worker is replaced as jobs are still pending
+        self.assertEqual(scheduler.num_spawned, 3)
+
+    def test_worker_recycling(self):
+        """
+        Test that workers are replaced after max_jobs_per_worker jobs.
+        """
+        jobs = [(0, i) for i in range(6)]
+        scheduler = ExperimentScheduler(sleep_and_return, workers=2,
+                                        max_jobs_per_worker=2)
+        pids = set(result[1] for _, status, result in scheduler.run(jobs))
+        # two workers for the first four jobs, two more for the last two
+        self.assertEqual(scheduler.num_spawned, 4)
+        self.assertEqual(len(pids), 4)
+
+
+if __name__ == '__main__':
+        unittest.main()
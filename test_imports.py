@@ -0,0 +1,17 @@
+import unittest
+from run_time_imports import MODULES, import_time
+
+
+class TestImports(unittest.TestCase):
+    def test_imports_have_no_side_effects(self):
+        """
+        Test that importing a solver module neither loads pulp nor runs
+        any experiment.
+        """
+        for module in MODULES:
+            seconds, pulp_loaded = import_time(module)
+            self.assertFalse(pulp_loaded,
+                             msg="importing {} loads pulp".format(module))
+
+if __name__ == '__main__':
+        unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from games import NormalFormGame, SecurityGame
+from dobbs import Dobbs
+from multipleLP import Multiple_SingleLP
+from eraser import Eraser
+from memory_profile import (peak_rss, traced, top_allocations, array_bytes,
+                            model_bytes)
+
+
+class TestMemoryProfile(unittest.TestCase):
+    def test_game_and_model_sizes(self):
+        """
+        Test that the payoff arrays of a game are counted and traced in
+        games.py, and that model sizes grow with the game.
+        """
+        game, peak, snapshot = traced(NormalFormGame,
+                                      num_defender_strategies=50,
+                                      num_attacker_strategies=40,
+                                      num_attacker_types=3)
+        self.assertEqual(array_bytes(game),
+                         game.attacker_payoffs.nbytes +
+                         game.defender_payoffs.nbytes +
+                         game.attacker_type_probability.nbytes)
+        self.assertGreaterEqual(peak, array_bytes(game))
+        allocations = top_allocations(snapshot)
+        self.assertTrue(allocations[0][0].startswith("games.py:"))
+        self.assertGreaterEqual(sum(size for _, size in allocations),
+                                game.defender_payoffs.nbytes)
+
+        small = NormalFormGame(num_defender_strategies=3,
+                               num_attacker_strategies=2,
+                               num_attacker_types=2)
+        large = NormalFormGame(num_defender_strategies=6,
+                               num_attacker_strategies=4,
+                               num_attacker_types=2)
+        self.assertGreater(model_bytes(Dobbs(large)),
+                           model_bytes(Dobbs(small)))
+        self.assertGreater(model_bytes(Multiple_SingleLP(small)), 0)
+
+        sec_game = SecurityGame(num_targets=5, max_coverage=2,
+                                num_attacker_types=1)
+        self.assertGreater(model_bytes(Eraser(sec_game, sparse=True)), 0)
+
+        rss, _ = peak_rss()
+        self.assertGreater(rss, 0)
+
+
+if __name__ == '__main__':
+        unittest.main()
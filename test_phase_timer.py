@@ -0,0 +1,39 @@
+import time
+import unittest
+from phase_timer import PhaseTimer, PHASES
+
+
+class TestPhaseTimer(unittest.TestCase):
+    def test_nested_timers_roll_up(self):
+        """
+        Test that a nested phase interrupts the running phase, and that a
+        rolled up timer is charged to its own phases only.
+        """
+        timer = PhaseTimer()
+        timer.switch("bookkeeping")
+        with timer.timing("game_transform"):
+            time.sleep(0.02)
+        nested = PhaseTimer()
+        nested.switch("solver_call")
+        time.sleep(0.05)
+        nested.stop()
+        timer.add(nested.take())
+        timer.stop()
+
+        seconds = timer.seconds()
+        self.assertEqual(tuple(seconds), PHASES)
+        self.assertGreaterEqual(seconds["game_transform"], 0.02)
+        self.assertGreaterEqual(seconds["solver_call"], 0.05)
+        self.assertLess(seconds["bookkeeping"], 0.01)
+        self.assertEqual(nested.total_ns, 0)
+
+        # concurrent timers are summed
+        concurrent = PhaseTimer()
+        concurrent.ns["solver_call"] = 10**9
+        timer.add(concurrent, nested=False)
+        self.assertEqual(timer.seconds()["bookkeeping"],
+                         seconds["bookkeeping"])
+
+
+if __name__ == '__main__':
+        unittest.main()
@@ -0,0 +1,55 @@
+import os
+import pstats
+import tempfile
+import unittest
+from games import NormalFormGame, SecurityGame
+from dobbs import Dobbs
+from eraser import Eraser
+from hbgs import HBGS
+from profiling import profiling
+
+
+class TestProfiling(unittest.TestCase):
+    def test_profiles_are_written_per_call(self):
+        """
+        Test that a profile is written for every solver call, tagged with
+        the game dimensions, that nested solvers are part of the profile
+        of their caller unless lps are profiled, and that the methods are
+        restored afterwards.
+        """
+        solve = Dobbs.solve
+        game = NormalFormGame(num_defender_strategies=4,
+                              num_attacker_strategies=3,
+                              num_attacker_types=2)
+        sec_game = SecurityGame(num_targets=5, max_coverage=2,
+                                num_attacker_types=1)
+        with tempfile.TemporaryDirectory() as directory:
+            with profiling(directory):
+                self.assertIsNot(Dobbs.solve, solve)
+                Dobbs(game).solve()
+                Eraser(sec_game, origami_seed=True).solve()
+            self.assertIs(Dobbs.solve, solve)
+            files = sorted(os.listdir(directory))
+            self.assertEqual([name.split(".")[:3] for name in files],
+                             [["Dobbs", "init", "x4-q3-l2"],
+                              ["Dobbs", "solve", "x4-q3-l2"],
+                              ["Eraser", "init", "t5"],
+                              ["Eraser", "solve", "t5"]])
+            stats = pstats.Stats(os.path.join(directory, files[1]))
+            self.assertTrue(any(function[2] == "solve"
+                                for function in stats.stats))
+
+        with tempfile.TemporaryDirectory() as directory:
+            with profiling(directory, lps=True):
+                hbgs = HBGS(game)
+                hbgs.solve()
+            files = os.listdir(directory)
+            num_lps = sum(stats.num_lps for stats in hbgs.stats.values())
+            self.assertEqual(sum(name.startswith("ParametricLP.solve.")
+                                 for name in files), num_lps)
+            self.assertEqual(sum(name.startswith("HBGS.") for name in files),
+                             2)
+
+
+if __name__ == '__main__':
+        unittest.main()
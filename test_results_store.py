@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from results_store import ResultsStore
+
+
+class TestResultsStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "results.sqlite")
+        self.store = ResultsStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_record_and_resume(self):
+        """
+        Test that recorded runs survive reopening the store, and that a run
+        is recorded once.
+        """
+        spec = {"num_attacker_types": 2, "m": 3}
+        self.store.record("experiment", spec, 7, "dobbs", None, "ok",
+                          {"solution_time": 1.5})
+        self.store.record("experiment", spec, 7, "dobbs", None, "ok",
+                          {"solution_time": 9.0})
+        self.store.record("experiment", spec, 8, "dobbs", None, "timeout")
+        self.store.close()
+
+        self.store = ResultsStore(self.path)
+        # spec order does not matter
+        self.assertEqual(self.store.get("experiment",
+                                        {"m": 3, "num_attacker_types": 2},
+                                        7, "dobbs"),
+                         ("ok", {"solution_time": 1.5}))
+        self.assertEqual(self.store.get("experiment", spec, 8, "dobbs"),
+                         ("timeout", {}))
+        self.assertFalse(self.store.is_recorded("experiment", spec, 7,
+                                                "dobbs", {"approx": 0.5}))
+
+    def test_aggregate(self):
+        """
+        Test mean and median per solver and size, over successful runs.
+        """
+        for seed, time in enumerate([4.0, 1.0, 3.0, 2.0]):
+            self.store.record("experiment", {"num_attacker_types": 1}, seed,
+                              "dobbs", None, "ok", {"solution_time": time})
+        for seed, time in enumerate([5.0, 1.0, 3.0]):
+            self.store.record("experiment", {"num_attacker_types": 2}, seed,
+                              "dobbs", None, "ok", {"solution_time": time})
+        self.store.record("experiment", {"num_attacker_types": 2}, 3,
+                          "dobbs", None, "timeout")
+
+        rows = self.store.aggregate("experiment", "num_attacker_types")
+        self.assertEqual([(row["size"], row["n"], row["mean"], row["median"])
+                          for row in rows],
+                         [(1, 4, 2.5, 2.5), (2, 3, 3.0, 3.0)])
+        with self.assertRaises(ValueError):
+            self.store.aggregate("experiment", metric="payoff")
+
+        # memory metrics are aggregated from the metrics JSON
+        self.store.record("experiment", {"num_attacker_types": 1}, 9,
+                          "dobbs", None, "ok", {"peak_rss_bytes": 2048})
+        rows = self.store.aggregate("experiment", "num_attacker_types",
+                                    "peak_rss_bytes")
+        self.assertEqual([(row["size"], row["n"], row["median"])
+                          for row in rows], [(1, 1, 2048)])
+
+
+if __name__ == '__main__':
+        unittest.main()
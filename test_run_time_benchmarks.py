@@ -0,0 +1,39 @@
+import copy
+import unittest
+from run_time_benchmarks import (run_benchmarks, summarize,
+                                 compare_to_baseline)
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_summarize(self):
+        """
+        Test the median and spread of samples.
+        """
+        summary = summarize([4, 1, 3, 2, 5])
+        self.assertEqual(summary["median"], 3)
+        self.assertEqual(summary["q1"], 2)
+        self.assertEqual(summary["q3"], 4)
+        self.assertEqual(summary["min"], 1)
+        self.assertEqual(summary["max"], 5)
+        self.assertEqual(summary["n"], 5)
+
+    def test_compare_to_baseline(self):
+        """
+        Test that a run compared with itself has no regressions, and that
+        a slower median is flagged.
+        """
+        record = run_benchmarks("small", ["Origami", "Harsanyi"],
+                                repetitions=3)
+        self.assertEqual(compare_to_baseline(record, record), [])
+
+        slower = copy.deepcopy(record)
+        summary = slower["results"][0]["summary"]["wall_time"]
+        summary["median"] = 2 * summary["median"] + 1
+        regressions = compare_to_baseline(slower, record)
+        self.assertEqual(len(regressions), 1)
+        self.assertEqual(regressions[0]["benchmark"], "Origami")
+        self.assertEqual(regressions[0]["metric"], "wall_time")
+
+
+if __name__ == '__main__':
+        unittest.main()
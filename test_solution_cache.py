@@ -0,0 +1,109 @@
+import pickle
+import tempfile
+import unittest
+import numpy as np
+from games import NormalFormGame, SecurityGame
+from hbgs import HBGS
+from multipleLP import Multiple_SingleLP
+from solution_cache import SolutionCache, game_key
+from solver_selection import solve
+
+
+class TestSolutionCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.bayse_norm_game = NormalFormGame(num_defender_strategies=6,
+                                              num_attacker_strategies=3,
+                                              num_attacker_types=2)
+        self.sec_game = SecurityGame(num_targets=5,
+                                     max_coverage=2,
+                                     num_attacker_types=1)
+
+    def test_keys(self):
+        """
+        Test that keys depend on the payoffs and the config only.
+        """
+        game = self.bayse_norm_game
+        key = game_key(game, solver="HBGS")
+        self.assertEqual(key, game_key(pickle.loads(pickle.dumps(game)),
+                                       solver="HBGS"))
+        self.assertNotEqual(key, game_key(game, solver="Dobbs"))
+        self.assertNotEqual(key, game_key(game, solver="HBGS", approx=0.5))
+
+        changed = pickle.loads(pickle.dumps(game))
+        changed.defender_payoffs[0, 0, 0] += 1
+        self.assertNotEqual(key, game_key(changed, solver="HBGS"))
+
+    def test_lru_and_disk(self):
+        """
+        Test that the least recently used values are evicted from memory,
+        and read back from disk.
+        """
+        value_bytes = len(pickle.dumps(np.zeros(100),
+                                       protocol=pickle.HIGHEST_PROTOCOL))
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SolutionCache(max_bytes=2 * value_bytes,
+                                  directory=directory)
+            for i in range(3):
+                cache.put(str(i), np.full(100, i))
+                if i == 1:
+                    # make "1" the least recently used
+                    cache.get("0")
+            self.assertEqual(len(cache), 2)
+            self.assertEqual(cache.evictions, 1)
+            self.assertLessEqual(cache.bytes, 2 * value_bytes)
+
+            # "1" was evicted from memory but not from disk
+            self.assertEqual(cache.get("1")[0], 1)
+            self.assertEqual(cache.disk_hits, 1)
+            self.assertIsNone(cache.get("3"))
+
+            # another process only shares the disk tier
+            copy = pickle.loads(pickle.dumps(cache))
+            self.assertEqual(len(copy), 0)
+            self.assertEqual(copy.get("2")[0], 2)
+
+            memory_only = SolutionCache(max_bytes=2 * value_bytes)
+            memory_only.put("0", np.zeros(100))
+            memory_only.put("1", np.zeros(10 ** 4))
+            self.assertEqual(len(memory_only), 1)
+            self.assertIsNone(memory_only.get("1"))
+
+    def test_cached_solvers(self):
+        """
+        Test that HBGS and Multiple_SingleLP share the LPs of a game, and
+        that cached solutions equal the solved ones.
+        """
+        cache = SolutionCache()
+        game = self.bayse_norm_game
+        multiple = Multiple_SingleLP(game, cache=cache)
+        multiple.solve()
+        self.assertEqual(multiple.cached, {})
+
+        hbgs = HBGS(game, cache=cache)
+        hbgs.solve()
+        root = hbgs.stats[hbgs.root]
+        self.assertEqual(root.num_lps, 0)
+        self.assertGreater(root.num_cached, 0)
+        self.assertAlmostEqual(hbgs.opt_defender_payoff,
+                               multiple.opt_defender_payoff)
+
+        again = Multiple_SingleLP(game, cache=cache)
+        again.solve()
+        self.assertEqual(again.LPs, [])
+        self.assertEqual(again.opt_defender_payoff,
+                         multiple.opt_defender_payoff)
+        self.assertEqual(again.opt_attacker_pure_strategy,
+                         multiple.opt_attacker_pure_strategy)
+
+        solution = solve(self.sec_game, solver="Origami", cache=cache)
+        cached = solve(self.sec_game, solver="Origami", cache=cache)
+        self.assertIsNone(cached.game)
+        self.assertEqual(cached.opt_defender_payoff,
+                         solution.opt_defender_payoff)
+        np.testing.assert_array_equal(cached.opt_defender_mixed_strategy,
+                                      solution.opt_defender_mixed_strategy)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import numpy as np
+from games import SecurityGame, NormalFormGame
+from dobbs import Dobbs
+from solver_selection import CostModel, Solution, select_solver, solve
+
+
+class TestSolverSelection(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.bayse_norm_game = NormalFormGame(num_defender_strategies=6,
+                                              num_attacker_strategies=3,
+                                              num_attacker_types=2)
+        self.sec_game = SecurityGame(num_targets=5,
+                                     max_coverage=2,
+                                     num_attacker_types=1)
+        self.bayse_sec_game = SecurityGame(num_targets=5,
+                                           max_coverage=2,
+                                           num_attacker_types=2)
+
+    def test_solvers_agree(self):
+        """
+        Test that every solver reaches the payoff of DOBBS, in the same
+        Solution, whatever representation it works on.
+        """
+        for game in (self.bayse_norm_game, self.bayse_sec_game):
+            normal_game = game if game.type == "normal" else \
+                NormalFormGame(game=game, harsanyi=False)
+            dobbs = Dobbs(normal_game)
+            dobbs.solve()
+            solvers = ["Dobbs", "MultipleLP", "Multiple_SingleLP", "HBGS"]
+            if game.type == "compact":
+                solvers.append("HBGS-origami")
+            for solver in solvers:
+                solution = solve(game, solver=solver)
+                self.assertIsInstance(solution, Solution)
+                self.assertEqual(solution.solver, solver)
+                # only Dobbs and MultipleLP need the normal form
+                if solver in ("HBGS", "Multiple_SingleLP", "HBGS-origami"):
+                    self.assertIs(solution.game, game)
+                self.assertAlmostEqual(solution.opt_defender_payoff,
+                                       dobbs.opt_defender_payoff, places=3)
+                self.assertEqual(len(solution.opt_attacker_pure_strategy),
+                                 game.num_attacker_types)
+                self.assertGreaterEqual(solution.solution_time_with_overhead,
+                                        solution.solution_time)
+
+        dobbs = Dobbs(NormalFormGame(game=self.sec_game, harsanyi=False))
+        dobbs.solve()
+        for solver in ("Origami", "OrigamiMILP", "Eraser"):
+            solution = solve(self.sec_game, solver=solver)
+            self.assertAlmostEqual(solution.opt_defender_payoff,
+                                   dobbs.opt_defender_payoff, places=3)
+            self.assertEqual(solution.opt_defender_mixed_strategy.shape, (5,))
+
+        with self.assertRaises(ValueError):
+            solve(self.bayse_sec_game, solver="Origami")
+        with self.assertRaises(ValueError):
+            solve(self.bayse_norm_game, solver="Eraser")
+
+    def test_select_solver(self):
+        """
+        Test that the solver predicted to be fastest is chosen, and that
+        single type solvers are left out for bayesian games, as are
+        heuristic solvers for every game.
+        """
+        # intercept, log x, log q, l, l * log q
+        cost_model = CostModel({
+            "Origami": [-6.0, 0, 0, 0, 0],
+            "Eraser": [-5.0, 0, 0, 0, 0],
+            "HBGS-origami": [-4.0, 0, 0, 0, 0],
+            "Dobbs": [-7.0, 0, 0, 0, 0],
+            "SecurityGame->NormalFormGame": [-2.0, 0, 0, 0, 0],
+        })
+        self.assertEqual(select_solver(self.sec_game, cost_model)[0],
+                         "Origami")
+        self.assertEqual(select_solver(self.bayse_sec_game, cost_model),
+                         ("Dobbs", np.exp(-7.0) + np.exp(-2.0)))
+        self.assertEqual(select_solver(self.bayse_norm_game, cost_model),
+                         ("Dobbs", np.exp(-7.0)))
+
+        # HBGS is charged its time on the security game, not on its normal
+        # form, which has C(30, 10) defender strategies
+        cost_model = CostModel({
+            "HBGS": [-2.0, 1.0, 0, 0, 0],
+            "HBGS-security": [-3.0, 1.0, 0, 0, 0],
+        })
+        large_sec_game = SecurityGame(num_targets=30,
+                                      max_coverage=10,
+                                      num_attacker_types=3)
+        self.assertEqual(select_solver(large_sec_game, cost_model),
+                         ("HBGS", np.exp(-3.0) * 30))
+
+        # uncalibrated
+        self.assertEqual(select_solver(self.sec_game, CostModel()),
+                         ("Origami", None))
+        self.assertEqual(select_solver(SecurityGame(num_targets=5,
+                                                    max_coverage=2,
+                                                    num_attacker_types=3),
+                                       CostModel()),
+                         ("HBGS", None))
+
+        # fit recovers a known cost, with time doubling per attacker type
+        records = [{"timeout": None, "results": [
+            {"benchmark": "HBGS",
+             "size": {"num_defender_strategies": x,
+                      "num_attacker_strategies": q,
+                      "num_attacker_types": l},
+             "timeouts": 0,
+             "summary": {"wall_time": {"median": 0.01 * 2 ** l}}}
+            for x in (10, 20) for q in (3, 5) for l in (1, 2, 3)]}]
+        cost_model = CostModel.fit(records, ridge=0)
+        self.assertAlmostEqual(cost_model.predict("HBGS", (10, 3, 4)),
+                               0.16, places=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,20 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
 import unittest
+import numpy as np
 from games import SecurityGame, NormalFormGame
 from dobbs import Dobbs
-from multipleLP import MultipleLP, Multiple_SingleLP
+from multipleLP import MultipleLP, Multiple_SingleLP, ParametricLP
 from eraser import Eraser
-from origami import Origami
+from origami import Origami, BatchedOrigami, OutOfCoreOrigami
 from origami_milp import OrigamiMILP
 from hbgs import HBGS
+from phase_timer import PHASES
+from solver_backends import pulp as plp
 
 class TestSolvers(unittest.TestCase):
     @classmethod
@@ -108,6 +117,11 @@ class TestSolvers(unittest.TestCase):
         self.p3_hbgs = HBGS(self.bayse_sec_game)
         self.p3_hbgs_origami = HBGS(self.bayse_sec_game, True)
         self.p3_hbgs_norm = HBGS(self.bayse_sec_norm_game)
+        self.p3_hbgs_lp_pool = HBGS(self.bayse_sec_norm_game, lp_workers=3)
+        self.p3_multLP_lp_pool = MultipleLP(self.bayse_sec_norm_hars_game,
+                                            lp_workers=4)
+        self.p3_multSingLP_lp_pool = Multiple_SingleLP(self.bayse_sec_game,
+                                                       lp_workers=4)
 
         self.p3_dobbs.solve()
         self.p3_multLP.solve()
@@ -115,6 +129,9 @@ class TestSolvers(unittest.TestCase):
         self.p3_hbgs.solve()
         self.p3_hbgs_origami.solve()
         self.p3_hbgs_norm.solve()
+        self.p3_hbgs_lp_pool.solve()
+        self.p3_multLP_lp_pool.solve()
+        self.p3_multSingLP_lp_pool.solve()
 
         # part 4 (bayesian norm_form game)
         print("solving part 4")
@@ -131,6 +148,7 @@ class TestSolvers(unittest.TestCase):
             Multiple_SingleLP(self.bayse_norm_partial_game)
 
         self.p4_hbgs = HBGS(self.bayse_norm_game)
+        self.p4_hbgs_parallel = HBGS(self.bayse_norm_game, workers=2)
 
         self.p4_dobbs.solve()
         self.p4_multLP.solve()
@@ -141,6 +159,7 @@ class TestSolvers(unittest.TestCase):
         self.p4_dobbs_partial.solve()
         self.p4_multSingLP_partial.solve()
         self.p4_hbgs.solve()
+        self.p4_hbgs_parallel.solve()
 
         # part 5
         print("solving part 5")
@@ -254,6 +273,14 @@ class TestSolvers(unittest.TestCase):
         self.assertAlmostEqual(self.p3_hbgs_norm.opt_defender_payoff,
                                self.p3_dobbs.opt_defender_payoff,
                                places=1)
+        self.assertAlmostEqual(self.p3_hbgs_lp_pool.opt_defender_payoff,
+                               self.p3_dobbs.opt_defender_payoff,
+                               places=1)
+        self.assertAlmostEqual(self.p3_multLP_lp_pool.opt_defender_payoff,
+                               self.p3_multLP.opt_defender_payoff)
+        self.assertEqual(
+            self.p3_multSingLP_lp_pool.opt_attacker_pure_strategy,
+            self.p3_multSingLP.opt_attacker_pure_strategy)
 
     def test_p4(self):
         """
@@ -283,6 +310,9 @@ class TestSolvers(unittest.TestCase):
         self.assertAlmostEqual(self.p4_hbgs.opt_defender_payoff,
                                self.p4_dobbs.opt_defender_payoff,
                                places=1)
+        self.assertAlmostEqual(self.p4_hbgs_parallel.opt_defender_payoff,
+                               self.p4_dobbs.opt_defender_payoff,
+                               places=1)
         # test that opt defender strat. yields the same attacker pure strategy
         self.assertSequenceEqual(self.p4_dobbs.opt_attacker_pure_strategy,
                                  self.p4_multSingLP.opt_attacker_pure_strategy)
@@ -310,5 +340,522 @@ class TestSolvers(unittest.TestCase):
                          self.p5_multLP.opt_attacker_pure_strategy)
 
 
+class TestOrigami(unittest.TestCase):
+    def test_batch_agrees_with_origami(self):
+        """
+        Test that every row of a batch of games of different sizes agrees
+        with origami run on the corresponding game and attacker type.
+        """
+        games = [SecurityGame(num_targets=20,
+                              max_coverage=4,
+                              num_attacker_types=3),
+                 SecurityGame(num_targets=12,
+                              max_coverage=2,
+                              num_attacker_types=2)]
+        batch = BatchedOrigami.from_games(games)
+        batch.solve()
+
+        for b, (g, l) in enumerate(batch.rows):
+            origami = Origami(games[g], l)
+            origami.solve()
+            num_targets = games[g].num_targets
+
+            self.assertSequenceEqual(origami.opt_attack_set,
+                                     batch.opt_attack_set(b))
+            self.assertEqual(origami.opt_attacked_target,
+                             batch.opt_attacked_target[b])
+            self.assertAlmostEqual(origami.opt_defender_payoff,
+                                   batch.opt_defender_payoff[b],
+                                   places=6)
+            for t in range(num_targets):
+                self.assertAlmostEqual(origami.opt_coverage[t],
+                                       batch.opt_coverage[b, t],
+                                       places=6)
+
+    def test_sweep_agrees_with_origami(self):
+        """
+        Test that a max_coverage sweep agrees with solving origami anew for
+        every resource level, and reports its phases as solve does.
+        """
+        game = SecurityGame(num_targets=15,
+                            max_coverage=1,
+                            num_attacker_types=1)
+        sweep = Origami(game)
+        sweep.sweep(range(1, game.num_targets + 1))
+        self.assertEqual(tuple(sweep.phase_times), PHASES)
+        self.assertEqual(sweep.solution_time,
+                         sweep.phase_times["solver_call"])
+        self.assertGreater(sweep.solution_time, 0)
+
+        for k, max_coverage in enumerate(range(1, game.num_targets + 1)):
+            game.max_coverage = max_coverage
+            origami = Origami(game)
+            origami.solve()
+
+            self.assertEqual(len(origami.opt_attack_set),
+                             sweep.sweep_attack_set_size[k])
+            self.assertEqual(origami.opt_attacked_target,
+                             sweep.sweep_attacked_target[k])
+            self.assertAlmostEqual(origami.opt_defender_payoff,
+                                   sweep.sweep_defender_payoff[k],
+                                   places=6)
+            for t in range(game.num_targets):
+                self.assertAlmostEqual(origami.opt_coverage[t],
+                                       sweep.sweep_coverage[k, t],
+                                       places=6)
+
+    def test_out_of_core_agrees_with_origami(self):
+        """
+        Test that origami on memory-mapped payoff columns, grown from a small
+        prefix, agrees with origami on the in-memory game.
+        """
+        game = SecurityGame(num_targets=500,
+                            max_coverage=20,
+                            num_attacker_types=1)
+        origami = Origami(game)
+        origami.solve()
+
+        with tempfile.TemporaryDirectory() as directory:
+            columns = []
+            for name in ('attacker_uncovered', 'attacker_covered',
+                         'defender_uncovered', 'defender_covered'):
+                path = os.path.join(directory, name + '.npy')
+                np.save(path, getattr(game, name)[:, 0])
+                columns.append(np.load(path, mmap_mode='r'))
+
+            out_of_core = OutOfCoreOrigami(*columns,
+                                           max_coverage=game.max_coverage,
+                                           prefix_size=4,
+                                           chunk_size=64)
+            out_of_core.solve()
+
+            self.assertSequenceEqual(origami.opt_attack_set,
+                                     list(out_of_core.opt_attack_set))
+            self.assertEqual(origami.opt_attacked_target,
+                             out_of_core.opt_attacked_target)
+            self.assertAlmostEqual(origami.opt_defender_payoff,
+                                   out_of_core.opt_defender_payoff,
+                                   places=6)
+            np.testing.assert_allclose(origami.opt_coverage,
+                                       out_of_core.dense_coverage())
+
+
+class TestSparseMILP(unittest.TestCase):
+    def test_sparse_models_agree_with_origami(self):
+        """
+        Test that Eraser and OrigamiMILP built as sparse matrices agree with
+        origami.
+        """
+        game = SecurityGame(num_targets=30,
+                            max_coverage=5,
+                            num_attacker_types=1)
+        origami = Origami(game)
+        eraser = Eraser(game, sparse=True)
+        origami_milp = OrigamiMILP(game, sparse=True)
+
+        origami.solve()
+        eraser.solve()
+        origami_milp.solve()
+
+        self.assertEqual(origami.opt_attacked_target,
+                         eraser.opt_attacked_target)
+        self.assertEqual(origami.opt_attacked_target,
+                         origami_milp.opt_attacked_target)
+        self.assertAlmostEqual(origami.opt_defender_payoff,
+                               eraser.opt_defender_payoff,
+                               places=1)
+        self.assertAlmostEqual(origami.opt_defender_payoff,
+                               origami_milp.opt_defender_payoff,
+                               places=1)
+        self.assertAlmostEqual(
+            origami.opt_coverage[origami.opt_attacked_target],
+            eraser.opt_coverage[eraser.opt_attacked_target],
+            places=1)
+
+    def test_sparse_origami_milp_without_solution(self):
+        """
+        Test that a sparse OrigamiMILP that HiGHS cannot solve reports its
+        status instead of failing on the missing solution.
+        """
+        game = SecurityGame(num_targets=5,
+                            max_coverage=2,
+                            num_attacker_types=1)
+        origami_milp = OrigamiMILP(game, sparse=True)
+        # variables are laid out as [k, C, y], cover every target twice
+        coefficients = np.zeros(1 + 2 * game.num_targets)
+        coefficients[1:1 + game.num_targets] = 1
+        origami_milp.model.add_constraint(coefficients,
+                                          2 * game.num_targets, np.inf)
+        origami_milp.solve()
+
+        self.assertEqual(origami_milp.status, "Infeasible")
+        self.assertEqual(origami_milp.opt_defender_payoff, float("-inf"))
+        self.assertIsNone(origami_milp.opt_attacked_target)
+
+
+class TestOrigamiSeededEraser(unittest.TestCase):
+    def test_eraser_certifies_origami(self):
+        """
+        Test that eraser seeded with origami certifies origami's solution,
+        for both the PuLP and the sparse model.
+        """
+        game = SecurityGame(num_targets=30,
+                            max_coverage=5,
+                            num_attacker_types=1)
+        origami = Origami(game)
+        origami.solve()
+
+        for sparse in (False, True):
+            eraser = Eraser(game, sparse=sparse, origami_seed=True)
+            eraser.solve()
+
+            self.assertTrue(eraser.certified)
+            self.assertEqual(eraser.num_free_binaries,
+                             len(origami.opt_attack_set))
+            self.assertEqual(origami.opt_attacked_target,
+                             eraser.opt_attacked_target)
+
+
+class TestParametricLP(unittest.TestCase):
+    @staticmethod
+    def baseline_lp(game, pure_strat):
+        """
+        The optimal defender payoff of pure_strat in game, None if it is
+        infeasible, from an LP built from scratch: the defender maximizes
+        the expected payoff subject to every attacker type k preferring
+        pure_strat[k] to every other strategy.
+        """
+        prob = plp.LpProblem(name="Baseline", sense=plp.LpMaximize)
+        types = range(game.num_attacker_types)
+        p = game.attacker_type_probability
+        if game.type == "normal":
+            x = [plp.LpVariable("x_{}".format(i), lowBound=0, upBound=1)
+                 for i in range(game.num_defender_strategies)]
+            R = game.defender_payoffs
+            C = game.attacker_payoffs
+            prob += plp.lpSum(p[k] * R[i, pure_strat[k], k] * x[i]
+                              for k in types for i in range(len(x)))
+            prob += plp.lpSum(x) == 1
+            for k in types:
+                for j in range(game.num_attacker_strategies):
+                    prob += plp.lpSum(
+                        (C[i, pure_strat[k], k] - C[i, j, k]) * x[i]
+                        for i in range(len(x))) >= 0
+        else:
+            c = [plp.LpVariable("c_{}".format(t), lowBound=0, upBound=1)
+                 for t in range(game.num_targets)]
+
+            def utility(covered, uncovered, t, k):
+                return covered[t, k] * c[t] + uncovered[t, k] * (1 - c[t])
+
+            prob += plp.lpSum(p[k] * utility(game.defender_covered,
+                                             game.defender_uncovered,
+                                             pure_strat[k], k)
+                              for k in types)
+            prob += plp.lpSum(c) <= game.max_coverage
+            for k in types:
+                for t in range(game.num_targets):
+                    prob += utility(game.attacker_covered,
+                                    game.attacker_uncovered,
+                                    pure_strat[k], k) >= \
+                        utility(game.attacker_covered,
+                                game.attacker_uncovered, t, k)
+        prob.solve(plp.GLPK(msg=0))
+        if prob.status != plp.LpStatusOptimal:
+            return None
+        return plp.value(prob.objective)
+
+    def test_resolve_agrees_with_baseline_lp(self):
+        """
+        Test that one parametric LP re-solved over several pure strategies
+        agrees with an LP built from scratch for each of them, and that its
+        best-response constraints are updated rather than added.
+        """
+        sec_game = SecurityGame(num_targets=5,
+                                max_coverage=2,
+                                num_attacker_types=2)
+        norm_game = NormalFormGame(game=sec_game, harsanyi=False)
+        for game in (sec_game, norm_game):
+            parametric = ParametricLP(game)
+            num_constraints = None
+            for pure_strat in ((0, 1), (2, 2), (4, 0), (0, 1)):
+                parametric.set_pure_strategy(pure_strat)
+                parametric.solve()
+                if num_constraints is None:
+                    num_constraints = parametric.prob.numConstraints()
+                self.assertEqual(parametric.prob.numConstraints(),
+                                 num_constraints)
+                payoff = self.baseline_lp(game, pure_strat)
+                self.assertEqual(parametric.feasible, payoff is not None)
+                if payoff is not None:
+                    self.assertAlmostEqual(parametric.opt_defender_payoff,
+                                           payoff, places=5)
+
+
+class TestIncrementalHBGS(unittest.TestCase):
+    def test_resolve_agrees_with_dobbs(self):
+        """
+        Test that hbgs re-solved after a change of the type probabilities and
+        of the payoffs of one type agrees with dobbs on the changed game.
+        """
+        game = NormalFormGame(num_defender_strategies=5,
+                              num_attacker_strategies=3,
+                              num_attacker_types=4)
+        hbgs = HBGS(game)
+        hbgs.solve()
+
+        hbgs.resolve(attacker_type_probability=[0.1, 0.2, 0.3, 0.4])
+        dobbs = Dobbs(game)
+        dobbs.solve()
+        self.assertAlmostEqual(hbgs.opt_defender_payoff,
+                               dobbs.opt_defender_payoff,
+                               places=1)
+
+        game.defender_payoffs[:, :, 2] = -game.defender_payoffs[:, :, 2]
+        hbgs.resolve(changed_types=[2])
+        dobbs = Dobbs(game)
+        dobbs.solve()
+        self.assertAlmostEqual(hbgs.opt_defender_payoff,
+                               dobbs.opt_defender_payoff,
+                               places=1)
+
+    def test_resolve_from_and_to_zero_probability(self):
+        """
+        Test that hbgs re-solved after typespaces got or lost all of their
+        probability agrees with dobbs, with finite bounds everywhere.
+        """
+        game = NormalFormGame(num_defender_strategies=5,
+                              num_attacker_strategies=3,
+                              num_attacker_types=4)
+        hbgs = HBGS(game)
+        hbgs.solve()
+
+        for probability in ([0.5, 0.5, 0, 0], [0.25, 0.25, 0.25, 0.25],
+                            [0, 0, 0, 1]):
+            hbgs.resolve(attacker_type_probability=probability)
+            dobbs = Dobbs(game)
+            dobbs.solve()
+            self.assertAlmostEqual(hbgs.opt_defender_payoff,
+                                   dobbs.opt_defender_payoff,
+                                   places=1)
+            for bounds in hbgs.bounds.values():
+                self.assertFalse(np.isnan(bounds).any())
+
+
+class TestHBGSLPPool(unittest.TestCase):
+    def test_lp_threads_are_shut_down(self):
+        """
+        Test that the threads of the LP pool are shut down once hbgs is
+        solved or re-solved.
+        """
+        game = NormalFormGame(num_defender_strategies=5,
+                              num_attacker_strategies=3,
+                              num_attacker_types=4)
+        num_threads = threading.active_count()
+        hbgs = HBGS(game, lp_workers=3)
+        hbgs.solve()
+        self.assertEqual(threading.active_count(), num_threads)
+        hbgs.resolve(attacker_type_probability=[0.1, 0.2, 0.3, 0.4])
+        self.assertEqual(threading.active_count(), num_threads)
+        hbgs.solve_anytime(60)
+        self.assertEqual(threading.active_count(), num_threads)
+
+
+class TestHBGSStats(unittest.TestCase):
+    def test_stats_records(self):
+        """
+        Test that every typespace is recorded, that its LPs and pruned
+        strategies add up to its feasible strategies, and that the records
+        can be written to JSON.
+        """
+        game = NormalFormGame(num_defender_strategies=5,
+                              num_attacker_strategies=3,
+                              num_attacker_types=4)
+        hbgs = HBGS(game)
+        hbgs.solve()
+
+        records = hbgs.stats_records()
+        self.assertEqual(len(records), 7)
+        self.assertEqual(records[0]["attacker_types"], [0, 1, 2, 3])
+        self.assertEqual(records[0]["level"], 0)
+        for record in records:
+            self.assertEqual(record["num_lps"] + record["num_pruned"],
+                             record["num_feasible_strategies"])
+        self.assertAlmostEqual(records[0]["opt_defender_payoff"],
+                               hbgs.opt_defender_payoff)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stats.json")
+            hbgs.export_stats(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f), records)
+
+
+class TestAnytimeHBGS(unittest.TestCase):
+    def test_anytime_bounds_contain_optimum(self):
+        """
+        Test that anytime hbgs returns a solution and an upper bound around
+        the optimum of dobbs, and the optimum itself given enough time.
+        """
+        game = NormalFormGame(num_defender_strategies=5,
+                              num_attacker_strategies=3,
+                              num_attacker_types=4)
+        dobbs = Dobbs(game)
+        dobbs.solve()
+
+        for time_limit in (0, 60):
+            hbgs = HBGS(game)
+            hbgs.solve_anytime(time_limit, approx=0.5)
+            self.assertLessEqual(hbgs.opt_defender_payoff,
+                                 dobbs.opt_defender_payoff + 1e-4)
+            self.assertGreaterEqual(hbgs.upper_bound,
+                                    dobbs.opt_defender_payoff - 1e-4)
+        self.assertAlmostEqual(hbgs.opt_defender_payoff,
+                               dobbs.opt_defender_payoff,
+                               places=1)
+        self.assertEqual(hbgs.achieved_ratio, 1.0)
+        self.assertFalse(hbgs.heuristic)
+
+    def test_origami_leaves_are_heuristic(self):
+        """
+        Test that anytime hbgs with origami leaves claims no upper bound.
+        """
+        game = SecurityGame(num_targets=5,
+                            max_coverage=2,
+                            num_attacker_types=3)
+        hbgs = HBGS(game, origami_for_leaves=True)
+        hbgs.solve_anytime(60, approx=0.5)
+        self.assertTrue(hbgs.heuristic)
+        self.assertIsNone(hbgs.upper_bound)
+        self.assertIsNone(hbgs.achieved_ratio)
+
+
+class TestHBGSTreeShape(unittest.TestCase):
+    def test_tree_shapes_agree_with_dobbs(self):
+        """
+        Test that hbgs agrees with dobbs on every tree shape, and that the
+        level report covers every type and LP.
+        """
+        game = NormalFormGame(num_defender_strategies=5,
+                              num_attacker_strategies=3,
+                              num_attacker_types=5)
+        dobbs = Dobbs(game)
+        dobbs.solve()
+
+        for tree in ("index", "balanced", "clustered"):
+            hbgs = HBGS(game, tree=tree)
+            hbgs.solve()
+            self.assertAlmostEqual(hbgs.opt_defender_payoff,
+                                   dobbs.opt_defender_payoff,
+                                   places=1)
+            self.assertEqual(sorted(hbgs.root), list(range(5)))
+
+            report = hbgs.level_report()
+            self.assertEqual(report[0]["typespaces"], 1)
+            self.assertEqual(sum(level["lps"] for level in report),
+                             sum(stats.num_lps
+                                 for stats in hbgs.stats.values()))
+
+
+class TestHBGSBounds(unittest.TestCase):
+    @staticmethod
+    def dominant_strategy_game(num_attacker_strategies, num_attacker_types):
+        """
+        A normal form game in which attacker strategy 0 strictly dominates
+        the others for every type, so a single pure strategy is feasible,
+        and the defender payoff of the optimum.
+        """
+        game = NormalFormGame(num_defender_strategies=3,
+                              num_attacker_strategies=num_attacker_strategies,
+                              num_attacker_types=num_attacker_types)
+        game.attacker_payoffs[:, 0, :] = game.attacker_payoffs.max() + 1
+        payoff = (game.defender_payoffs[:, 0, :] @
+                  game.attacker_type_probability).max()
+        return (game, payoff)
+
+    def test_bounds_grow_with_feasible_strategies(self):
+        """
+        Test that the bounds of every typespace are kept for its feasible
+        strategies only, far fewer than the Q^L pure strategies of the game.
+        """
+        game, payoff = self.dominant_strategy_game(10, 8)
+        tracemalloc.start()
+        hbgs = HBGS(game)
+        hbgs.solve()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.assertAlmostEqual(hbgs.opt_defender_payoff, payoff)
+        for node, feasible in hbgs.feasible_strategies.items():
+            self.assertEqual(len(feasible), 1)
+            self.assertEqual(hbgs.bounds[node].shape, (1,))
+        # a dense table of the 10^8 strategies of the root alone takes 800MB
+        self.assertLess(peak, 50 * 2 ** 20)
+
+    def test_codes_beyond_int64(self):
+        """
+        Test that a game whose 4^32 = 2^64 pure strategies overflow the int64
+        codes is solved with pure strategy tuples as keys.
+        """
+        game, payoff = self.dominant_strategy_game(4, 32)
+        hbgs = HBGS(game)
+        self.assertFalse(hbgs.encoded)
+        hbgs.solve()
+
+        self.assertAlmostEqual(hbgs.opt_defender_payoff, payoff)
+        self.assertEqual(hbgs.feasible_strategies[hbgs.root],
+                         [tuple([0] * 32)])
+        self.assertEqual(hbgs.level_report()[-1]["feasible_strategies"], 32)
+
+
+class TestPhaseTimes(unittest.TestCase):
+    def test_every_solver_reports_phases(self):
+        """
+        Test that every solver reports the same phases, with solution_time
+        as its solver call, and that the phases of the LPs and origami calls
+        of hbgs roll up without being counted twice.
+        """
+        sec_game = SecurityGame(num_targets=5,
+                                max_coverage=2,
+                                num_attacker_types=3)
+        norm_game = NormalFormGame(game=sec_game, harsanyi=False)
+        harsanyi_game = NormalFormGame(game=norm_game)
+
+        solvers = [Dobbs(norm_game),
+                   MultipleLP(harsanyi_game),
+                   Multiple_SingleLP(sec_game),
+                   Origami(sec_game),
+                   BatchedOrigami.from_game(sec_game),
+                   OutOfCoreOrigami.from_game(sec_game),
+                   OrigamiMILP(sec_game),
+                   Eraser(sec_game, origami_seed=True),
+                   HBGS(norm_game),
+                   HBGS(sec_game, origami_for_leaves=True)]
+        for solver in solvers:
+            start_time = time.perf_counter()
+            solver.solve()
+            wall_time = time.perf_counter() - start_time
+            self.assertEqual(tuple(solver.phase_times), PHASES)
+            self.assertEqual(solver.solution_time,
+                             solver.phase_times["solver_call"])
+            self.assertGreater(solver.solution_time, 0)
+            for seconds in solver.phase_times.values():
+                self.assertGreaterEqual(seconds, 0)
+            self.assertLessEqual(solver.solution_time_with_overhead,
+                                 wall_time)
+
+        # the phases include the setup of hbgs in __init__
+        start_time = time.perf_counter()
+        hbgs = HBGS(norm_game)
+        hbgs.solve()
+        self.assertLessEqual(sum(hbgs.phase_times.values()),
+                             time.perf_counter() - start_time)
+        self.assertAlmostEqual(hbgs.solution_time,
+                               sum(stats.solve_time
+                                   for stats in hbgs.stats.values()))
+        self.assertGreater(hbgs.phase_times["model_build"], 0)
+        self.assertGreater(hbgs.phase_times["game_transform"], 0)
+
+
 if __name__ == '__main__':
         unittest.main()